@@ -0,0 +1,36 @@
+"""Generates the settings of a paradigm for a range of participants into settings/<paradigm>.store,
+or into one CSV per participant with --csv
+
+python -m scripts.generate_settings neuro3_syllables --first 1 --last 399 --workers 8
+"""
+import argparse
+import os
+import time
+
+from src.core.settings_batch import GENERATORS, generate_settings, generate_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generates the settings files of the participants')
+    parser.add_argument('paradigm', choices=list(GENERATORS))
+    parser.add_argument('--first', type=int, default=1, help='first participant id')
+    parser.add_argument('--last', type=int, default=399, help='last participant id')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of processes, 1 generates sequentially')
+    parser.add_argument('--csv', action='store_true',
+                        help='write one CSV per participant instead of the settings store')
+    parser.add_argument('--output', default=None,
+                        help='output folder of the CSVs or the store file, defaults to settings/<paradigm>(.store)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    participant_ids = range(args.first, args.last + 1)
+    if args.csv:
+        n_participants = generate_settings(args.paradigm, participant_ids, folder=args.output, workers=args.workers)
+    else:
+        n_participants = generate_store(args.paradigm, participant_ids, filename=args.output, workers=args.workers)
+    print(f'Generated settings of {n_participants} participants in {time.perf_counter() - started:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,5 @@
-import os
-from src.neuro3_syllables import settings_generation as generator
+from src.core.settings_batch import generate_store
 
-os.makedirs(generator.settings_folder(), exist_ok=True)
-
-df_trials = generator.create_experiment_trials()
-df_trials.head()
-df_trials.to_csv(generator.generate_settings_filename(1))
-
-for i in range(1, 400):
-    generator.restart()
-    df_trials = generator.create_experiment_trials(i)
-    df_trials.to_csv(generator.generate_settings_filename(i))
+# settings of all participants are written to settings/neuro3_syllables.store
+# see scripts/generate_settings.py for generating in parallel or into CSVs
+generate_store('neuro3_syllables', range(1, 400))
@@ -0,0 +1,34 @@
+"""Converts the stimuli of the paradigms to the format of the mixer, see src/core/stimulus_pcm.py
+
+python -m scripts.preprocess_stimuli neuro3_syllables syllable_comparison
+"""
+import argparse
+import os
+import time
+
+import pygame
+
+from src.core.audio import MixerSettings, init_mixer
+from src.core.stimulus_pcm import convert_stimuli
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Converts the stimuli to the format of the mixer')
+    parser.add_argument('paradigms', nargs='+', help='names of the folders in stimuli')
+    defaults = MixerSettings()
+    parser.add_argument('--frequency', type=int, default=defaults.frequency)
+    parser.add_argument('--size', type=int, default=defaults.size)
+    parser.add_argument('--channels', type=int, default=defaults.channels)
+    args = parser.parse_args()
+
+    init_mixer(MixerSettings(frequency=args.frequency, size=args.size, channels=args.channels))
+    print(f'Mixer format: {pygame.mixer.get_init()}')
+    for paradigm in args.paradigms:
+        started = time.perf_counter()
+        manifest = convert_stimuli(os.path.join(os.getcwd(), 'stimuli', paradigm))
+        print(f'{paradigm}: {len(manifest["stimuli"])} stimuli in {time.perf_counter() - started:.1f} s')
+    pygame.mixer.quit()
+
+
+if __name__ == '__main__':
+    main()
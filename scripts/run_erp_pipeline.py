@@ -0,0 +1,42 @@
+"""Runs the ERP pipeline of the analysis notebooks on many sessions, see src/analysis/batch_pipeline.py
+
+python -m scripts.run_erp_pipeline /Volumes/SanDisk/data/010_syl_4m_bil_20241022 /Volumes/SanDisk/data/011_syl_4m_bil_20241023
+python -m scripts.run_erp_pipeline --data-folder /Volumes/SanDisk/data --workers 4
+"""
+import argparse
+import os
+import time
+
+from src.analysis.batch_pipeline import PipelineConfig, run_batch, session_paths
+
+
+def main():
+    defaults = PipelineConfig()
+    parser = argparse.ArgumentParser(description='Runs the ERP pipeline on the sessions')
+    parser.add_argument('sessions', nargs='*', help='session folders <data folder>/<exp_id>')
+    parser.add_argument('--data-folder', help='run all sessions in the folder with an EEG recording')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of processes')
+    parser.add_argument('--l-freq', type=float, default=defaults.l_freq)
+    parser.add_argument('--h-freq', type=float, default=defaults.h_freq)
+    parser.add_argument('--asr-cutoff', type=float, default=defaults.asr_cutoff)
+    args = parser.parse_args()
+
+    sessions = list(args.sessions)
+    if args.data_folder:
+        for name in sorted(os.listdir(args.data_folder)):
+            folder = os.path.join(args.data_folder, name)
+            if os.path.exists(session_paths(folder)[1]):
+                sessions.append(folder)
+    config = PipelineConfig(l_freq=args.l_freq, h_freq=args.h_freq, asr_cutoff=args.asr_cutoff)
+    started = time.perf_counter()
+    results = run_batch(sessions, config, workers=args.workers)
+    for result in results:
+        if 'error' in result:
+            print(f'{result["session"]}: failed\n{result["error"]}')
+        else:
+            print(f'{result["session"]}: {result["stages"]} -> {result["evokeds"]}')
+    print(f'Processed {len(results)} sessions in {time.perf_counter() - started:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
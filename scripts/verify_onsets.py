@@ -0,0 +1,54 @@
+"""Compares the timing log of a session with the triggers recorded with the EEG, see
+src/analysis/onset_verification.py
+
+python -m scripts.verify_onsets logs/neuro3_syllables/<session>_timings.csv data/<session>.vmrk
+"""
+import argparse
+import csv
+import json
+import os
+
+from src.analysis.onset_verification import read_event_list, read_timing_log, read_vmrk, verify_onsets
+
+
+def read_expected_codes(timing_filename):
+    # the runner exports the settings next to the timings
+    settings_filename = timing_filename.replace('_timings.csv', '_settings.csv')
+    if settings_filename == timing_filename or not os.path.exists(settings_filename):
+        return None
+    with open(settings_filename, newline='') as f:
+        return [int(row['trigger']) for row in csv.DictReader(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aligns the timing log of a session with the recorded triggers')
+    parser.add_argument('timings', help='timing log of the session (*_timings.csv)')
+    parser.add_argument('events', help='BrainVision marker file (.vmrk) or CSV with onset and description')
+    parser.add_argument('--sfreq', type=float, help='sampling frequency, read from the .vhdr by default')
+    parser.add_argument('--tolerance', type=float, default=0.05, help='seconds')
+    parser.add_argument('--late', type=float, default=0.01, help='seconds')
+    parser.add_argument('--output', help='CSV file for the report of every trial')
+    args = parser.parse_args()
+
+    if args.events.lower().endswith('.vmrk'):
+        events = read_vmrk(args.events, sfreq=args.sfreq)
+    else:
+        events = read_event_list(args.events)
+    timing_log = read_timing_log(args.timings)
+    expected_codes = read_expected_codes(args.timings)
+    n_trials = len(timing_log['trigger_started'])
+    if expected_codes is not None and len(expected_codes) != n_trials:
+        print(f'The settings have {len(expected_codes)} trials and the timing log {n_trials}, '
+              f'the codes are checked for the first {min(n_trials, len(expected_codes))}')
+    report = verify_onsets(timing_log, events, expected_codes, tolerance=args.tolerance, late_threshold=args.late)
+    print(json.dumps(report.summary(), indent=2, default=float))
+    for name in ['missing', 'late', 'wrong_code']:
+        trials = (getattr(report, name).nonzero()[0] + 1).tolist()
+        if len(trials) > 0:
+            print(f'{name} trials: {trials}')
+    if args.output:
+        report.to_csv(args.output)
+
+
+if __name__ == '__main__':
+    main()
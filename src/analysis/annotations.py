@@ -0,0 +1,109 @@
+"""Selection of the EEG annotations for the ERP analysis.
+
+The functions work on NumPy arrays of the onsets and descriptions of the annotations, e.g.
+raw.annotations.onset and raw.annotations.description. select_annotations applies them to the
+annotations of a recording and returns new mne.Annotations.
+"""
+import numpy as np
+
+from src.analysis.onset_verification import match_following, parse_code
+from src.syllable_comparison.trigger_codes import TRIGGER_CODES as SYLLABLE_TRIGGER_CODES
+
+TRIGGER_MARKER = 'Stimulus/S'
+STIMTRAK_MARKER = 'Push/P'
+
+
+def contains(descriptions, marker):
+    return np.char.find(np.asarray(descriptions, dtype=str), marker) >= 0
+
+
+def description_codes(descriptions):
+    """Trigger codes of descriptions like 'Stimulus/S 10', -1 if there is none"""
+    return np.array([parse_code(description.rpartition('/')[2]) for description in descriptions], dtype=int)
+
+
+def pair_stimtrak(onsets, descriptions, max_lag=0.5, trigger_marker=TRIGGER_MARKER, stimtrak_marker=STIMTRAK_MARKER):
+    """Pairs every computer trigger with the first stimtrak pulse after it, before the next trigger
+    and at most max_lag seconds later
+
+    Args:
+        onsets (numpy.array): Sorted onsets of the annotations in seconds
+        descriptions (numpy.array): Descriptions of the annotations
+
+    Returns:
+        tuple(numpy.array, numpy.array): index of every trigger and of its stimtrak annotation,
+            -1 for the triggers without a pulse
+    """
+    onsets = np.asarray(onsets, dtype=float)
+    triggers = np.flatnonzero(contains(descriptions, trigger_marker))
+    pulses = np.flatnonzero(contains(descriptions, stimtrak_marker))
+    following = match_following(onsets[triggers], onsets[pulses], max_lag)
+    return triggers, np.where(following >= 0, pulses[following], -1)
+
+
+def deviant_mask(codes, trigger_codes=SYLLABLE_TRIGGER_CODES):
+    """Codes of deviants in the trigger codes of the paradigm"""
+    return trigger_codes.deviants(codes)
+
+
+def after_standard_mask(onsets, deviants, max_gap=10):
+    """Stimuli which directly follow a standard at most max_gap seconds before them
+
+    The first stimulus of the session and of every block after a longer pause and the stimuli
+    after a deviant are False. The loop in the ERP notebook kept the first stimulus of the session
+    and dropped the second one instead.
+    """
+    onsets = np.asarray(onsets, dtype=float)
+    mask = np.zeros(len(onsets), dtype=bool)
+    mask[1:] = ~np.asarray(deviants)[:-1] & (np.diff(onsets) < max_gap)
+    return mask
+
+
+def count_labels(codes, trigger_codes=SYLLABLE_TRIGGER_CODES):
+    """Number of events with every label of the trigger codes, e.g. SSpec(S) and SSpec(D)
+
+    Returns:
+        dict: label: number of events, codes outside the trigger codes are not counted
+    """
+    index = trigger_codes.label_indices(codes)
+    counts = np.bincount(index[index >= 0], minlength=len(trigger_codes.labels))
+    return {label: int(count) for label, count in zip(trigger_codes.labels, counts)}
+
+
+def select_events(onsets, durations, descriptions, max_lag=0.5, max_gap=10, trigger_codes=SYLLABLE_TRIGGER_CODES):
+    """Keeps the computer triggers with a stimtrak pulse that follow a standard
+
+    The selected events are placed at the onset of the stimtrak pulse with its duration and the
+    description of the trigger.
+
+    Returns:
+        tuple(numpy.array, numpy.array, numpy.array, dict): onsets, durations and descriptions of
+            the selected events, numbers of triggers without a pulse and of the selected events
+    """
+    onsets = np.asarray(onsets, dtype=float)
+    descriptions = np.asarray(descriptions, dtype=str)
+    triggers, pulses = pair_stimtrak(onsets, descriptions, max_lag)
+    paired = pulses >= 0
+    triggers, pulses = triggers[paired], pulses[paired]
+    codes = description_codes(descriptions[triggers])
+    keep = after_standard_mask(onsets[pulses], deviant_mask(codes, trigger_codes), max_gap)
+    counts = {'n_triggers': len(paired), 'n_without_stimtrak': int((~paired).sum()),
+              'n_paired': len(triggers), 'n_selected': int(keep.sum())}
+    return (onsets[pulses[keep]], np.asarray(durations, dtype=float)[pulses[keep]],
+            descriptions[triggers[keep]], counts)
+
+
+def select_annotations(annotations, max_lag=0.5, max_gap=10, trigger_codes=SYLLABLE_TRIGGER_CODES):
+    """Selects the annotations of the ERP analysis, see select_events
+
+    Args:
+        annotations (mne.Annotations): Annotations of the recording, e.g. raw.annotations
+
+    Returns:
+        tuple(mne.Annotations, dict): selected annotations and the numbers of select_events
+    """
+    import mne
+    onsets, durations, descriptions, counts = select_events(
+        annotations.onset, annotations.duration, annotations.description, max_lag, max_gap, trigger_codes)
+    return mne.Annotations(onset=onsets, duration=durations, description=descriptions,
+                           orig_time=annotations.orig_time), counts
@@ -0,0 +1,122 @@
+"""Reuse of the fitted ASR (artifact subspace reconstruction of asrpy) across reruns.
+
+Fitting the ASR is the slowest step of the notebooks. fit_asr stores the fitted ASR in the
+cache folder under the hash of the data of the recording and the parameters, and loads it
+again while the filtered recording does not change. transform_chunked corrects the recording
+in chunks in place, so a recording memory-mapped with load_memmapped is never in the memory
+twice.
+
+    raw = load_memmapped('010_filtered_raw.fif', '010_filtered.dat')
+    correct_asr(raw, cutoff=15, cache_folder=os.path.join(analysis_path, 'cache'))
+"""
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+
+def load_memmapped(filename, memmap_filename):
+    """Reads a .fif recording with its data memory-mapped to memmap_filename instead of loaded"""
+    import mne
+    return mne.io.read_raw_fif(filename, preload=memmap_filename)
+
+
+def raw_fingerprint(raw, chunk_samples=1_000_000):
+    """Hash of the data, channels and sampling frequency of the recording, read in chunks"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'sfreq': raw.info['sfreq'], 'ch_names': list(raw.ch_names)}).encode())
+    for start in range(0, raw.n_times, chunk_samples):
+        digest.update(np.ascontiguousarray(raw.get_data(start=start, stop=start + chunk_samples)).tobytes())
+    return digest.hexdigest()
+
+
+def asr_filename(cache_folder, fingerprint, params):
+    key = hashlib.sha256(json.dumps({'data': fingerprint, 'params': params}, sort_keys=True).encode()).hexdigest()
+    return os.path.join(cache_folder, f'asr_{key[:16]}.pkl')
+
+
+def _create_asr(sfreq, cutoff, **kwargs):
+    from asrpy import ASR
+    return ASR(sfreq=sfreq, cutoff=cutoff, **kwargs)
+
+
+def fit_asr(raw, cutoff=15, cache_folder=None, asr_factory=_create_asr, **kwargs):
+    """Fits the ASR on the recording or loads it from the cache
+
+    Args:
+        raw (mne.io.Raw): Filtered recording
+        cutoff (float, optional): Cutoff of the ASR in standard deviations. Defaults to 15.
+        cache_folder (string, optional): Folder of the fitted ASRs. Defaults to None, which
+            always fits.
+        asr_factory (function, optional): Creates the ASR from the sampling frequency, the cutoff
+            and kwargs. Defaults to asrpy.ASR.
+        **kwargs: Further parameters of the ASR
+
+    Returns:
+        tuple(ASR, bool): the fitted ASR and whether it was loaded from the cache
+    """
+    filename = None
+    if cache_folder is not None:
+        filename = asr_filename(cache_folder, raw_fingerprint(raw), {'cutoff': cutoff, **kwargs})
+        if os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                return pickle.load(f), True
+    asr = asr_factory(raw.info['sfreq'], cutoff, **kwargs)
+    asr.fit(raw)
+    if filename is not None:
+        os.makedirs(cache_folder, exist_ok=True)
+        # written under a temporary name first, so an interrupted run leaves no broken file
+        with open(filename + '.tmp', 'wb') as f:
+            pickle.dump(asr, f)
+        os.replace(filename + '.tmp', filename)
+    return asr, False
+
+
+def _transform_array(asr, data, info):
+    import mne
+    return asr.transform(mne.io.RawArray(data, info, verbose=False)).get_data()
+
+
+def transform_chunked(asr, raw, chunk_duration=60, overlap=2.0):
+    """Corrects the recording with the fitted ASR chunk by chunk, in place
+
+    Every chunk is transformed together with overlap seconds before and after it, which
+    covers the filter state and the lookahead of the ASR, and only the chunk is written back.
+    The uncorrected samples before the chunk are kept from the previous chunk, since they
+    were already overwritten.
+
+    Args:
+        asr (ASR): Fitted ASR
+        raw (mne.io.Raw): Preloaded or memory-mapped recording, see load_memmapped
+        chunk_duration (float, optional): Length of the chunks in seconds. Defaults to 60.
+        overlap (float, optional): Seconds added on both sides of every chunk. Defaults to 2.
+
+    Returns:
+        mne.io.Raw: the corrected recording
+    """
+    sfreq = raw.info['sfreq']
+    chunk = max(1, round(chunk_duration * sfreq))
+    margin = round(overlap * sfreq)
+    before = None
+    for start in range(0, raw.n_times, chunk):
+        stop = min(start + chunk, raw.n_times)
+        data = raw.get_data(start=start, stop=min(raw.n_times, stop + margin))
+        if before is not None:
+            data = np.concatenate([before, data], axis=1)
+        offset = 0 if before is None else before.shape[1]
+        corrected = _transform_array(asr, data, raw.info)
+        before = data[:, max(0, offset + stop - start - margin):offset + stop - start].copy()
+        raw._data[:, start:stop] = corrected[:, offset:offset + stop - start]
+    return raw
+
+
+def correct_asr(raw, cutoff=15, cache_folder=None, chunk_duration=60, overlap=2.0, **kwargs):
+    """Fits the ASR or loads it from the cache and corrects the recording in place
+
+    Returns:
+        mne.io.Raw: the corrected recording
+    """
+    asr, _ = fit_asr(raw, cutoff, cache_folder, **kwargs)
+    return transform_chunked(asr, raw, chunk_duration, overlap)
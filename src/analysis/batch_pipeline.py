@@ -0,0 +1,266 @@
+"""Batch ERP pipeline of the analysis notebooks for many sessions.
+
+Every session goes through the stages of the ERP notebook: reading and filtering the
+recording, ASR correction, epoching and averaging. The output of every stage is cached in
+<session>/eeg/analysis/cache under a key chained from the hash of the recording and the
+parameters of the stage and of all stages before it. A changed parameter therefore recomputes
+only its stage and the stages after it. The sessions run in parallel, one per process.
+"""
+import hashlib
+import json
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.analysis.annotations import select_annotations
+from src.analysis.asr_cache import fit_asr, transform_chunked
+from src.core.trigger_codes import load_trigger_codes
+
+CACHED = 'cached'
+COMPUTED = 'computed'
+
+
+@dataclass
+class PipelineConfig:
+    """Parameters of the stages, the defaults are those of the ERP notebook"""
+    montage: str = 'easycap-M1'
+    l_freq: float = 0.5
+    h_freq: float = 35
+    asr_cutoff: float = 15
+    # seconds, see asr_cache.transform_chunked
+    asr_chunk_duration: float = 60
+    # selection of the annotations, see annotations.select_events
+    max_stimtrak_lag: float = 0.5
+    max_gap: float = 10
+    # paradigm whose trigger codes give the events and the labels of the epochs
+    paradigm: str = 'syllable_comparison'
+    tmin: float = -0.1
+    tmax: float = 0.6
+    baseline: tuple = (-0.05, 0.05)
+    reject: dict = field(default_factory=lambda: {'eeg': 1e-4})
+    flat: dict = field(default_factory=lambda: {'eeg': 1e-10})
+    detrend: int = 1
+
+
+@dataclass
+class Stage:
+    """Step of the pipeline
+
+    Attributes:
+        name (string): Name of the stage, part of the cache file names
+        params (dict): Parameters which change the output, part of the cache key
+        run (function): run(previous output, params) returns the output
+        save (function): save(output, filename) writes the output to the cache
+        load (function): load(filename) reads the output from the cache
+        suffix (string): End of the cache file name
+    """
+    name: str
+    params: dict
+    run: Callable
+    save: Callable
+    load: Callable
+    suffix: str
+
+
+def file_sha256(filenames, chunk_size=1 << 20):
+    """Hash of the contents of the files"""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_key(previous_key, stage):
+    """Cache key of the stage, changes with the key of the previous stage and the parameters"""
+    text = json.dumps({'previous': previous_key, 'stage': stage.name, 'params': stage.params},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def cache_filename(cache_folder, stage, key):
+    return os.path.join(cache_folder, f'{stage.name}_{key[:16]}{stage.suffix}')
+
+
+def run_stages(stages, source, source_key, cache_folder):
+    """Runs the stages on the source, starting from the output of the last cached stage
+
+    Args:
+        stages (list(Stage)): Stages in the order they run, the first one gets the source
+        source: Input of the first stage
+        source_key (string): Hash of the source
+        cache_folder (string): Folder of the cache files
+
+    Returns:
+        tuple: output of the last stage and a dict with CACHED or COMPUTED for every stage
+            which ran or was loaded, stages before the loaded one are left out
+    """
+    keys = []
+    for stage in stages:
+        keys.append(stage_key(keys[-1] if keys else source_key, stage))
+    start = 0
+    output = source
+    status = {}
+    for i in range(len(stages) - 1, -1, -1):
+        filename = cache_filename(cache_folder, stages[i], keys[i])
+        if os.path.exists(filename):
+            output = stages[i].load(filename)
+            status[stages[i].name] = CACHED
+            start = i + 1
+            break
+    os.makedirs(cache_folder, exist_ok=True)
+    for stage, key in zip(stages[start:], keys[start:]):
+        output = stage.run(output, stage.params)
+        # written under a temporary name first, so an interrupted run leaves no broken cache
+        filename = cache_filename(cache_folder, stage, key)
+        temporary = filename[:-len(stage.suffix)] + '.tmp' + stage.suffix
+        stage.save(output, temporary)
+        os.replace(temporary, filename)
+        status[stage.name] = COMPUTED
+    return output, status
+
+
+def recording_files(vhdr_filename):
+    """Header, data and marker file of a BrainVision recording"""
+    folder = os.path.dirname(vhdr_filename)
+    files = [vhdr_filename]
+    with open(vhdr_filename, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith(('DataFile=', 'MarkerFile=')):
+                files.append(os.path.join(folder, line.split('=', 1)[1].strip()))
+    return files
+
+
+def session_paths(session_folder):
+    """Recording and analysis folder of a session in <data folder>/<exp_id>, as in the notebooks"""
+    exp_id = os.path.basename(os.path.normpath(session_folder))
+    vhdr_filename = os.path.join(session_folder, 'eeg', f'{exp_id}.vhdr')
+    return exp_id, vhdr_filename, os.path.join(session_folder, 'eeg', 'analysis')
+
+
+## Stages of the ERP notebook
+## ==========================
+
+def _read_filtered(vhdr_filename, params):
+    import mne
+    raw = mne.io.read_raw_brainvision(vhdr_filename, preload=True)
+    raw.set_montage(mne.channels.make_standard_montage(params['montage']), on_missing='ignore')
+    raw.set_eeg_reference('average')
+    return raw.filter(l_freq=params['l_freq'], h_freq=params['h_freq'])
+
+
+def _correct_asr(raw, params):
+    asr, _ = fit_asr(raw, params['cutoff'])
+    return transform_chunked(asr, raw, params['chunk_duration'])
+
+
+def _make_epochs(raw, params):
+    import mne
+    trigger_codes = load_trigger_codes(params['paradigm'])
+    annotations, _ = select_annotations(raw.annotations, params['max_stimtrak_lag'], params['max_gap'], trigger_codes)
+    raw = raw.copy().set_annotations(annotations)
+    events, _ = mne.events_from_annotations(raw, event_id=trigger_codes.event_id())
+    # the epochs are tagged with their label, epochs[label] pools the codes of the label
+    return mne.Epochs(raw, events=events, event_id=trigger_codes.epochs_event_id(), baseline=tuple(params['baseline']),
+                      tmin=params['tmin'], tmax=params['tmax'], reject_tmin=0.0, reject_tmax=params['tmax'],
+                      reject=params['reject'], flat=params['flat'], detrend=params['detrend'], preload=True,
+                      on_missing='warn')
+
+
+def _average(epochs, params):
+    evokeds = []
+    for label in params['labels']:
+        evoked = epochs[label].average()
+        evoked.comment = label
+        evokeds.append(evoked)
+    return evokeds
+
+
+def _save_raw(raw, filename):
+    raw.save(filename, overwrite=True)
+
+
+def _load_raw(filename):
+    import mne
+    return mne.io.read_raw_fif(filename, preload=True)
+
+
+def _save_epochs(epochs, filename):
+    epochs.save(filename, overwrite=True)
+
+
+def _load_epochs(filename):
+    import mne
+    return mne.read_epochs(filename, preload=True)
+
+
+def _save_evokeds(evokeds, filename):
+    import mne
+    mne.write_evokeds(filename, evokeds, overwrite=True)
+
+
+def _load_evokeds(filename):
+    import mne
+    return mne.read_evokeds(filename)
+
+
+def erp_stages(config):
+    """Stages of the ERP notebook with the parameters of the config"""
+    trigger_codes = load_trigger_codes(config.paradigm)
+    return [
+        Stage('filtered', {'montage': config.montage, 'l_freq': config.l_freq, 'h_freq': config.h_freq},
+              _read_filtered, _save_raw, _load_raw, '_raw.fif'),
+        Stage('asr', {'cutoff': config.asr_cutoff, 'chunk_duration': config.asr_chunk_duration},
+              _correct_asr, _save_raw, _load_raw, '_raw.fif'),
+        Stage('epochs', {'max_stimtrak_lag': config.max_stimtrak_lag, 'max_gap': config.max_gap,
+                         'paradigm': config.paradigm, 'trigger_codes': trigger_codes.fingerprint, 'tmin': config.tmin,
+                         'tmax': config.tmax, 'baseline': config.baseline, 'reject': config.reject,
+                         'flat': config.flat, 'detrend': config.detrend},
+              _make_epochs, _save_epochs, _load_epochs, '-epo.fif'),
+        Stage('evokeds', {'labels': trigger_codes.labels}, _average, _save_evokeds, _load_evokeds, '-ave.fif'),
+    ]
+
+
+def process_session(session_folder, config, stages=None):
+    """Runs the pipeline on one session and writes its evokeds to the analysis folder
+
+    Returns:
+        dict: session, status of the stages and the evokeds file, or the error if it failed
+    """
+    exp_id, vhdr_filename, analysis_folder = session_paths(session_folder)
+    if stages is None:
+        stages = erp_stages(config)
+    try:
+        source_key = file_sha256(recording_files(vhdr_filename))
+        evokeds, status = run_stages(stages, vhdr_filename, source_key, os.path.join(analysis_folder, 'cache'))
+        filename = os.path.join(analysis_folder, f'{exp_id}-ave.fif')
+        stages[-1].save(evokeds, filename)
+    except Exception:
+        return {'session': session_folder, 'error': traceback.format_exc()}
+    return {'session': session_folder, 'stages': status, 'evokeds': filename}
+
+
+def run_batch(session_folders, config=None, workers=1, stages=None):
+    """Runs the pipeline on the sessions, one session per process
+
+    A failing session does not stop the others, its error is in the result.
+
+    Args:
+        session_folders (list(string)): Folders <data folder>/<exp_id> of the sessions
+        config (PipelineConfig, optional): Defaults to PipelineConfig().
+        workers (int, optional): Number of processes, 1 runs in this process. Defaults to 1.
+        stages (list(Stage), optional): Defaults to erp_stages(config).
+
+    Returns:
+        list(dict): result of process_session for every session, in the order of the folders
+    """
+    if config is None:
+        config = PipelineConfig()
+    if workers <= 1:
+        return [process_session(folder, config, stages) for folder in session_folders]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_session, folder, config, stages) for folder in session_folders]
+        return [future.result() for future in futures]
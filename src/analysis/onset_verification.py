@@ -0,0 +1,295 @@
+import csv
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class EventStream:
+    """Events recorded with the EEG, sorted by their onset.
+
+    Attributes:
+        onsets (numpy.array): Onset of every event in seconds since the start of the recording
+        types (numpy.array): Marker type, e.g. Stimulus for the computer triggers
+        descriptions (numpy.array): Marker description, e.g. S 10
+        codes (numpy.array): Trigger code parsed from the description, -1 if it has none
+    """
+    onsets: np.ndarray
+    types: np.ndarray
+    descriptions: np.ndarray
+    codes: np.ndarray
+
+    @classmethod
+    def from_lists(cls, onsets, types, descriptions):
+        onsets = np.asarray(onsets, dtype=float)
+        order = np.argsort(onsets, kind='stable')
+        descriptions = np.asarray(descriptions, dtype=str)[order]
+        return cls(onsets[order], np.asarray(types, dtype=str)[order], descriptions,
+                   np.array([parse_code(description) for description in descriptions], dtype=int))
+
+    def select(self, marker_type):
+        """Onsets and codes of the events of the type"""
+        mask = self.types == marker_type
+        return self.onsets[mask], self.codes[mask]
+
+
+def parse_code(description):
+    """Trigger code of a marker description like 'S 10' or 'S  1', -1 if it has none"""
+    try:
+        return int(description.strip()[1:])
+    except ValueError:
+        return -1
+
+
+def read_sampling_frequency(vhdr_filename):
+    """Sampling frequency from the SamplingInterval (microseconds) of a BrainVision header"""
+    with open(vhdr_filename, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith('SamplingInterval='):
+                return 1e6 / float(line.split('=', 1)[1])
+    raise ValueError(f'{vhdr_filename} has no SamplingInterval')
+
+
+def read_vmrk(filename, sfreq=None):
+    """Reads the markers of a BrainVision marker file
+
+    Args:
+        filename (string): Path to the .vmrk file
+        sfreq (float, optional): Sampling frequency of the recording. Defaults to None, which reads
+            it from the .vhdr file with the same name.
+
+    Returns:
+        EventStream: all markers, the onsets are converted from the 1-based data points to seconds
+    """
+    if sfreq is None:
+        sfreq = read_sampling_frequency(os.path.splitext(filename)[0] + '.vhdr')
+    onsets, types, descriptions = [], [], []
+    with open(filename, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not line.startswith('Mk') or '=' not in line:
+                continue
+            fields = line.split('=', 1)[1].rstrip('\r\n').split(',')
+            types.append(fields[0])
+            descriptions.append(fields[1])
+            onsets.append((int(fields[2]) - 1) / sfreq)
+    return EventStream.from_lists(onsets, types, descriptions)
+
+
+def read_event_list(filename):
+    """Reads events from a CSV file with the columns onset (seconds) and description
+
+    The description follows the MNE annotations, e.g. Stimulus/S 10, the part before the slash
+    is the marker type. A type column, if present, takes precedence.
+    """
+    onsets, types, descriptions = [], [], []
+    with open(filename, newline='') as f:
+        for row in csv.DictReader(f):
+            marker_type, _, description = row['description'].rpartition('/')
+            onsets.append(float(row['onset']))
+            types.append(row.get('type') or marker_type)
+            descriptions.append(description)
+    return EventStream.from_lists(onsets, types, descriptions)
+
+
+def read_timing_log(filename):
+    """Reads the timing log of a session
+
+    Returns:
+        dict: numpy array of every column, NaN for the empty values
+    """
+    with open(filename, newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        rows = [[float(value) if value != '' else np.nan for value in row] for row in reader]
+    values = np.array(rows, dtype=float).reshape(len(rows), len(columns))
+    return {column: values[:, i] for i, column in enumerate(columns)}
+
+
+def match_nearest(times, targets, tolerance):
+    """Index of the nearest target of every time
+
+    Args:
+        times (numpy.array): Times to match
+        targets (numpy.array): Sorted times of the targets
+        tolerance (float): Largest allowed distance
+
+    Returns:
+        numpy.array: index of the target, -1 if none is within the tolerance
+    """
+    times = np.asarray(times, dtype=float)
+    if len(targets) == 0:
+        return np.full(len(times), -1)
+    right = np.clip(np.searchsorted(targets, times), 0, len(targets) - 1)
+    left = np.clip(right - 1, 0, len(targets) - 1)
+    nearest = np.where(np.abs(targets[left] - times) <= np.abs(targets[right] - times), left, right)
+    nearest[~(np.abs(targets[nearest] - times) <= tolerance)] = -1
+    return nearest
+
+
+def match_following(times, targets, max_lag):
+    """Index of the first target at or after every time, before the next time and at most
+    max_lag later
+
+    Args:
+        times (numpy.array): Sorted times, e.g. the computer triggers
+        targets (numpy.array): Sorted times of the targets, e.g. the stimtrak pulses
+        max_lag (float): Largest allowed lag
+
+    Returns:
+        numpy.array: index of the target, -1 if there is none
+    """
+    times = np.asarray(times, dtype=float)
+    if len(targets) == 0:
+        return np.full(len(times), -1)
+    following = np.searchsorted(targets, times, side='left')
+    found = following < len(targets)
+    following = np.minimum(following, len(targets) - 1)
+    lags = targets[following] - times
+    next_times = np.append(times[1:], np.inf)
+    found &= (lags <= max_lag) & (targets[following] < next_times)
+    return np.where(found, following, -1)
+
+
+def estimate_clock(log_times, eeg_times, tolerance, n_anchor=20):
+    """Fits the EEG time as a linear function of the session time
+
+    The offset is the one which matches the most triggers among the differences of the first
+    n_anchor triggers of both, so missing or extra triggers at the start do not matter. The
+    matched pairs are then fitted with a line, whose slope is the drift between the clocks.
+
+    Returns:
+        tuple(float, float): slope and offset, eeg_time = slope * log_time + offset
+    """
+    valid = log_times[~np.isnan(log_times)]
+    if len(valid) == 0 or len(eeg_times) == 0:
+        raise ValueError('There are no triggers to align')
+    candidates = (eeg_times[:n_anchor, None] - valid[None, :n_anchor]).ravel()
+    shifted = valid[None, :] + candidates[:, None]
+    nearest = match_nearest(shifted.ravel(), eeg_times, tolerance).reshape(shifted.shape)
+    offset = candidates[np.argmax((nearest >= 0).sum(axis=1))]
+    matched = match_nearest(log_times + offset, eeg_times, tolerance)
+    found = matched >= 0
+    if found.sum() < 2:
+        return 1.0, offset
+    slope, offset = np.polyfit(log_times[found], eeg_times[matched[found]], 1)
+    return slope, offset
+
+
+@dataclass
+class OnsetReport:
+    """Alignment of the trials of a session with the recorded triggers, all times in seconds.
+
+    Attributes:
+        trigger_onsets (numpy.array): Recorded trigger of every trial in the EEG time, NaN if missing
+        expected_onsets (numpy.array): Time the trigger was sent according to the log, in the EEG time
+        residuals (numpy.array): Recorded minus expected trigger time
+        log_lags (numpy.array): Time between the start of the sound and the trigger in the log
+        audio_lags (numpy.array): Time between the trigger and the stimtrak pulse, NaN without one
+        codes (numpy.array): Recorded trigger codes, -1 if missing
+        missing (numpy.array): Trials without a recorded trigger
+        late (numpy.array): Trials whose trigger came more than the late threshold after the expected time
+        wrong_code (numpy.array): Trials whose recorded code differs from the expected one
+        slope (float): Drift of the EEG clock against the session clock
+        offset (float): EEG time of the start of the session
+        n_unmatched (int): Recorded triggers which do not belong to any trial
+    """
+    trigger_onsets: np.ndarray
+    expected_onsets: np.ndarray
+    residuals: np.ndarray
+    log_lags: np.ndarray
+    audio_lags: np.ndarray
+    codes: np.ndarray
+    missing: np.ndarray
+    late: np.ndarray
+    wrong_code: np.ndarray
+    slope: float
+    offset: float
+    n_unmatched: int
+
+    def summary(self):
+        """Numbers of flagged trials and percentiles of the lags in milliseconds"""
+        def distribution(values):
+            values = values[~np.isnan(values)] * 1000
+            if len(values) == 0:
+                return {'n': 0}
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            return {'n': len(values), 'median_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                    'min_ms': values.min(), 'max_ms': values.max()}
+        return {'n_trials': len(self.trigger_onsets),
+                'n_missing': int(self.missing.sum()),
+                'n_late': int(self.late.sum()),
+                'n_wrong_code': int(self.wrong_code.sum()),
+                'n_unmatched': self.n_unmatched,
+                'clock_drift_ppm': (self.slope - 1) * 1e6,
+                'residual': distribution(self.residuals),
+                'log_lag': distribution(self.log_lags),
+                'audio_lag': distribution(self.audio_lags)}
+
+    def to_csv(self, filename):
+        """Writes one row per trial"""
+        columns = {'trigger_onset': self.trigger_onsets, 'expected_onset': self.expected_onsets,
+                   'residual': self.residuals, 'log_lag': self.log_lags, 'audio_lag': self.audio_lags,
+                   'code': self.codes, 'missing': self.missing, 'late': self.late, 'wrong_code': self.wrong_code}
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['trial'] + list(columns))
+            for iTrial, row in enumerate(zip(*columns.values())):
+                writer.writerow([iTrial + 1] + [value.item() for value in row])
+
+
+def verify_onsets(timing_log, events, expected_codes=None, trigger_type='Stimulus', stimtrak_type='Push',
+                  tolerance=0.05, late_threshold=0.01, max_audio_lag=0.5):
+    """Aligns the trials of a session with the recorded triggers
+
+    Args:
+        timing_log (dict): Columns of the timing log, see read_timing_log
+        events (EventStream): Recorded events, see read_vmrk and read_event_list
+        expected_codes (list(int), optional): Trigger of every trial, e.g. from the settings. Codes
+            after the last trial of the log are ignored. Defaults to None, which does not check
+            the codes.
+        trigger_type (string, optional): Marker type of the computer triggers. Defaults to 'Stimulus'.
+        stimtrak_type (string, optional): Marker type of the stimtrak pulses. Defaults to 'Push'.
+        tolerance (float, optional): Largest distance of a recorded trigger from its trial after the
+            clocks are aligned, in seconds. Defaults to 0.05.
+        late_threshold (float, optional): Triggers recorded more than this after the expected time
+            are late, in seconds. Defaults to 0.01.
+        max_audio_lag (float, optional): Largest lag of the stimtrak pulse after the trigger, in
+            seconds. Defaults to 0.5.
+
+    Returns:
+        OnsetReport
+    """
+    sent = timing_log['trigger_com_started'] if 'trigger_com_started' in timing_log else timing_log['trigger_started']
+    sent = np.where(np.isnan(sent), timing_log['trigger_started'], sent)
+    eeg_times, eeg_codes = events.select(trigger_type)
+    slope, offset = estimate_clock(sent, eeg_times, tolerance)
+    expected = slope * sent + offset
+    matched = match_nearest(expected, eeg_times, tolerance)
+    # a recorded trigger belongs only to the trial closest to it
+    for index in np.flatnonzero(np.bincount(matched[matched >= 0], minlength=len(eeg_times)) > 1):
+        trials = np.flatnonzero(matched == index)
+        closest = trials[np.argmin(np.abs(expected[trials] - eeg_times[index]))]
+        matched[trials[trials != closest]] = -1
+    missing = matched < 0
+    trigger_onsets = np.where(missing, np.nan, eeg_times[matched])
+    codes = np.where(missing, -1, eeg_codes[matched])
+    residuals = trigger_onsets - expected
+    stimtrak_times, _ = events.select(stimtrak_type)
+    pulses = np.full(len(sent), -1)
+    audio_lags = np.full(len(sent), np.nan)
+    # a recording without the stimtrak has no pulses to match
+    if len(stimtrak_times) > 0:
+        pulses[~missing] = match_following(trigger_onsets[~missing], stimtrak_times, max_audio_lag)
+        paired = pulses >= 0
+        audio_lags[paired] = stimtrak_times[pulses[paired]] - trigger_onsets[paired]
+    wrong_code = np.zeros(len(sent), dtype=bool)
+    if expected_codes is not None:
+        # the settings of an aborted session have more trials than its log
+        expected_codes = np.asarray(expected_codes)[:len(sent)]
+        checked = len(expected_codes)
+        wrong_code[:checked] = ~missing[:checked] & (codes[:checked] != expected_codes)
+    return OnsetReport(trigger_onsets=trigger_onsets, expected_onsets=expected, residuals=residuals,
+                       log_lags=sent - timing_log['sound_started'], audio_lags=audio_lags, codes=codes,
+                       missing=missing, late=~missing & (residuals > late_threshold), wrong_code=wrong_code,
+                       slope=slope, offset=offset, n_unmatched=len(eeg_times) - int((~missing).sum()))
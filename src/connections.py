@@ -1,10 +1,14 @@
-import serial
-import pyxid2
 import threading
-import pylink
 import time
+from src.core.triggers import cpod_line_table
+
+CPOD_LINES = cpod_line_table()
+
+# The hardware libraries are imported when a device is used, so that the experiments start
+# quickly and run without them when the device is switched off
 
 def find_cpod():
+    import pyxid2
     try:
         devices = pyxid2.get_xid_devices()
     except:
@@ -19,20 +23,13 @@ def sendTriggerCPOD(device, value, duration):
     # device: CEDRUS cPOD - object
     # value: int trigger
     # duration: pulse duratin in milliseconds
-    bitList = list(str(bin(value)))
-    activeLines = []
-    bitCounter = 0
-    for ii in range(len(bitList)-1,1,-1):
-        bitCounter += 1
-        if bitList[ii] == '1':
-            activeLines.append(bitCounter)
-    
-    device.activate_line(lines = activeLines)
+    device.activate_line(lines = CPOD_LINES[value])
     time.sleep(duration/1000)
     device.clear_all_lines()    
 
 
 def sendTrigger(decTriggerVal, com_port, duration = 0.01, threadTimeout = 1):
+    import serial
     Connected = True
     hexTriggerVal = int(hex(decTriggerVal), 16)
     def ReadThread(port):
@@ -59,6 +56,7 @@ def sendTrigger(decTriggerVal, com_port, duration = 0.01, threadTimeout = 1):
 ## ==========================
 
 def find_eyetracker():
+    import pylink
     try:
         el_tracker = pylink.EyeLink("100.1.1.1")
         return True, el_tracker
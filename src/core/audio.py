@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+
+import pygame
+
+
+@dataclass
+class MixerSettings:
+    """Format and buffer of the pygame mixer.
+
+    Attributes:
+        frequency (int): Sampling frequency in Hz
+        size (int): Bits per sample, negative for signed samples
+        channels (int): Number of channels
+        buffer (int): Samples in the buffer of the audio device. Smaller buffers start the sounds
+            sooner, buffers which are too small cause dropouts. See
+            testing_scripts/benchmark_audio_latency.py
+    """
+    frequency: int = 44100
+    size: int = -16
+    channels: int = 2
+    buffer: int = 512
+
+    @property
+    def format(self):
+        """The format as returned by pygame.mixer.get_init()"""
+        return (self.frequency, self.size, self.channels)
+
+    @property
+    def buffer_latency(self):
+        """Duration of one buffer in seconds"""
+        return self.buffer / self.frequency
+
+    def pre_init(self):
+        """Sets the mixer settings used by the following pygame.init() or pygame.mixer.init()"""
+        pygame.mixer.pre_init(frequency=self.frequency, size=self.size, channels=self.channels, buffer=self.buffer)
+
+
+def init_mixer(settings):
+    """Initializes the mixer with the settings and warns if the device uses another format
+
+    Args:
+        settings (MixerSettings): Settings of the mixer
+
+    Returns:
+        tuple: The format of the mixer, see pygame.mixer.get_init()
+    """
+    settings.pre_init()
+    pygame.mixer.init()
+    mixer_format = pygame.mixer.get_init()
+    if mixer_format != settings.format:
+        print(f'WARNING: the mixer runs with {mixer_format} instead of {settings.format}')
+    return mixer_format
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pygame
+import pygame.sndarray
+
+
+@dataclass
+class BlockTimeline:
+    """One block of trials mixed into a single buffer in the mixer format.
+
+    Attributes:
+        trials (list(int)): Indices of the trials of the block
+        onset_samples (list(int)): Sample of the buffer where the stimulus of each trial starts
+        sound_samples (list(int)): Length of the stimulus of each trial in samples
+        frequency (int): Sampling frequency of the mixer
+        buffer (numpy.array): Samples of the whole block, followed by the intertrial of the last trial
+    """
+    trials: list
+    onset_samples: list
+    sound_samples: list
+    frequency: int
+    buffer: np.ndarray
+
+    @property
+    def n_samples(self):
+        return self.buffer.shape[0]
+
+    @property
+    def duration(self):
+        """Duration of the block in seconds"""
+        return self.n_samples / self.frequency
+
+    def onset(self, position):
+        """Onset of the trial at the position in the block, seconds since the start of the buffer"""
+        return self.onset_samples[position] / self.frequency
+
+    def make_sound(self):
+        return pygame.sndarray.make_sound(self.buffer)
+
+
+def split_blocks(block_pauses):
+    """Groups the trials into blocks, a block starts with the first trial and with every
+    trial with a pause before it
+
+    Returns:
+        list(list(int)): Indices of the trials of every block
+    """
+    blocks = []
+    for iTrial, pause in enumerate(block_pauses):
+        if iTrial == 0 or pause > 0:
+            blocks.append([])
+        blocks[-1].append(iTrial)
+    return blocks
+
+
+def block_offsets(sound_samples, intertrials, frequency):
+    """Sample offsets of the stimuli in a block
+
+    Args:
+        sound_samples (list(int)): Length of every stimulus in samples
+        intertrials (list(int)): Intertrial after every trial in milliseconds
+        frequency (int): Sampling frequency
+
+    Returns:
+        tuple(list(int), int): Onset of every stimulus and the length of the block in samples
+    """
+    onsets = []
+    position = 0
+    for n_samples, intertrial in zip(sound_samples, intertrials):
+        onsets.append(position)
+        position += n_samples + round(intertrial * frequency / 1000)
+    return onsets, position
+
+
+def mix_block(arrays, onsets, n_samples):
+    """Places the arrays at their onsets into one buffer. Overlapping samples are summed
+    and clipped to the range of the sample type."""
+    dtype = arrays[0].dtype
+    out = np.zeros((n_samples,) + arrays[0].shape[1:], dtype=np.int64)
+    for array, onset in zip(arrays, onsets):
+        out[onset:onset + array.shape[0]] += array
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        out = np.clip(out, info.min, info.max)
+    return out.astype(dtype)
+
+
+def premix_blocks(sounds, intertrials, block_pauses):
+    """Mixes every block of the session into a buffer, the mixer needs to be initialized
+
+    Args:
+        sounds (list(pygame.mixer.Sound)): Stimulus of every trial
+        intertrials (list(int)): Intertrial after every trial in milliseconds
+        block_pauses (list(int)): Pause before every trial in milliseconds, 0 within a block
+
+    Returns:
+        list(BlockTimeline)
+    """
+    frequency = pygame.mixer.get_init()[0]
+    # the same stimulus is converted to an array only once
+    arrays = {}
+    for sound in sounds:
+        if id(sound) not in arrays:
+            arrays[id(sound)] = pygame.sndarray.array(sound)
+    blocks = []
+    for trials in split_blocks(block_pauses):
+        block_arrays = [arrays[id(sounds[iTrial])] for iTrial in trials]
+        sound_samples = [array.shape[0] for array in block_arrays]
+        onsets, n_samples = block_offsets(sound_samples, [intertrials[iTrial] for iTrial in trials], frequency)
+        blocks.append(BlockTimeline(trials, onsets, sound_samples, frequency,
+                                    mix_block(block_arrays, onsets, n_samples)))
+    return blocks
@@ -0,0 +1,48 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+
+class ExperimentClock:
+    """Monotonic high-resolution session clock based on time.perf_counter_ns.
+
+    All times are seconds since the session epoch set by start(). The wall-clock time
+    is read once at the epoch (wall_anchor), so logged times can be converted to absolute
+    time without following later adjustments of the system clock.
+    """
+    def __init__(self):
+        self.start()
+
+    def start(self):
+        """Sets the session epoch and the wall-clock anchor"""
+        self.wall_anchor = datetime.now()
+        self.epoch_ns = time.perf_counter_ns()
+
+    def now_ns(self):
+        return time.perf_counter_ns() - self.epoch_ns
+
+    def now(self):
+        """Seconds since the session epoch"""
+        return (time.perf_counter_ns() - self.epoch_ns) / 1e9
+
+    def elapsed_ms(self, since):
+        """Milliseconds passed since the given session time in seconds"""
+        return (self.now() - since) * 1000
+
+    def to_wall_time(self, session_time):
+        """Converts seconds since the session epoch to a datetime"""
+        return self.wall_anchor + timedelta(seconds=session_time)
+
+    def anchor(self):
+        return {'wall_clock_anchor': self.wall_anchor.isoformat(),
+                'perf_counter_ns_epoch': self.epoch_ns,
+                'time_unit': 'seconds since wall_clock_anchor'}
+
+    def save_anchor(self, filename):
+        """Writes the wall-clock anchor next to the logs so they can be aligned to absolute time"""
+        with open(filename, 'w') as f:
+            json.dump(self.anchor(), f, indent=2)
+
+
+# clock shared by the whole experiment, restarted with start() when the session begins
+experiment_clock = ExperimentClock()
@@ -0,0 +1,77 @@
+import itertools
+from collections import defaultdict
+
+
+class DeviantPoolExhausted(Exception):
+    pass
+
+
+class DeviantOrderPool:
+    """Remembers which orders of the standard pauses were already used for every trial type.
+
+    Every permutation of the values is coded as its index in itertools.permutations and the
+    used orders of a trial type are kept as a bitmask, so a lookup is a single bit test.
+    While fewer than half of the orders are used, draw() shuffles until it finds an unused
+    order, which gives the same orders as the original POOL check. Above that it draws
+    directly from the unused orders. When all orders are used, a new cycle starts with an
+    empty pool, or DeviantPoolExhausted is raised if cycle is False.
+
+    Args:
+        values (list(int)): Values to permute, e.g. the number of standards between deviants
+        cycle (bool, optional): Start again when all orders are used. Defaults to True.
+    """
+    def __init__(self, values, cycle=True):
+        self.values = tuple(values)
+        self.permutations = list(itertools.permutations(self.values))
+        self.codes = {permutation: code for code, permutation in enumerate(self.permutations)}
+        self.full_mask = (1 << len(self.permutations)) - 1
+        self.cycle = cycle
+        self.used = defaultdict(int)
+        # number of times the orders of a trial type were exhausted and started again
+        self.cycles = defaultdict(int)
+
+    def code(self, order):
+        return self.codes[tuple(order)]
+
+    def is_used(self, key, order):
+        return bool(self.used[key] >> self.code(order) & 1)
+
+    def n_used(self, key):
+        return bin(self.used[key]).count('1')
+
+    def unused_codes(self, key):
+        mask = self.used[key]
+        return [code for code in range(len(self.permutations)) if not mask >> code & 1]
+
+    def mark_used(self, key, order):
+        self.used[key] |= 1 << self.code(order)
+
+    def draw(self, key, rand):
+        """Draws an unused order for the key and marks it as used
+
+        Args:
+            key (hashable): Usually the trial type
+            rand (random.Random): Source of randomness
+
+        Returns:
+            list(int): The order of the values
+        """
+        if self.used[key] == self.full_mask:
+            if not self.cycle:
+                raise DeviantPoolExhausted(f'All {len(self.permutations)} orders of {key} were used')
+            self.used[key] = 0
+            self.cycles[key] += 1
+        if 2 * self.n_used(key) < len(self.permutations):
+            order = list(self.values)
+            while True:
+                order = rand.sample(order, len(order))
+                if not self.is_used(key, order):
+                    break
+        else:
+            order = list(self.permutations[rand.choice(self.unused_codes(key))])
+        self.mark_used(key, order)
+        return order
+
+    def clear(self):
+        self.used.clear()
+        self.cycles.clear()
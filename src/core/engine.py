@@ -0,0 +1,371 @@
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pygame
+
+import src.core.experimental_flow as flow
+from src.core.audio import MixerSettings, init_mixer
+from src.core.block_mixer import premix_blocks
+from src.core.clock import experiment_clock
+from src.core.schedule import SessionSchedule
+from src.core.scheduler import TrialScheduler
+from src.core.settings_resolver import SettingsResolver
+from src.core.stimulus_cache import StimulusCache
+from src.core.stimulus_pcm import PcmStimuli
+from src.core.timing_log import TimingLogWriter
+from src.core.trial_records import build_trial_records
+from src.core.trigger_codes import TriggerCodeMap
+from src.utils import getScreenSize
+
+
+@dataclass
+class Paradigm:
+    """Describes what differs between the paradigms, the trial loop itself is shared.
+
+    Attributes:
+        name (string): Name of the paradigm, also the name of its settings generator
+            (see settings_batch.GENERATORS) and of its folder in settings, stimuli and logs
+        block_pauses (function): Takes the settings table and the block intertrials and returns
+            the pause in milliseconds before each trial (0 if the trial does not start a new block)
+        intertrial_policy (function): Takes the session config, number of trials and number of blocks
+            and returns the block intertrials and the intertrials in milliseconds
+        describe_trial (function): Takes the trial index and the trial row and returns the text
+            printed before the trial
+        trigger_codes (TriggerCodeMap, optional): Trigger codes of the paradigm, see
+            src/<paradigm>/trigger_codes.py. The triggers of the settings are checked against it
+            and it is saved with the logs. Defaults to None.
+    """
+    name: str
+    block_pauses: Callable
+    intertrial_policy: Callable
+    describe_trial: Callable
+    trigger_codes: TriggerCodeMap = None
+
+    def stimuli_folder(self):
+        return os.path.join(os.getcwd(), 'stimuli', self.name)
+
+    def path_to_stimulus(self, filename):
+        return os.path.join(self.stimuli_folder(), filename)
+
+    def logs_folder(self):
+        return os.path.join(os.getcwd(), 'logs', self.name)
+
+
+@dataclass
+class SessionConfig:
+    """Settings of the runner scripts, see the top of the runners for their description"""
+    participant_id: int
+    triggerbox_com: str = 'COM3'
+    movie_window_name: str = ''
+    debug: bool = False
+    movie_required: bool = True
+    eeg_trigger: bool = True
+    fnirs_trigger: bool = True
+    recalculate_inter_trial: bool = True
+    block_intertrial: tuple = (15000, 20000)
+    intertrial_range: list = field(default_factory=lambda: [520, 700])
+    random_seed: int = 111
+    trigger_duration: float = 0.1
+    stimulus_cache_limit: int = None
+    premix_blocks: bool = False
+    mixer: MixerSettings = field(default_factory=MixerSettings)
+
+
+def check_config(config):
+    """Switches off the hardware in the debug mode and stops if the participant id is not valid"""
+    if config.debug:
+        config.movie_required = False
+        config.eeg_trigger = False
+        config.fnirs_trigger = False
+        if config.participant_id > 0:
+            print("ERROR: RUNNING IN DEBUG MODE: Set DEBUG=False in the settings of the runner for testing!!!")
+            sys.exit()
+        else:
+            print("WARNING: RUNNING IN DEBUG MODE: Set DEBUG=False in the settings of the runner for testing!!!")
+            config.participant_id = 1
+            time.sleep(3)
+
+    if config.participant_id == 0:
+        print("ERROR: Participant ID was not set")
+        sys.exit()
+    return config
+
+
+def load_participant_settings(paradigm, participant_id):
+    """Loads the settings of the participant, they are generated if they are not in the
+    settings store or the cache yet, see settings_resolver
+
+    Returns:
+        ResolvedSettings: Settings of the participant, load_table() gives the table
+    """
+    settings = SettingsResolver(paradigm.name).resolve(participant_id)
+    print(f'Loading settings of participant {participant_id} from {settings.source}')
+    return settings
+
+
+def count_blocks(trials):
+    """Number of blocks, the number of sets times the number of blocks in a set"""
+    return len(set(trials['set_number'])) * len(set(trials['block_number']))
+
+
+def block_pauses_on_block_change(trials, block_intertrials):
+    """A new block starts whenever the block number changes. Block intertrials are used in
+    order, one per pause, so the first block, which has no pause, takes none."""
+    block_pauses = []
+    last_block = trials['block_number'][0]
+    current_pause = 0
+    for iTrial in range(0, len(trials)):
+        this_block = trials['block_number'][iTrial]
+        if(last_block != this_block):
+            block_pauses.append(int(block_intertrials[current_pause]))
+            current_pause += 1
+        else:
+            block_pauses.append(0)
+        last_block = this_block
+    return block_pauses
+
+
+def block_pauses_on_setblock_change(trials, block_intertrials):
+    """A new block starts whenever the sum of the set and block number changes.
+    Block intertrials are used in order."""
+    block_pauses = []
+    last_setblock = trials['set_number'][0]+trials['block_number'][0]
+    current_block = 0
+    for iTrial in range(0, len(trials)):
+        setblock = trials['set_number'][iTrial]+trials['block_number'][iTrial]
+        if(last_setblock != setblock):
+            block_pauses.append(block_intertrials[current_block])
+            current_block += 1
+        else:
+            block_pauses.append(0)
+        last_setblock = setblock
+    return block_pauses
+
+
+class ExperimentSession:
+    """One run of a paradigm for one participant.
+
+    prepare() does everything which can be done before the first trial (hardware, settings,
+    preloading the stimuli and planning the onsets), run() plays the trials and writes the logs.
+
+    Args:
+        paradigm (Paradigm): Description of the paradigm
+        config (SessionConfig): Settings of the session
+        stimulus_loader (function, optional): Takes the path to a stimulus and returns the sound,
+            e.g. for running without the stimuli. Defaults to the converted stimuli or the WAVs.
+    """
+    def __init__(self, paradigm, config, stimulus_loader=None):
+        self.paradigm = paradigm
+        self.config = check_config(config)
+        self.stimulus_loader = stimulus_loader
+        self.trigger_device = None
+        self.cpod_device = None
+
+    def prepare(self):
+        self.connect_devices()
+        self.load_settings()
+        self.init_pygame()
+        self.preload_stimuli()
+        self.build_records()
+        if self.config.premix_blocks:
+            self.mix_blocks()
+        self.plan_trials()
+
+    def connect_devices(self):
+        config = self.config
+        if config.eeg_trigger:
+            from src.core.triggers import SerialTriggerDevice
+            # The port stays open for the whole session, triggers are sent by its own worker thread
+            self.trigger_device = SerialTriggerDevice(config.triggerbox_com)
+        if config.fnirs_trigger:
+            from src.connections import find_cpod
+            from src.core.triggers import CPODTriggerDevice
+            # The cPOD clears the lines itself after the pulse duration
+            self.cpod_device = CPODTriggerDevice(find_cpod()[1][0], pulse_duration=config.trigger_duration)
+
+    def load_settings(self):
+        self.settings = load_participant_settings(self.paradigm, self.config.participant_id)
+        self.trials = self.settings.load_table()
+        print(f'# trial stimuli: {len(self.trials)}')
+        trigger_codes = self.paradigm.trigger_codes
+        if trigger_codes is not None and not trigger_codes.known(self.trials['trigger']).all():
+            raise ValueError(f'The settings contain triggers which are not in the trigger codes '
+                             f'version {trigger_codes.version} of {self.paradigm.name}')
+        self.block_intertrials, self.intertrials = self.paradigm.intertrial_policy(self.config, len(self.trials),
+                                                                                   count_blocks(self.trials))
+        self.block_pauses = self.paradigm.block_pauses(self.trials, self.block_intertrials)
+
+    def init_pygame(self):
+        # the mixer settings need to be set before anything initializes the mixer
+        self.config.mixer.pre_init()
+        screenSize = getScreenSize()
+        pygame.display.set_mode(screenSize, pygame.HIDDEN)
+        pygame.display.set_caption('')
+        pygame.display.update()
+        init_mixer(self.config.mixer)
+        print(f'Mixer: {pygame.mixer.get_init()}, buffer of {self.config.mixer.buffer} samples')
+
+    def preload_stimuli(self):
+        # No sound is decoded during the trials. Stimuli converted to the mixer format by
+        # scripts/preprocess_stimuli.py are not decoded at all
+        self.pcm_stimuli = None
+        loader = self.stimulus_loader
+        if loader is None:
+            self.pcm_stimuli = PcmStimuli.open(self.paradigm.stimuli_folder(), pygame.mixer.get_init())
+            loader = None if self.pcm_stimuli is None else self.pcm_stimuli.load_sound
+        self.stimulus_cache = StimulusCache(loader=loader, max_bytes=self.config.stimulus_cache_limit)
+        self.sound_paths = [self.paradigm.path_to_stimulus(stimulus) for stimulus in self.trials['stimulus']]
+        self.stimulus_cache.preload(self.sound_paths)
+        print(f'Preloaded stimuli: {self.stimulus_cache.report()}')
+        if self.pcm_stimuli is not None:
+            print(f'Converted stimuli from {self.pcm_stimuli.folder}, decoded from the WAV: {len(self.pcm_stimuli.fallbacks)}')
+        self.sound_durations = [self.sound_duration(path) for path in self.sound_paths]
+
+    def sound_duration(self, path):
+        """Duration of the stimulus in seconds from the manifest of the converted stimuli
+        or from the sound"""
+        duration = None if self.pcm_stimuli is None else self.pcm_stimuli.duration(path)
+        return self.stimulus_cache.get(path).get_length() if duration is None else duration
+
+    def build_records(self):
+        # the trial loop reads only the attributes of the records
+        self.records = build_trial_records(self.trials, self.sound_paths, self.sound_durations, self.intertrials,
+                                           self.block_pauses, self.stimulus_cache)
+
+    def mix_blocks(self):
+        # every block is played as a single sound with the stimuli at their planned samples
+        sounds = [self.stimulus_cache.get(path) for path in self.sound_paths]
+        self.blocks = premix_blocks(sounds, self.intertrials, self.block_pauses)
+        print(f'Premixed {len(self.blocks)} blocks, {sum(block.buffer.nbytes for block in self.blocks)} bytes')
+
+    def plan_trials(self):
+        if self.config.premix_blocks:
+            # the same onsets as in the block buffers, in whole samples
+            frequency = self.blocks[0].frequency
+            sound_durations = [n_samples / frequency for block in self.blocks for n_samples in block.sound_samples]
+            intertrials = [round(intertrial * frequency / 1000) * 1000 / frequency for intertrial in self.intertrials]
+        else:
+            sound_durations = self.sound_durations
+            intertrials = self.intertrials
+        self.schedule = SessionSchedule.build(sound_durations, intertrials, self.block_pauses,
+                                              participant_id=self.config.participant_id, seed=self.config.random_seed)
+        self.scheduler = TrialScheduler.from_schedule(experiment_clock, self.schedule)
+        summary = self.schedule.summary()
+        print(f'Planned duration of the experiment: {summary["duration"]/60:.1f} min ({summary["duration"]:.3f} s: '
+              f'stimuli {summary["stimuli"]:.3f} s, intertrials {summary["intertrials"]:.3f} s, '
+              f'{summary["n_pauses"]} pauses {summary["pauses"]:.3f} s)')
+
+    def run(self):
+        config = self.config
+        if config.movie_required:
+            import src.core.video_control as VideoControl
+            VideoControl.start_playing_video(config.movie_window_name)
+
+        experiment_clock.start()
+        timestamp = experiment_clock.wall_anchor.strftime('%Y%m%d-%H%M%S')
+        log_location = self.paradigm.logs_folder()
+        os.makedirs(log_location, exist_ok=True)
+        log_prefix = os.path.join(log_location, f'{config.participant_id}_{timestamp}')
+        # every trial is appended to the log right away
+        timing_log = TimingLogWriter(f'{log_prefix}_timings.csv',
+                                     flow.log_columns(add_fNIRS=config.fnirs_trigger, premix_blocks=config.premix_blocks))
+        try:
+            self.scheduler.start()
+            if config.premix_blocks:
+                self.run_blocks(timing_log)
+            else:
+                self.run_trials(timing_log)
+        finally:
+            try:
+                self.close_devices()
+            finally:
+                # the logs are written even if a trigger device failed. The settings exactly as
+                # they were generated and the planned times of the trials
+                self.settings.export_csv(f'{log_prefix}_settings.csv')
+                self.schedule.to_csv(f'{log_prefix}_schedule.csv')
+                if self.paradigm.trigger_codes is not None:
+                    self.paradigm.trigger_codes.write_json(f'{log_prefix}_trigger_codes.json')
+                experiment_clock.save_anchor(f'{log_prefix}_clock.json')
+                # last, since it raises the errors of writing the timings
+                timing_log.close()
+        print("Experiment has ended.")
+
+    def run_trials(self, timing_log):
+        config = self.config
+        for record in self.records:
+            block_pause = record.block_pause
+            if block_pause > 0:
+                print(f'Pause between blocks started for {block_pause/1000}s')
+                timing_log.flush()
+            if config.recalculate_inter_trial:
+                # the planned onset includes the pause between blocks
+                self.scheduler.wait_for_onset(record.index)
+            else:
+                pygame.time.delay(block_pause)
+            if block_pause > 0:
+                print(f'Pause ended')
+            print(self.paradigm.describe_trial(record.index, record.info))
+            sound = record.sound if record.sound is not None else self.stimulus_cache.get(record.sound_path)
+            timings = flow.play_trial(record, sound, experiment_clock, self.scheduler,
+                                      trigger_device=self.trigger_device, cpod_device=self.cpod_device,
+                                      trigger_duration=config.trigger_duration,
+                                      recalculate_inter_trial=config.recalculate_inter_trial)
+            timing_log.write(timings)
+
+    def run_blocks(self, timing_log):
+        for block in self.blocks:
+            block_pause = self.block_pauses[block.trials[0]]
+            block_sound = block.make_sound()
+            if block_pause > 0:
+                print(f'Pause between blocks started for {block_pause/1000}s')
+                timing_log.flush()
+            self.scheduler.wait_for_onset(block.trials[0])
+            if block_pause > 0:
+                print(f'Pause ended')
+            records = [self.records[iTrial] for iTrial in block.trials]
+            played_trials = flow.play_block(block, block_sound, records, experiment_clock, self.scheduler,
+                                            trigger_device=self.trigger_device, cpod_device=self.cpod_device,
+                                            trigger_duration=self.config.trigger_duration)
+            for record, timings in played_trials:
+                print(self.paradigm.describe_trial(record.index, record.info))
+                timing_log.write(timings)
+
+    def close_devices(self):
+        # both devices are closed even if sending a trigger failed, the first error is raised afterwards
+        errors = []
+        for label, device in [('Trigger latencies', self.trigger_device), ('cPOD trigger latencies', self.cpod_device)]:
+            if device is None:
+                continue
+            try:
+                device.wait()
+            except Exception as error:
+                errors.append(error)
+            print(f'{label}: {device.report()}')
+            try:
+                device.close()
+            except Exception as error:
+                errors.append(error)
+        self.trigger_device = None
+        self.cpod_device = None
+        if errors:
+            raise errors[0]
+
+
+def run_experiment(paradigm, config):
+    """Prepares and runs the whole experiment for one participant
+
+    Args:
+        paradigm (Paradigm): Description of the paradigm
+        config (SessionConfig): Settings of the session
+    """
+    session = ExperimentSession(paradigm, config)
+    try:
+        session.prepare()
+        session.run()
+    finally:
+        session.close_devices()
+        pygame.display.quit()
+        pygame.quit()
@@ -1,84 +1,116 @@
-import pandas as pd
 import pygame
-from datetime import datetime
 
-def prepare_log_table(add_fNIRS = False):
-    list_of_columns = ['trial_start','sound_started','sound_duration', 'sound_ended', 'real_sound_duration',
+def log_columns(add_fNIRS = False, premix_blocks = False):
+    list_of_columns = ['trial_start','planned_onset','sound_started','onset_difference','sound_duration', 'sound_ended', 'real_sound_duration',
                         'sound_duration_difference','real_trial_duration','trigger_started', 'trigger_ended',
                         'trigger_com_started', 'trigger_com_ended']
     if add_fNIRS:
         list_of_columns.extend(['trigger_cpod_started', 'trigger_cpod_ended'])
+    if premix_blocks:
+        # sample of the block buffer where the stimulus starts
+        list_of_columns.append('onset_sample')
+    return list_of_columns
+
 
-    df_timings = pd.DataFrame(columns=list_of_columns)
+def prepare_log_table(add_fNIRS = False):
+    import pandas as pd
+    df_timings = pd.DataFrame(columns=log_columns(add_fNIRS))
     return df_timings
 
 
-def play_trial(iTrial, start_time, df_stimuli, intertrials, should_trigger, path_to_stimulus, 
-               fNIRS_trigger=False, trigger_function=None, com=None, trigger_duration=None,
-               recalculate_inter_trial=False):
-    """_summary_
+def play_trial(record, sound, clock, scheduler, trigger_device=None, cpod_device=None,
+               trigger_duration=0.1, recalculate_inter_trial=False):
+    """Plays one trial and sends its trigger
     Args:
-        iTrial (int): Trial index, starting from 0
-        start_time (datetime): Start time of the experiment
-        df_stimuli (pd.DataFrame): Dataframe with all the stimui
-        intertrials (list): List with the intertrial times
-        path_to_stimulus (function): Function that returns the path to the stimulus
-
-        fNIRS_trigger (bool): If the fNIRS trigger should be sent
-        should_trigger (bool): If the triggers should be sent
-        com (string): COM port of the trigger box
-        trigger_duration (float): Duration of the trigger
-        recalculate_inter_trial (bool, optional): The trigger box generally adds 17 ms to the trigger duration. 
-            If this is set to true, the intertrial time will be recalculated to match the total time of the
-            trial and the intertrial time. Defaults to False.
+        record (TrialRecord): The trial with its trigger, sound duration and intertrial
+        sound (pygame.mixer.Sound): Preloaded stimulus of the trial
+        clock (ExperimentClock): Clock of the experiment, started at the start of the session
+        scheduler (TrialScheduler): Scheduler with the planned onsets of the trials
+        trigger_device (SerialTriggerDevice, optional): Trigger box connection, no EEG trigger
+            is sent if None. Defaults to None.
+        cpod_device (CPODTriggerDevice, optional): cPOD connection, no fNIRS trigger is sent
+            if None. Defaults to None.
+        trigger_duration (float, optional): Duration of the trigger in seconds. Defaults to 0.1.
+        recalculate_inter_trial (bool, optional): If set to true, the trial waits until the planned
+            end of its intertrial, so delays caused by the triggers or logging do not add up over the
+            session. Otherwise it waits for the sound duration and the intertrial. Defaults to False.
 
     Returns:
-        list: returns list with timings of the trial
+        dict: timings of the trial
     """
     timings = dict()
-    # This will change in case we need to repeat stimuli, now they just play once
-    print(f'{iTrial} started')
-    iStimulus = iTrial
-    # TODO - add the intertrial time to the timings
-    inter_trial = intertrials[iTrial]
-    timings['trial_start'] = get_time_since_start(start_time)
-    # say word and log onseg
-    sound_path = path_to_stimulus(df_stimuli['stimulus'][iStimulus])
-    sound2play = pygame.mixer.Sound(sound_path)
-    timings['sound_duration'] = sound2play.get_length()
-    timings['sound_started'] = get_time_since_start(start_time)
-    sound2play.play(loops = 0)
+    timings['trial_start'] = get_time_since_start(clock)
+    timings['planned_onset'] = scheduler.planned_onset(record.index)
+    timings['sound_duration'] = record.sound_duration
+    timings['sound_started'] = get_time_since_start(clock)
+    timings['onset_difference'] = timings['sound_started'] - timings['planned_onset']
+    sound.play(loops = 0)
     waittime_ms = round(timings['sound_duration']*1000)
-    if should_trigger:
-        timings['trigger_started'] = get_time_since_start(start_time)
-        timings['trigger_com_started'] = get_time_since_start(start_time)
-        trigger_function(5, com, trigger_duration)
-        timings['trigger_com_ended'] = get_time_since_start(start_time)
-        if fNIRS_trigger:
-            timings['trigger_cpod_started'] = get_time_since_start(start_time)
-            # THE CPOD TRIGGER IS FROM fNIRS CPOD box, not implemented in this experiment
-            # sendTriggerCPOD(cpod, 5, 0.01)
-            timings['trigger_cpod_ended'] = get_time_since_start(start_time)
-        timings['trigger_ended'] = get_time_since_start(start_time)
-    else:
-        timings['trigger_started'] = get_time_since_start(start_time)
-        timings['trigger_ended'] = timings['trigger_started']
-    # Substracts the extraduration of the trigger from the intertrial time (generally 17 ms for the trigger box)
+    send_triggers(timings, record.trigger, clock, trigger_device, cpod_device, trigger_duration)
+
+    # Waits for the planned end of the trial, which cancels the delays of the triggers and logging
     if recalculate_inter_trial:
-        ms_trigger_delay = round((timings['trigger_ended'] - timings['trigger_started'])*1000)
-        pygame.time.delay(waittime_ms + inter_trial - ms_trigger_delay)
+        scheduler.wait_for_end(record.index)
     else:
-        pygame.time.delay(waittime_ms + inter_trial)
-    
-    sound2play.stop()
-    timings['sound_ended'] = get_time_since_start(start_time)
+        pygame.time.delay(waittime_ms + record.intertrial)
+
+    sound.stop()
+    timings['sound_ended'] = get_time_since_start(clock)
     timings['real_sound_duration'] = timings['sound_ended'] - timings['sound_started']
     timings['sound_duration_difference'] = timings['real_sound_duration'] - timings['sound_duration']
     timings['real_trial_duration'] = timings['sound_ended'] - timings['trial_start']
     return timings
 
 
+def play_block(block, block_sound, records, clock, scheduler, trigger_device=None,
+               cpod_device=None, trigger_duration=0.1):
+    """Plays a block mixed into a single sound (see block_mixer) and sends the trigger of every
+    trial when its stimulus starts in the buffer. The onsets are timed from the start of the
+    playback, so they are exact to the sample relative to each other.
+
+    Args:
+        block (BlockTimeline): Mixed block
+        block_sound (pygame.mixer.Sound): Sound made from the block buffer
+        records (list(TrialRecord)): The trials of the block
+        clock (ExperimentClock): Clock of the experiment, started at the start of the session
+        scheduler (TrialScheduler): Used for waiting for the onsets
+        trigger_device (SerialTriggerDevice, optional): Defaults to None.
+        cpod_device (CPODTriggerDevice, optional): Defaults to None.
+        trigger_duration (float, optional): Duration of the trigger in seconds. Defaults to 0.1.
+
+    Yields:
+        tuple(TrialRecord, dict): every trial and its timings, right after its trigger was sent
+    """
+    block_start = get_time_since_start(clock)
+    block_sound.play(loops = 0)
+    for position, record in enumerate(records):
+        timings = dict()
+        timings['trial_start'] = get_time_since_start(clock)
+        timings['onset_sample'] = block.onset_samples[position]
+        timings['planned_onset'] = block_start + block.onset(position)
+        timings['sound_duration'] = block.sound_samples[position] / block.frequency
+        timings['sound_started'] = scheduler.wait_until(timings['planned_onset'])
+        timings['onset_difference'] = timings['sound_started'] - timings['planned_onset']
+        send_triggers(timings, record.trigger, clock, trigger_device, cpod_device, trigger_duration)
+        yield record, timings
+    scheduler.wait_until(block_start + block.duration)
+    block_sound.stop()
+
+
+def send_triggers(timings, trigger, clock, trigger_device, cpod_device, trigger_duration):
+    """Fires the trigger on the devices which are not None and adds the times to the timings"""
+    timings['trigger_started'] = get_time_since_start(clock)
+    if trigger_device is not None:
+        timings['trigger_com_started'] = get_time_since_start(clock)
+        trigger_device.fire(trigger, trigger_duration)
+        timings['trigger_com_ended'] = get_time_since_start(clock)
+    if cpod_device is not None:
+        timings['trigger_cpod_started'] = get_time_since_start(clock)
+        cpod_device.fire(trigger, trigger_duration)
+        timings['trigger_cpod_ended'] = get_time_since_start(clock)
+    timings['trigger_ended'] = get_time_since_start(clock)
+
 
-def get_time_since_start(start_time):
-    diff = datetime.now() - start_time
-    return diff.total_seconds()
\ No newline at end of file
+def get_time_since_start(clock):
+    """Seconds since the start of the session, measured by the monotonic experiment clock"""
+    return clock.now()
@@ -0,0 +1,138 @@
+"""Schedule of the whole session, planned before the first trial.
+
+The schedule holds the planned onset, stimulus duration, intertrial and pause before every
+trial. It is computed once from the settings of the participant and the durations of the
+stimuli, so the length of the session is known exactly before the first sound plays. The
+intertrials come from equal_length_permutation, which makes the sessions of all participants
+equally long and reproducible from the participant id and the seed.
+"""
+import csv
+import math
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+# seed of the times shared by all participants, the one generate_block_intertrials always used
+COMMON_SEED = 9999
+
+
+def equal_length_permutation(participant_id, value_range, size, seed=COMMON_SEED):
+    """Times of the same total for all participants in a participant specific order
+
+    The times are drawn once from the seed, the same for all participants, and shuffled with
+    the participant id.
+
+    Args:
+        participant_id (int): Seed of the order
+        value_range (int or tuple): Fixed time, or the minimum and the (exclusive) maximum
+        size (int): Number of times
+        seed (int, optional): Seed of the times. Defaults to COMMON_SEED.
+
+    Returns:
+        numpy.array: times in milliseconds
+    """
+    if isinstance(value_range, (int, np.integer)):
+        value_range = (value_range,)
+    if len(value_range) == 1:
+        return np.full(size, value_range[0], dtype=int)
+    if len(value_range) != 2:
+        raise ValueError('The range should have 1 or 2 values')
+    times = np.random.default_rng(seed).integers(value_range[0], value_range[1], size=size)
+    np.random.default_rng(participant_id).shuffle(times)
+    return times
+
+
+class ScheduledTrial(NamedTuple):
+    """One row of the schedule, times in seconds relative to the first onset except for the
+    intertrial and the block pause, which are in milliseconds as in the settings"""
+    index: int
+    onset: float
+    sound_duration: float
+    intertrial: float
+    block_pause: float
+    end: float
+
+
+@dataclass(frozen=True)
+class SessionSchedule:
+    """Planned times of all trials of a session
+
+    Attributes:
+        onsets (tuple(float)): Onset of every trial in seconds relative to the first trial,
+            including the pause before it
+        ends (tuple(float)): End of the intertrial after every trial in seconds
+        sound_durations (tuple(float)): Duration of the stimulus of every trial in seconds
+        intertrials (tuple): Intertrial after every trial in milliseconds
+        block_pauses (tuple): Pause before every trial in milliseconds
+        participant_id (int): Participant the schedule was planned for, None if unknown
+        seed (int): Seed of the intertrials, None if unknown
+    """
+    onsets: tuple
+    ends: tuple
+    sound_durations: tuple
+    intertrials: tuple
+    block_pauses: tuple
+    participant_id: int = None
+    seed: int = None
+
+    @classmethod
+    def build(cls, sound_durations, intertrials, block_pauses, participant_id=None, seed=None):
+        """Plans the onsets from the durations of the stimuli, the intertrials and the pauses
+
+        Args:
+            sound_durations (list(float)): Duration of every stimulus in seconds, e.g. from the
+                manifest of the converted stimuli
+            intertrials (list): Intertrial after every trial in milliseconds
+            block_pauses (list): Pause before every trial in milliseconds, 0 if the trial does
+                not start a new block
+        """
+        if not len(sound_durations) == len(intertrials) == len(block_pauses):
+            raise ValueError(f'Different numbers of sound durations ({len(sound_durations)}), '
+                             f'intertrials ({len(intertrials)}) and block pauses ({len(block_pauses)})')
+        onsets = []
+        ends = []
+        t = 0
+        for duration, intertrial, pause in zip(sound_durations, intertrials, block_pauses):
+            t += pause / 1000
+            onsets.append(t)
+            t += duration + intertrial / 1000
+            ends.append(t)
+        return cls(onsets=tuple(onsets), ends=tuple(ends),
+                   sound_durations=tuple(float(duration) for duration in sound_durations),
+                   intertrials=tuple(intertrials), block_pauses=tuple(block_pauses),
+                   participant_id=participant_id, seed=seed)
+
+    def __len__(self):
+        return len(self.onsets)
+
+    def __getitem__(self, iTrial):
+        return ScheduledTrial(iTrial, self.onsets[iTrial], self.sound_durations[iTrial], self.intertrials[iTrial],
+                              self.block_pauses[iTrial], self.ends[iTrial])
+
+    def __iter__(self):
+        return (self[iTrial] for iTrial in range(len(self)))
+
+    @property
+    def duration(self):
+        """Planned duration of all trials in seconds, the sum of the stimuli, intertrials and pauses
+
+        The exact sums do not depend on the order of the trials, so sessions with the same
+        times in another order have the same duration to the last digit.
+        """
+        return math.fsum(self.sound_durations) + (math.fsum(self.intertrials) + math.fsum(self.block_pauses)) / 1000
+
+    def summary(self):
+        """Duration of the session and its parts in seconds"""
+        return {'n_trials': len(self),
+                'n_pauses': sum(pause > 0 for pause in self.block_pauses),
+                'duration': self.duration,
+                'stimuli': math.fsum(self.sound_durations),
+                'intertrials': math.fsum(self.intertrials) / 1000,
+                'pauses': math.fsum(self.block_pauses) / 1000}
+
+    def to_csv(self, filename):
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(ScheduledTrial._fields)
+            writer.writerows(self)
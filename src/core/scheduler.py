@@ -0,0 +1,77 @@
+import time
+
+from src.core.schedule import SessionSchedule
+
+
+class TrialScheduler:
+    """Plans the absolute onset of every trial before the experiment starts and waits for it.
+
+    Onsets are computed from the sound durations, intertrials and pauses between blocks,
+    so the time spent on loading, triggers and logging in one trial does not move the
+    following trials and the delays do not add up over the session.
+
+    Args:
+        clock (ExperimentClock): Clock of the experiment
+        sound_durations (list(float)): Duration of the stimulus of each trial in seconds
+        intertrials (list(int)): Intertrial after each trial in milliseconds
+        block_pauses (list(int)): Pause before each trial in milliseconds, 0 if the trial
+            does not start a new block
+        spin_margin (float, optional): The last part of every wait in seconds which is spent
+            by busy waiting instead of sleeping. It needs to cover the sleep resolution
+            of the system. Defaults to 0.02.
+    """
+    def __init__(self, clock, sound_durations, intertrials, block_pauses, spin_margin=0.02):
+        self.clock = clock
+        self.spin_margin = spin_margin
+        self.schedule = SessionSchedule.build(sound_durations, intertrials, block_pauses)
+        self.start_time = None
+
+    @classmethod
+    def from_schedule(cls, clock, schedule, spin_margin=0.02):
+        """Scheduler of a schedule planned before, see SessionSchedule"""
+        scheduler = cls(clock, [], [], [], spin_margin)
+        scheduler.schedule = schedule
+        return scheduler
+
+    def start(self, lead=0.1):
+        """Fixes the session time of the first onset
+
+        Args:
+            lead (float, optional): Seconds between now and the first onset. Defaults to 0.1.
+        """
+        self.start_time = self.clock.now() + lead
+
+    @property
+    def duration(self):
+        """Planned duration of all trials in seconds"""
+        return self.schedule.duration
+
+    def planned_onset(self, iTrial):
+        return self.start_time + self.schedule.onsets[iTrial]
+
+    def planned_end(self, iTrial):
+        """End of the intertrial following the trial"""
+        return self.start_time + self.schedule.ends[iTrial]
+
+    def wait_for_onset(self, iTrial):
+        return self.wait_until(self.planned_onset(iTrial))
+
+    def wait_for_end(self, iTrial):
+        return self.wait_until(self.planned_end(iTrial))
+
+    def wait_until(self, deadline):
+        """Sleeps until shortly before the deadline, then busy waits for it
+
+        Args:
+            deadline (float): Session time in seconds
+
+        Returns:
+            float: Session time when the wait ended
+        """
+        remaining = deadline - self.clock.now()
+        if remaining > self.spin_margin:
+            time.sleep(remaining - self.spin_margin)
+        now = self.clock.now()
+        while now < deadline:
+            now = self.clock.now()
+        return now
@@ -0,0 +1,176 @@
+import ast
+import hashlib
+import importlib
+import importlib.util
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.core.settings_store import build_store
+
+# settings generator of every paradigm, imported in the worker processes
+GENERATORS = {
+    'neuro3_syllables': 'src.neuro3_syllables.settings_generation',
+    'syllable_comparison': 'src.syllable_comparison.settings_generation',
+    'standard_nonstandard': 'src.standard_nonstandard.settings_generation',
+}
+
+
+def get_generator(paradigm):
+    if paradigm not in GENERATORS:
+        raise ValueError(f'Unknown paradigm {paradigm}, choose from {", ".join(GENERATORS)}')
+    return importlib.import_module(GENERATORS[paradigm])
+
+
+def _module_source(module_name):
+    with open(importlib.util.find_spec(module_name).origin, newline='') as f:
+        # the line endings depend on the checkout
+        return f.read().replace('\r\n', '\n')
+
+
+def _is_module(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def _imported_modules(source):
+    """Modules of this repository imported by the source, e.g. src.core.deviant_pool"""
+    names = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module is not None:
+            names.append(node.module)
+            # from src.core import engine imports the module src.core.engine
+            names.extend(f'{node.module}.{alias.name}' for alias in node.names
+                         if _is_module(f'{node.module}.{alias.name}'))
+    return [name for name in names if name.startswith('src.')]
+
+
+def generator_fingerprint(paradigm):
+    """Hash of the source code of the settings generator of the paradigm and of all modules
+    of this repository it imports, directly or through other modules. Settings generated with
+    a different fingerprint may differ and are not reused. The generator is not imported, so
+    the fingerprint is cheap to get.
+
+    Returns:
+        string: sha256 in hex
+    """
+    if paradigm not in GENERATORS:
+        raise ValueError(f'Unknown paradigm {paradigm}, choose from {", ".join(GENERATORS)}')
+    sources = {}
+    pending = [GENERATORS[paradigm]]
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        sources[name] = _module_source(name)
+        pending.extend(_imported_modules(sources[name]))
+    digest = hashlib.sha256()
+    for name in sorted(sources):
+        digest.update(name.encode())
+        digest.update(sources[name].encode())
+    return digest.hexdigest()
+
+
+def generate_participant_settings(generator, participant_id):
+    """Generates the settings table of one participant
+
+    The syllable generators remember the used deviant orders in the module POOL. It is
+    restarted for every participant exactly as in the sequential generation scripts, so the
+    table depends only on the participant id and not on what the process generated before.
+    """
+    if hasattr(generator, 'restart'):
+        generator.restart()
+    return generator.create_experiment_trials(participant_id)
+
+
+def settings_filename(folder, participant_id):
+    return os.path.join(folder, f'settings{participant_id}.csv')
+
+
+def store_filename(paradigm):
+    return os.path.join(os.getcwd(), 'settings', f'{paradigm}.store')
+
+
+def _generate_chunk(paradigm, participant_ids, folder=None):
+    """Writes the settings of the participants to the folder or returns their CSV text
+    if folder is None"""
+    generator = get_generator(paradigm)
+    tables = {}
+    for participant_id in participant_ids:
+        df_trials = generate_participant_settings(generator, participant_id)
+        if folder is None:
+            tables[participant_id] = df_trials.to_csv()
+        else:
+            df_trials.to_csv(settings_filename(folder, participant_id))
+            tables[participant_id] = None
+    return tables
+
+
+def _generate_all(paradigm, participant_ids, folder, workers):
+    participant_ids = list(participant_ids)
+    if workers <= 1:
+        return _generate_chunk(paradigm, participant_ids, folder)
+    # a few chunks per worker keep the processes busy when some chunks take longer
+    chunks = split_participants(participant_ids, workers * 4)
+    tables = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_generate_chunk, paradigm, chunk, folder) for chunk in chunks]
+        for future in futures:
+            tables.update(future.result())
+    return tables
+
+
+def split_participants(participant_ids, n_chunks):
+    """Splits the ids into contiguous chunks of nearly equal size"""
+    n_chunks = max(1, min(n_chunks, len(participant_ids)))
+    size, rest = divmod(len(participant_ids), n_chunks)
+    chunks = []
+    start = 0
+    for i in range(n_chunks):
+        end = start + size + (1 if i < rest else 0)
+        chunks.append(participant_ids[start:end])
+        start = end
+    return chunks
+
+
+def generate_settings(paradigm, participant_ids, folder=None, workers=1):
+    """Generates and writes the settings files of the participants
+
+    Every participant is written to its own file by the process which generated it. The
+    result does not depend on the number of workers.
+
+    Args:
+        paradigm (string): Name of the paradigm, one of GENERATORS
+        participant_ids (list(int)): Participants to generate
+        folder (string, optional): Output folder. Defaults to the settings folder of the paradigm.
+        workers (int, optional): Number of processes, 1 generates in this process. Defaults to 1.
+
+    Returns:
+        int: Number of written files
+    """
+    if folder is None:
+        folder = get_generator(paradigm).settings_folder()
+    os.makedirs(folder, exist_ok=True)
+    return len(_generate_all(paradigm, participant_ids, folder, workers))
+
+
+def generate_store(paradigm, participant_ids, filename=None, workers=1):
+    """Generates the settings of the participants into a single settings store, see settings_store
+
+    Args:
+        paradigm (string): Name of the paradigm, one of GENERATORS
+        participant_ids (list(int)): Participants to generate
+        filename (string, optional): Path to the store. Defaults to settings/<paradigm>.store.
+        workers (int, optional): Number of processes, 1 generates in this process. Defaults to 1.
+
+    Returns:
+        int: Number of participants in the store
+    """
+    if filename is None:
+        filename = store_filename(paradigm)
+    tables = _generate_all(paradigm, participant_ids, None, workers)
+    build_store(filename, tables, metadata={'generator_fingerprint': generator_fingerprint(paradigm)})
+    return len(tables)
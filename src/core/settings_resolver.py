@@ -0,0 +1,107 @@
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+
+from src.core.settings_batch import generate_participant_settings, generator_fingerprint, get_generator
+from src.core.settings_store import SettingsStore, TrialTable
+
+
+@dataclass
+class ResolvedSettings:
+    """Settings of one participant and where they came from
+
+    Attributes:
+        participant_id (int): Id of the participant
+        csv_text (string): The settings as CSV
+        source (string): Path to the store or the cache file the settings were read from
+            or written to
+        store (SettingsStore): The store if the settings were read from it, otherwise None
+    """
+    participant_id: int
+    csv_text: str
+    source: str
+    store: SettingsStore = None
+
+    def load(self):
+        """The settings as pd.read_csv loads them"""
+        if self.store is not None:
+            return self.store.load(self.participant_id)
+        import pandas as pd
+        return pd.read_csv(io.StringIO(self.csv_text))
+
+    def load_table(self):
+        """The settings as a TrialTable, without importing pandas"""
+        if self.store is not None:
+            return self.store.load_table(self.participant_id)
+        return TrialTable.from_csv_text(self.csv_text)
+
+    def export_csv(self, filename):
+        with open(filename, 'w', newline='') as f:
+            f.write(self.csv_text)
+
+
+class SettingsResolver:
+    """Finds the settings of a participant or generates them when they are needed.
+
+    The settings are taken from settings/<paradigm>.store if the store was generated by the
+    current generator code. Otherwise they are taken from the cache, where every file is named
+    by the hash of the generator fingerprint and the participant id, so settings of an older
+    generator are never found. On a miss the settings are generated with
+    create_experiment_trials and written to the cache.
+
+    Args:
+        paradigm (string): Name of the paradigm, see settings_batch.GENERATORS
+        settings_folder (string, optional): Folder with the stores and the cache.
+            Defaults to settings in the working directory.
+    """
+    def __init__(self, paradigm, settings_folder=None):
+        self.paradigm = paradigm
+        self.settings_folder = settings_folder or os.path.join(os.getcwd(), 'settings')
+        self.fingerprint = generator_fingerprint(paradigm)
+        self.store_filename = os.path.join(self.settings_folder, f'{paradigm}.store')
+        self.cache_folder = os.path.join(self.settings_folder, 'cache', paradigm)
+        self._store = None
+
+    def store(self):
+        """The settings store of the paradigm if it matches the generator, otherwise None"""
+        if self._store is None and os.path.exists(self.store_filename):
+            store = SettingsStore(self.store_filename)
+            if store.metadata.get('generator_fingerprint') == self.fingerprint:
+                self._store = store
+            else:
+                print(f'WARNING: {self.store_filename} was generated by a different version of the '
+                      f'settings generation and is not used')
+        return self._store
+
+    def key(self, participant_id):
+        return hashlib.sha256(f'{self.fingerprint}:{participant_id}'.encode()).hexdigest()[:32]
+
+    def cache_filename(self, participant_id):
+        return os.path.join(self.cache_folder, f'{participant_id}_{self.key(participant_id)}.csv')
+
+    def resolve(self, participant_id):
+        """Returns the settings of the participant, generating them on a cache miss
+
+        Returns:
+            ResolvedSettings
+        """
+        store = self.store()
+        if store is not None and participant_id in store:
+            return ResolvedSettings(participant_id, store.to_csv_text(participant_id), self.store_filename, store)
+        filename = self.cache_filename(participant_id)
+        if os.path.exists(filename):
+            with open(filename, newline='') as f:
+                return ResolvedSettings(participant_id, f.read(), filename)
+        csv_text = generate_participant_settings(get_generator(self.paradigm), participant_id).to_csv()
+        os.makedirs(self.cache_folder, exist_ok=True)
+        # written under a temporary name first so an interrupted write is never found
+        temporary = f'{filename}.{os.getpid()}.tmp'
+        with open(temporary, 'w', newline='') as f:
+            f.write(csv_text)
+        os.replace(temporary, filename)
+        return ResolvedSettings(participant_id, csv_text, filename)
+
+
+def resolve_settings(paradigm, participant_id, settings_folder=None):
+    return SettingsResolver(paradigm, settings_folder).resolve(participant_id)
@@ -0,0 +1,262 @@
+import json
+import os
+import re
+import struct
+
+import numpy as np
+
+MAGIC = b'SETTINGSSTORE1\n'
+_HEADER_LENGTH = struct.Struct('<Q')
+_INT_DTYPES = ['u1', 'i1', 'u2', 'i2', 'u4', 'i4', 'i8']
+_SETTINGS_FILE = re.compile(r'settings(\d+)\.csv$')
+
+
+def _smallest_int_dtype(minimum, maximum):
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(np.dtype(dtype))
+        if info.min <= minimum and maximum <= info.max:
+            return dtype
+    raise ValueError(f'Values {minimum}..{maximum} do not fit into 64 bits')
+
+
+def _is_int(value):
+    try:
+        return str(int(value)) == value
+    except ValueError:
+        return False
+
+
+def parse_csv(text):
+    """Splits a settings CSV written by pandas into the header and the columns of strings.
+    The settings contain no quoted fields, so the values are split on commas."""
+    if '"' in text:
+        raise ValueError('Quoted CSV fields are not supported')
+    lines = text.split('\n')
+    if lines[-1] != '':
+        raise ValueError('CSV needs to end with a new line')
+    header = lines[0]
+    n_columns = len(header.split(','))
+    rows = [line.split(',') for line in lines[1:-1]]
+    if any(len(row) != n_columns for row in rows):
+        raise ValueError('Rows have a different number of fields than the header')
+    return header, [list(column) for column in zip(*rows)] if rows else [[] for _ in range(n_columns)]
+
+
+def build_store(filename, tables, metadata=None):
+    """Packs the settings of all participants into one file.
+
+    Columns with integers are stored as the smallest integer type which fits all participants,
+    other columns as codes into a list of their categories. The data of a participant are stored
+    column after column at the offset given in the header.
+
+    Args:
+        filename (string): Path to the store
+        tables (dict): CSV text of the settings keyed by the participant id
+        metadata (dict, optional): Stored in the header, e.g. the fingerprint of the generator.
+            Defaults to None.
+    """
+    parsed = {int(participant_id): parse_csv(text) for participant_id, text in tables.items()}
+    headers = {header for header, _ in parsed.values()}
+    if len(headers) != 1:
+        raise ValueError('All participants need to have the same columns')
+    header = headers.pop()
+    names = header.split(',')
+
+    columns = []
+    for iColumn, name in enumerate(names):
+        values = [value for _, table in parsed.values() for value in table[iColumn]]
+        if values and all(_is_int(value) for value in values):
+            numbers = [int(value) for value in values]
+            columns.append({'name': name, 'kind': 'int',
+                            'dtype': _smallest_int_dtype(min(numbers), max(numbers))})
+        else:
+            categories = sorted(set(values))
+            columns.append({'name': name, 'kind': 'category', 'categories': categories,
+                            'dtype': _smallest_int_dtype(0, max(len(categories) - 1, 0))})
+
+    blocks = []
+    participants = {}
+    offset = 0
+    for participant_id in sorted(parsed):
+        table = parsed[participant_id][1]
+        block = b''
+        for column, values in zip(columns, table):
+            if column['kind'] == 'int':
+                data = np.array([int(value) for value in values], dtype=column['dtype'])
+            else:
+                codes = {category: code for code, category in enumerate(column['categories'])}
+                data = np.array([codes[value] for value in values], dtype=column['dtype'])
+            block += data.astype(np.dtype(column['dtype']).newbyteorder('<')).tobytes()
+        participants[str(participant_id)] = [offset, len(table[0])]
+        blocks.append(block)
+        offset += len(block)
+
+    header_bytes = json.dumps({'header': header, 'columns': columns, 'metadata': metadata or {},
+                               'participants': participants}).encode()
+    with open(filename, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for block in blocks:
+            f.write(block)
+
+
+def read_settings_folder(folder):
+    """Reads all settingsN.csv files of a folder
+
+    Returns:
+        dict: CSV text keyed by the participant id
+    """
+    tables = {}
+    for filename in os.listdir(folder):
+        match = _SETTINGS_FILE.match(filename)
+        if match:
+            with open(os.path.join(folder, filename), newline='') as f:
+                tables[int(match.group(1))] = f.read()
+    return tables
+
+
+def frame_column_names(names):
+    """Column names as pd.read_csv gives them, empty names become Unnamed: i and
+    repeated names get a .1, .2, ... suffix"""
+    out = []
+    for iColumn, name in enumerate(names):
+        if name == '':
+            name = f'Unnamed: {iColumn}'
+        candidate = name
+        count = 1
+        while candidate in out:
+            candidate = f'{name}.{count}'
+            count += 1
+        out.append(candidate)
+    return out
+
+
+class TrialTable:
+    """Settings of a participant as a list of values per column, for loading the settings
+    without pandas. Columns are named as pd.read_csv names them.
+
+    Args:
+        columns (dict): Values of every column keyed by the column name
+    """
+    def __init__(self, columns):
+        self.columns = columns
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('All columns need to have the same length')
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_csv_text(cls, text):
+        header, table = parse_csv(text)
+        columns = {}
+        for name, values in zip(frame_column_names(header.split(',')), table):
+            if values and all(_is_int(value) for value in values):
+                values = [int(value) for value in values]
+            columns[name] = values
+        return cls(columns)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def row(self, index):
+        """Values of one trial keyed by the column name"""
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+
+class SettingsStore:
+    """Settings of all participants of a paradigm in one file, see build_store.
+
+    Only the header is read when the store is opened. Reading a participant seeks to its offset
+    and reads only its data.
+
+    Args:
+        filename (string): Path to the store
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{filename} is not a settings store')
+            header_length, = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+            header = json.loads(f.read(header_length))
+        self.data_offset = len(MAGIC) + _HEADER_LENGTH.size + header_length
+        self.header = header['header']
+        self.columns = header['columns']
+        self.metadata = header.get('metadata', {})
+        self.participants = {int(participant_id): tuple(location)
+                             for participant_id, location in header['participants'].items()}
+        for column in self.columns:
+            column['numpy_dtype'] = np.dtype(column['dtype']).newbyteorder('<')
+        self._row_size = sum(column['numpy_dtype'].itemsize for column in self.columns)
+
+    def __contains__(self, participant_id):
+        return participant_id in self.participants
+
+    def __len__(self):
+        return len(self.participants)
+
+    def read_columns(self, participant_id):
+        """Reads the columns of one participant
+
+        Returns:
+            list(numpy.array): Integer values or the codes of the categories of each column
+        """
+        if participant_id not in self.participants:
+            raise KeyError(f'Participant {participant_id} is not in {self.filename}')
+        offset, n_rows = self.participants[participant_id]
+        with open(self.filename, 'rb') as f:
+            f.seek(self.data_offset + offset)
+            data = f.read(n_rows * self._row_size)
+        out = []
+        position = 0
+        for column in self.columns:
+            dtype = column['numpy_dtype']
+            out.append(np.frombuffer(data, dtype=dtype, count=n_rows, offset=position))
+            position += n_rows * dtype.itemsize
+        return out
+
+    def read_values(self, participant_id):
+        """Columns of one participant as lists of ints and strings"""
+        out = []
+        for column, values in zip(self.columns, self.read_columns(participant_id)):
+            if column['kind'] == 'int':
+                out.append(values.tolist())
+            else:
+                categories = column['categories']
+                out.append([categories[code] for code in values.tolist()])
+        return out
+
+    def to_csv_text(self, participant_id):
+        """The settings of the participant exactly as in the original CSV"""
+        rows = zip(*[[str(value) for value in column] for column in self.read_values(participant_id)])
+        return self.header + '\n' + ''.join(','.join(row) + '\n' for row in rows)
+
+    def export_csv(self, participant_id, filename):
+        """Writes the settings of the participant to a CSV, e.g. for the audit trail in the logs"""
+        with open(filename, 'w', newline='') as f:
+            f.write(self.to_csv_text(participant_id))
+
+    def load_table(self, participant_id):
+        """Loads the settings of the participant as a TrialTable"""
+        names = frame_column_names(self.header.split(','))
+        return TrialTable(dict(zip(names, self.read_values(participant_id))))
+
+    def load(self, participant_id):
+        """Loads the settings of the participant as pd.read_csv loads the original CSV"""
+        import pandas as pd
+        names = frame_column_names(self.header.split(','))
+        data = {}
+        for name, column, values in zip(names, self.columns, self.read_columns(participant_id)):
+            if column['kind'] == 'int':
+                data[name] = values.astype('int64')
+            else:
+                data[name] = np.array(column['categories'], dtype=object)[values]
+        return pd.DataFrame(data)
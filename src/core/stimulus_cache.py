@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+
+def load_sound(path):
+    import pygame
+    return pygame.mixer.Sound(path)
+
+
+def sound_size(sound):
+    """Number of bytes the decoded sound occupies in the mixer format"""
+    return len(sound.get_raw())
+
+
+class StimulusCache:
+    """Keeps decoded stimulus sounds in memory so that no file is decoded during a trial.
+
+    Sounds are keyed by their path. If max_bytes is set, the least recently used sounds
+    are evicted once the cache grows over the limit (the sound just loaded is never evicted).
+
+    Args:
+        loader (function, optional): Function that takes a path and returns a sound object.
+            Defaults to pygame.mixer.Sound.
+        max_bytes (int, optional): Memory cap in bytes. None means no limit. Defaults to None.
+    """
+    def __init__(self, loader=None, max_bytes=None):
+        self.loader = load_sound if loader is None else loader
+        self.max_bytes = max_bytes
+        self._sounds = OrderedDict()
+        self._sizes = dict()
+        self.memory_usage = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def preload(self, paths):
+        """Loads each distinct path once, in order of the first appearance
+
+        Args:
+            paths (iterable): Paths to the stimuli, e.g. a column of the settings table
+        """
+        for path in dict.fromkeys(paths):
+            self.get(path)
+        return self
+
+    def get(self, path):
+        sound = self._sounds.get(path)
+        if sound is not None:
+            self._sounds.move_to_end(path)
+            self.hits += 1
+            return sound
+        self.misses += 1
+        sound = self.loader(path)
+        self._sounds[path] = sound
+        self._sizes[path] = sound_size(sound)
+        self.memory_usage += self._sizes[path]
+        self._evict()
+        return sound
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        while self.memory_usage > self.max_bytes and len(self._sounds) > 1:
+            path, _ = self._sounds.popitem(last=False)
+            self.memory_usage -= self._sizes.pop(path)
+            self.evictions += 1
+
+    def report(self):
+        """Returns a dictionary with the cache size, memory usage and hit statistics"""
+        return {'n_sounds': len(self._sounds),
+                'memory_bytes': self.memory_usage,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
+
+    def __contains__(self, path):
+        return path in self._sounds
+
+    def __len__(self):
+        return len(self._sounds)
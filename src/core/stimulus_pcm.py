@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from src.core.stimulus_cache import load_sound
+
+MANIFEST = 'manifest.json'
+
+
+def format_key(mixer_format):
+    """Name of the cache folder for a mixer format as returned by pygame.mixer.get_init()"""
+    frequency, size, channels = mixer_format
+    return f'{frequency}Hz_{"s" if size < 0 else "u"}{abs(size)}_{channels}ch'
+
+
+def pcm_folder(stimuli_folder, mixer_format):
+    return os.path.join(stimuli_folder, 'pcm', format_key(mixer_format))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    """Size and modification time of the file, which change when it is written"""
+    stat = os.stat(path)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def convert_stimuli(stimuli_folder, output_folder=None):
+    """Decodes every WAV of the folder in the format of the initialized mixer and stores the
+    samples as .npy files with a manifest of the lengths. Files whose source did not change
+    since the last conversion are skipped. The manifest keeps the hash, size and modification
+    time of every source.
+
+    Args:
+        stimuli_folder (string): Folder with the WAV files
+        output_folder (string, optional): Defaults to pcm/<format> inside the stimuli folder.
+
+    Returns:
+        dict: The manifest
+    """
+    import pygame
+    import pygame.sndarray
+    mixer_format = pygame.mixer.get_init()
+    if output_folder is None:
+        output_folder = pcm_folder(stimuli_folder, mixer_format)
+    os.makedirs(output_folder, exist_ok=True)
+    manifest_filename = os.path.join(output_folder, MANIFEST)
+    stimuli = {}
+    if os.path.exists(manifest_filename):
+        with open(manifest_filename) as f:
+            stimuli = json.load(f)['stimuli']
+    frequency = mixer_format[0]
+    for filename in sorted(os.listdir(stimuli_folder)):
+        if not filename.lower().endswith('.wav'):
+            continue
+        source = os.path.join(stimuli_folder, filename)
+        source_sha256 = file_sha256(source)
+        entry = stimuli.get(filename)
+        if entry is not None and entry['source_sha256'] == source_sha256 \
+                and os.path.exists(os.path.join(output_folder, entry['file'])):
+            # the modification time changes when the stimuli are copied
+            entry.update(file_stat(source))
+            continue
+        samples = pygame.sndarray.array(load_sound(source))
+        npy_filename = os.path.splitext(filename)[0] + '.npy'
+        np.save(os.path.join(output_folder, npy_filename), samples)
+        stimuli[filename] = {'file': npy_filename, 'samples': samples.shape[0],
+                             'duration': samples.shape[0] / frequency, 'source_sha256': source_sha256,
+                             **file_stat(source)}
+    manifest = {'frequency': frequency, 'size': mixer_format[1], 'channels': mixer_format[2],
+                'stimuli': stimuli}
+    with open(manifest_filename, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class PcmStimuli:
+    """Stimuli converted by convert_stimuli for the format of the initialized mixer.
+
+    load_sound builds the Sound directly from the stored samples, without decoding or
+    resampling. Stimuli which are missing in the manifest or whose WAV changed since the
+    conversion are decoded from the WAV as before and counted in fallbacks.
+
+    A WAV is unchanged if its size and modification time are those in the manifest, so the
+    WAVs are not read at the start. Only a WAV whose size or time differ, e.g. after copying
+    the stimuli, is hashed and compared with the manifest.
+
+    Args:
+        folder (string): Folder with the manifest and the .npy files
+        verify_sources (bool, optional): Check that the WAVs did not change. Defaults to True.
+        verify_hashes (bool, optional): Compare the hash of every WAV with the manifest, which
+            reads all of them. Defaults to False.
+    """
+    def __init__(self, folder, verify_sources=True, verify_hashes=False):
+        self.folder = folder
+        self.verify_sources = verify_sources
+        self.verify_hashes = verify_hashes
+        with open(os.path.join(folder, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.stimuli = self.manifest['stimuli']
+        self.fallbacks = []
+        self._entries = {}
+
+    @classmethod
+    def open(cls, stimuli_folder, mixer_format, verify_sources=True, verify_hashes=False):
+        """The converted stimuli of the folder for the mixer format, None if they were not converted"""
+        folder = pcm_folder(stimuli_folder, mixer_format)
+        if not os.path.exists(os.path.join(folder, MANIFEST)):
+            return None
+        return cls(folder, verify_sources, verify_hashes)
+
+    def _source_changed(self, path, entry):
+        if not self.verify_hashes and 'source_size' in entry:
+            stat = file_stat(path)
+            if stat['source_size'] != entry['source_size']:
+                return True
+            if stat['source_mtime_ns'] == entry['source_mtime_ns']:
+                return False
+        return file_sha256(path) != entry['source_sha256']
+
+    def _entry(self, path):
+        if path not in self._entries:
+            entry = self.stimuli.get(os.path.basename(path))
+            if entry is not None and self.verify_sources and os.path.exists(path) \
+                    and self._source_changed(path, entry):
+                print(f'WARNING: {path} changed since it was converted, run scripts/preprocess_stimuli.py')
+                entry = None
+            self._entries[path] = entry
+        return self._entries[path]
+
+    def duration(self, path):
+        """Duration of the converted stimulus in seconds, None if it was not converted"""
+        entry = self._entry(path)
+        return None if entry is None else entry['duration']
+
+    def load_array(self, path):
+        entry = self._entry(path)
+        if entry is None:
+            return None
+        return np.load(os.path.join(self.folder, entry['file']), mmap_mode='r')
+
+    def load_sound(self, path):
+        import pygame
+        samples = self.load_array(path)
+        if samples is None:
+            self.fallbacks.append(path)
+            return load_sound(path)
+        return pygame.mixer.Sound(buffer=np.ascontiguousarray(samples))
@@ -0,0 +1,101 @@
+import csv
+import math
+import os
+import queue
+import struct
+import threading
+
+
+class TimingLogWriter:
+    """Appends the timings of every trial to the CSV log from a background thread.
+
+    The trial loop only puts the row into a queue. The writer thread writes it and hands it
+    over to the operating system right away, so a crash loses at most the current trial.
+    flush() additionally waits for the queue and syncs the files to the disk, which the
+    runners do in the pauses between blocks. A row which fails to be written does not stop the
+    thread, the error is raised by the next flush() or close().
+
+    Args:
+        filename (string): Path to the CSV log
+        columns (list(string)): Columns of the log, see experimental_flow.log_columns
+        sidecar_filename (string, optional): If set, every row is also appended as little-endian
+            float64 values in the order of the columns (NaN for missing values). Defaults to None.
+    """
+    def __init__(self, filename, columns, sidecar_filename=None):
+        self.columns = list(columns)
+        self.n_rows = 0
+        self._file = open(filename, 'w', newline='')
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow(self.columns)
+        self._file.flush()
+        self._sidecar = None
+        if sidecar_filename is not None:
+            self._sidecar = open(sidecar_filename, 'wb')
+            self._record = struct.Struct('<' + 'd' * len(self.columns))
+        self._queue = queue.Queue()
+        self._error = None
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def write(self, timings):
+        """Queues the timings of a trial
+
+        Args:
+            timings (dict): Values of the trial keyed by the column, missing columns stay empty
+        """
+        self._queue.put(timings)
+
+    def _work(self):
+        while True:
+            timings = self._queue.get()
+            if timings is None:
+                self._queue.task_done()
+                return
+            try:
+                values = [timings.get(column) for column in self.columns]
+                self._writer.writerow(values)
+                self._file.flush()
+                if self._sidecar is not None:
+                    self._sidecar.write(self._record.pack(*[math.nan if value is None else value for value in values]))
+                    self._sidecar.flush()
+                self.n_rows += 1
+            except Exception as error:
+                # the first error is kept until it is raised
+                if self._error is None:
+                    self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """Waits until all queued rows are written and syncs the log to the disk
+
+        Raises:
+            Exception: The first error of writing a row since the last flush()
+        """
+        self._queue.join()
+        for f in [self._file, self._sidecar]:
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+        self._raise_error()
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+            if self._sidecar is not None:
+                self._sidecar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
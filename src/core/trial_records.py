@@ -0,0 +1,59 @@
+class TrialRecord:
+    """Everything the trial loop needs about one trial, resolved before the first trial.
+
+    The trial loop only reads the attributes, it does not index the settings table, look up
+    the stimulus cache or convert the trigger during the session.
+
+    Attributes:
+        index (int): Trial index, starting from 0
+        info (dict): Row of the settings table, for describe_trial of the paradigm
+        trigger (int): Trigger code
+        sound_path (string): Path to the stimulus
+        sound (pygame.mixer.Sound): Preloaded stimulus, None if it has to be taken from the
+            stimulus cache during the trial (when the cache has a memory limit)
+        sound_duration (float): Duration of the stimulus in seconds
+        intertrial (int): Intertrial after the trial in milliseconds
+        block_pause (int): Pause before the trial in milliseconds, 0 if it does not start a block
+    """
+    __slots__ = ('index', 'info', 'trigger', 'sound_path', 'sound', 'sound_duration', 'intertrial', 'block_pause')
+
+    def __init__(self, index, info, trigger, sound_path, sound, sound_duration, intertrial, block_pause):
+        self.index = index
+        self.info = info
+        self.trigger = trigger
+        self.sound_path = sound_path
+        self.sound = sound
+        self.sound_duration = sound_duration
+        self.intertrial = intertrial
+        self.block_pause = block_pause
+
+    def __repr__(self):
+        return f'TrialRecord({self.index}, trigger={self.trigger}, sound_path={self.sound_path!r})'
+
+
+def build_trial_records(trials, sound_paths, sound_durations, intertrials, block_pauses, stimulus_cache=None):
+    """Creates the records of all trials
+
+    Args:
+        trials (TrialTable): Settings of the participant
+        sound_paths (list(string)): Path to the stimulus of every trial
+        sound_durations (list(float)): Duration of the stimulus of every trial in seconds
+        intertrials (list(int)): Intertrial after every trial in milliseconds
+        block_pauses (list(int)): Pause before every trial in milliseconds
+        stimulus_cache (StimulusCache, optional): Preloaded stimuli. The sounds are taken from it
+            into the records unless it has a memory limit. Defaults to None.
+
+    Returns:
+        list(TrialRecord)
+    """
+    resolve = stimulus_cache is not None and stimulus_cache.max_bytes is None
+    return [TrialRecord(index=iTrial,
+                        info=trials.row(iTrial),
+                        trigger=int(trigger),
+                        sound_path=sound_path,
+                        sound=stimulus_cache.get(sound_path) if resolve else None,
+                        sound_duration=sound_duration,
+                        intertrial=intertrial,
+                        block_pause=block_pause)
+            for iTrial, (trigger, sound_path, sound_duration, intertrial, block_pause)
+            in enumerate(zip(trials['trigger'], sound_paths, sound_durations, intertrials, block_pauses))]
@@ -0,0 +1,93 @@
+import csv
+import os
+import select
+import threading
+import time
+
+
+class VirtualTriggerBox:
+    """Stand-in for the serial trigger box on a pseudo-terminal (Linux and macOS only).
+
+    serial.Serial can open port_name like the COM port of the real box. Every received byte is
+    timestamped with time.perf_counter_ns, so the times can be compared with the times taken by
+    the sender, and echoed back like the real box does.
+
+    Args:
+        echo (bool, optional): Send every received byte back. Defaults to True.
+    """
+    def __init__(self, echo=True):
+        import tty
+        self.echo = echo
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port_name = os.ttyname(self._slave)
+        # list of (perf_counter_ns, byte)
+        self.received = []
+        self._running = True
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while self._running:
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 1024)
+            except OSError:
+                return
+            now = time.perf_counter_ns()
+            self.received.extend((now, value) for value in data)
+            if self.echo:
+                os.write(self._master, data)
+
+    def codes(self):
+        """Received bytes in the order they arrived"""
+        return [value for _, value in self.received]
+
+    def pulses(self):
+        """Trigger pulses, a pulse starts with a non-zero code and ends with the next 0
+
+        Returns:
+            list(tuple): (code, onset in perf_counter_ns, width in ns), width is None if the
+                port was not reset
+        """
+        pulses = []
+        for received, value in self.received:
+            if value != 0:
+                pulses.append([value, received, None])
+            elif len(pulses) > 0 and pulses[-1][2] is None:
+                pulses[-1][2] = received - pulses[-1][1]
+        return [tuple(pulse) for pulse in pulses]
+
+    def wait_for(self, n_bytes, timeout=1):
+        """Waits until n_bytes were received
+
+        Returns:
+            bool: False if the timeout passed first
+        """
+        deadline = time.perf_counter() + timeout
+        while len(self.received) < n_bytes:
+            if time.perf_counter() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def export(self, filename):
+        """Writes the received bytes and their times to a csv file"""
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['received_ns', 'code'])
+            writer.writerows(self.received)
+
+    def close(self):
+        self._running = False
+        self._reader.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,123 @@
+"""Trigger codes of the paradigms and the conditions they stand for.
+
+Every paradigm declares its codes in src/<paradigm>/trigger_codes.py. The settings generator
+takes the code of every trial from there and the analysis decodes the recorded codes with the
+same table, so the two cannot disagree. A changed table needs a new version.
+"""
+import hashlib
+import importlib
+import json
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+N_CODES = 256
+
+
+@dataclass(frozen=True)
+class TriggerCode:
+    """One trigger code
+
+    Attributes:
+        code (int): Value sent to the trigger box, 1-255
+        key (tuple): Values the settings generator looks the code up by, e.g. the trial type and
+            the stimulus type
+        condition (string): Condition of the analysis, e.g. SSpec
+        label (string): Name of the epochs, codes with the same label are pooled, e.g. SSpec(D)
+        deviant (bool): The stimulus is a deviant
+    """
+    code: int
+    key: tuple
+    condition: str
+    label: str
+    deviant: bool = False
+
+
+class TriggerCodeMap:
+    """Versioned table of the trigger codes of a paradigm with vectorized lookups
+
+    Args:
+        paradigm (string): Name of the paradigm
+        version (int): Version of the table, increased with every change of the codes
+        codes (list(TriggerCode)): All codes of the paradigm
+    """
+    def __init__(self, paradigm, version, codes):
+        self.paradigm = paradigm
+        self.version = version
+        self.codes = list(codes)
+        self._by_key = {code.key: code.code for code in self.codes}
+        if len(self._by_key) != len(self.codes):
+            raise ValueError(f'{paradigm}: the keys of the trigger codes are not unique')
+        if len({code.code for code in self.codes}) != len(self.codes):
+            raise ValueError(f'{paradigm}: the trigger codes are not unique')
+        if not all(0 < code.code < N_CODES for code in self.codes):
+            raise ValueError(f'{paradigm}: trigger codes must be between 1 and {N_CODES - 1}')
+        # in the order of the first appearance in the table
+        self.conditions = list(dict.fromkeys(code.condition for code in self.codes))
+        self.labels = list(dict.fromkeys(code.label for code in self.codes))
+        # position in self.codes of every possible code, -1 for the codes which are not used
+        self.index = np.full(N_CODES, -1, dtype=np.int16)
+        self.index[[code.code for code in self.codes]] = np.arange(len(self.codes))
+        self._condition_index = np.array([self.conditions.index(code.condition) for code in self.codes] + [-1])
+        self._label_index = np.array([self.labels.index(code.label) for code in self.codes] + [-1])
+        self._deviant = np.array([code.deviant for code in self.codes] + [False])
+
+    def code(self, *key):
+        """Trigger code of the key, used by the settings generator"""
+        return self._by_key[tuple(key)]
+
+    def __getitem__(self, code):
+        position = self.index[code]
+        if position < 0:
+            raise KeyError(f'{self.paradigm} has no trigger code {code}')
+        return self.codes[position]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _positions(self, codes):
+        codes = np.asarray(codes, dtype=int)
+        valid = (codes >= 0) & (codes < N_CODES)
+        # the codes outside the table point to the last entry of the arrays
+        return np.where(valid, self.index[np.clip(codes, 0, N_CODES - 1)], -1)
+
+    def condition_indices(self, codes):
+        """Index into self.conditions of every code, -1 for unknown codes"""
+        return self._condition_index[self._positions(codes)]
+
+    def label_indices(self, codes):
+        """Index into self.labels of every code, -1 for unknown codes"""
+        return self._label_index[self._positions(codes)]
+
+    def deviants(self, codes):
+        """True for the codes of deviants"""
+        return self._deviant[self._positions(codes)]
+
+    def known(self, codes):
+        return self._positions(codes) >= 0
+
+    def event_id(self, prefix='Stimulus/S'):
+        """Description of every code in the annotations of a BrainVision recording, e.g. 'Stimulus/S 10'"""
+        return {f'{prefix}{code.code:>3}': code.code for code in self.codes}
+
+    def epochs_event_id(self):
+        """Event ids for mne.Epochs tagged with the label, so that epochs[label] pools its codes"""
+        return {f'{code.label}/{code.code}': code.code for code in self.codes}
+
+    def to_dict(self):
+        return {'paradigm': self.paradigm, 'version': self.version,
+                'codes': [asdict(code) for code in self.codes]}
+
+    @property
+    def fingerprint(self):
+        """Hash of the table, changes with any change of the codes"""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()
+
+    def write_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def load_trigger_codes(paradigm):
+    """Trigger codes of the paradigm from src/<paradigm>/trigger_codes.py"""
+    return importlib.import_module(f'src.{paradigm}.trigger_codes').TRIGGER_CODES
@@ -0,0 +1,242 @@
+import queue
+import statistics
+import threading
+import time
+
+
+def summarize_latencies(latencies_ns):
+    """Summarizes a list of latencies in nanoseconds
+
+    Returns:
+        dict: number of samples and mean, median and max latency in milliseconds
+    """
+    if len(latencies_ns) == 0:
+        return {'n': 0, 'mean_ms': None, 'median_ms': None, 'max_ms': None}
+    return {'n': len(latencies_ns),
+            'mean_ms': statistics.fmean(latencies_ns) / 1e6,
+            'median_ms': statistics.median(latencies_ns) / 1e6,
+            'max_ms': max(latencies_ns) / 1e6}
+
+
+def cpod_line_table():
+    """Active cPOD output lines for every 8 bit trigger code, lines are numbered from 1
+
+    Returns:
+        list(list(int)): item n holds the lines which need to be activated for the code n
+    """
+    return [[bit + 1 for bit in range(8) if code >> bit & 1] for code in range(256)]
+
+
+class TriggerWorker:
+    """Base for trigger devices which send the pulses from their own thread.
+
+    Triggers are passed through a queue to a single worker thread, so fire() returns
+    immediately and the trial loop never waits for the device. Subclasses implement
+    _send(code, duration), which writes the pulse and returns the time the write took.
+    A failing _send does not stop the worker, the error is raised by the next wait() or close().
+    """
+    def __init__(self):
+        # times between fire() and the start of the write and duration of the write
+        self.queue_latencies = []
+        self.write_latencies = []
+        self._queue = queue.Queue()
+        self._error = None
+        # number of fired triggers which were not sent yet, wait() waits for it to become 0
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def fire(self, code, duration):
+        """Schedules a trigger pulse and returns immediately
+
+        Args:
+            code (int): Trigger value 1-255
+            duration (float): Pulse duration in seconds
+        """
+        with self._idle:
+            self._pending += 1
+        self._queue.put((int(code), duration, time.perf_counter_ns()))
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            code, duration, fired = item
+            started = time.perf_counter_ns()
+            try:
+                self.write_latencies.append(self._send(code, duration))
+                self.queue_latencies.append(started - fired)
+            except Exception as error:
+                # the first error is kept until it is raised
+                if self._error is None:
+                    self._error = error
+            finally:
+                with self._idle:
+                    self._pending -= 1
+                    if self._pending == 0:
+                        self._idle.notify_all()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _send(self, code, duration):
+        raise NotImplementedError
+
+    def _close_device(self):
+        pass
+
+    def wait(self, timeout=10):
+        """Blocks until all fired triggers have been sent
+
+        Args:
+            timeout (float, optional): Seconds to wait at most, None waits forever. Defaults to 10.
+
+        Raises:
+            TimeoutError: The triggers were not sent within the timeout
+            Exception: The first error of sending a trigger since the last wait() or close()
+        """
+        with self._idle:
+            if not self._idle.wait_for(lambda: self._pending == 0, timeout):
+                raise TimeoutError(f'{self._pending} triggers were not sent within {timeout} s')
+        self._raise_error()
+
+    def report(self):
+        return {'queue_latency': summarize_latencies(self.queue_latencies),
+                'write_latency': summarize_latencies(self.write_latencies)}
+
+    def close(self, timeout=10):
+        """Stops the worker after the fired triggers and closes the device
+
+        Raises:
+            Exception: The first error of sending a trigger which was not raised by wait()
+        """
+        self._queue.put(None)
+        self._worker.join(timeout)
+        self._close_device()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class SerialTriggerDevice(TriggerWorker):
+    """Trigger box on a serial port which stays open for the whole session.
+
+    The worker writes the code, keeps it for the pulse duration and resets the port to 0.
+    The box echoes every byte, the echoes are discarded after every pulse so they do not
+    pile up in the input buffer.
+
+    Args:
+        com_port (string): COM port of the trigger box
+        baudrate (int, optional): Defaults to 2000000.
+        port_factory (function, optional): Function opening the port, takes the port name
+            and the baudrate. Defaults to serial.Serial.
+    """
+    def __init__(self, com_port, baudrate=2000000, port_factory=None):
+        if port_factory is None:
+            import serial
+            port_factory = serial.Serial
+        self.port = port_factory(com_port, baudrate=baudrate)
+        super().__init__()
+
+    def _send(self, code, duration):
+        started = time.perf_counter_ns()
+        self.port.write(bytes([code]))
+        ended = time.perf_counter_ns()
+        time.sleep(duration)
+        self.port.write(bytes([0]))
+        self.port.reset_input_buffer()
+        return ended - started
+
+    def _close_device(self):
+        self.port.close()
+
+
+class CPODTriggerDevice(TriggerWorker):
+    """Cedrus cPOD (XID device) sending triggers to the fNIRS.
+
+    The active lines for all 256 codes are computed once at construction. If pulse_duration
+    is set, the cPOD clears the lines itself after that time and the duration passed to
+    fire() is ignored. Otherwise the worker clears the lines after the duration.
+
+    Args:
+        device (pyxid2 device): Opened XID device, e.g. from connections.find_cpod
+        pulse_duration (float, optional): Hardware pulse duration in seconds. Defaults to None.
+    """
+    def __init__(self, device, pulse_duration=None):
+        self.device = device
+        self.lines = cpod_line_table()
+        self.pulse_duration = pulse_duration
+        if pulse_duration is not None:
+            device.set_pulse_duration(round(pulse_duration * 1000))
+        super().__init__()
+
+    def _send(self, code, duration):
+        started = time.perf_counter_ns()
+        self.device.activate_line(lines=self.lines[code])
+        ended = time.perf_counter_ns()
+        if self.pulse_duration is None:
+            time.sleep(duration)
+            self.device.clear_all_lines()
+        return ended - started
+
+
+class FakeSerialPort:
+    """Stand-in for serial.Serial which records the written bytes instead of sending them
+
+    Args:
+        port (string): Name of the port
+        baudrate (int, optional): Defaults to 2000000.
+    """
+    def __init__(self, port, baudrate=2000000):
+        self.port = port
+        self.baudrate = baudrate
+        self.closed = False
+        # list of (perf_counter_ns, byte)
+        self.written = []
+
+    def write(self, data):
+        now = time.perf_counter_ns()
+        self.written.extend((now, value) for value in data)
+
+    def reset_input_buffer(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeXIDDevice:
+    """Stand-in for a pyxid2 device which records the calls instead of talking to the hardware
+
+    Args:
+        latency (float, optional): Time in seconds every call takes, to imitate the USB
+            communication. Defaults to 0.
+    """
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.pulse_duration = 0
+        # list of (perf_counter_ns, call name, argument)
+        self.calls = []
+
+    def _call(self, name, argument=None):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.calls.append((time.perf_counter_ns(), name, argument))
+
+    def activate_line(self, lines=None, bitmask=None):
+        self._call('activate_line', lines if lines is not None else bitmask)
+
+    def clear_all_lines(self):
+        self._call('clear_all_lines')
+
+    def set_pulse_duration(self, duration):
+        self.pulse_duration = duration
+        self._call('set_pulse_duration', duration)
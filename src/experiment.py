@@ -1,7 +1,9 @@
+from src.core.clock import ExperimentClock
+
 # stimulus class definition
 class stimulus:
     # Instance initialization
-    def __init__(self, kind, content, position,size,color,startTime, duration,iti,condition,trigger):
+    def __init__(self, kind, content, position,size,color,clock, duration,iti,condition,trigger):
         self.stimType = kind
         self.stimContent = content
         self.size = size
@@ -13,7 +15,7 @@ class stimulus:
         self.response = ''
         self.rt = -1
         self.onset = -1
-        self.startTime = startTime
+        self.clock = clock # ExperimentClock of the session
         self.cond = condition
 
     # Present stimulus and collect responses ===============================================
@@ -27,7 +29,7 @@ class stimulus:
             pygame.mixer.Sound.play(sound2play)
             if self.trigger > 0:
                 sendTrigger(self.trigger)
-            onset = datetime.now()
+            onset = self.clock.now()
         
         else:
             trialDuration = self.dur + random.randint(self.iti[0],self.iti[1])
@@ -57,7 +59,7 @@ class stimulus:
             pygame.display.update()
             if self.trigger > 0:
                 sendTrigger(self.trigger)
-            onset = datetime.now()
+            onset = self.clock.now()
 
         # Response collection -------------------------------------------         
         listen = True
@@ -67,12 +69,12 @@ class stimulus:
         position = []
         
         while listen:
-            t = (datetime.now() - onset).seconds * 1000 + round((datetime.now() - onset).microseconds/1000)
+            t = round(self.clock.elapsed_ms(onset))
             for event in pygame.event.get():
                 if event.type == pygame.KEYDOWN and response == -1:
                     response = f"K{event.key}"                  
                     responseTime = t
-                    print(f"trial #{ii}; onset = {(onset - self.startTime).seconds + (onset - self.startTime).microseconds/1000000}; Keyboard code {event.key}; rt = {t} ms")                
+                    print(f"trial #{ii}; onset = {onset}; Keyboard code {event.key}; rt = {t} ms")                
                     if terminateByResponse:
                         return onset, response, responseTime
 
@@ -80,7 +82,7 @@ class stimulus:
                     response = f"M{event.button}"                 
                     responseTime = t
                     position = event.pos
-                    print(f"trial #{ii}; onset = {(onset - self.startTime).seconds + (onset - self.startTime).microseconds/1000000}; Mouse button {event.button}; rt = {t} ms, position = {event.pos}")                
+                    print(f"trial #{ii}; onset = {onset}; Mouse button {event.button}; rt = {t} ms, position = {event.pos}")                
                     if terminateByResponse:
                         return onset, response, responseTime, position
 
@@ -96,7 +98,7 @@ class stimulus:
     
     # write results to pandas dataframe  ===============================================
     def writeLog(self,dataLog,ind):
-        dataLog.at[ii,'stimOnset'] = (self.onset - self.startTime).seconds + (self.onset - self.startTime).microseconds/1000000
+        dataLog.at[ii,'stimOnset'] = self.onset
         dataLog.at[ii,'stimType'] = self.stimType
         dataLog.at[ii,'stimCont'] = self.stimContent
         dataLog.at[ii,'condition'] = self.cond
@@ -122,10 +124,10 @@ def presentRating(screen,  screenColor, ratimImg, ratingRect, ratingDur, mCal):
     screen.blit(ratingImg, ratingRect)
     pygame.display.update()
 
-    ratingStart = datetime.now()
-    while (datetime.now() - ratingStart).seconds * 1000 < ratingDur:
+    ratingClock = ExperimentClock()
+    while ratingClock.elapsed_ms(0) < ratingDur:
         # set time
-        t = (datetime.now() - ratingStart).seconds * 1000 + round((datetime.now() - ratingStart).microseconds/1000)
+        t = round(ratingClock.elapsed_ms(0))
   
         # wait for user choice
         for event in pygame.event.get():
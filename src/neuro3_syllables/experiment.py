@@ -1,6 +1,7 @@
-import numpy as np
+from src.core.schedule import COMMON_SEED, equal_length_permutation
 
-def generate_block_intertrials(participant_id, intertrial_range, size):
+
+def generate_block_intertrials(participant_id, intertrial_range, size, seed=COMMON_SEED):
     """The goal is to have the experiment the same length, but wary between participants.
     So we first generate the same random set of intertrials for all participants, and then
     permutate it per participant.
@@ -9,37 +10,25 @@ def generate_block_intertrials(participant_id, intertrial_range, size):
         participant_id (int): Integer to be used as a seed
         intertrial_range (tuple): Tuple with the minimum and maximum intertrial time
         size(int): Number of intertrials to generate
+        seed (int, optional): Seed of the set shared by all participants. Defaults to COMMON_SEED.
 
     Returns:
         list(int): List with the intertrial times as milliseconds
     """
-    # generate nbew random generator
-    common_rng = np.random.default_rng(9999)
-    # generate the random times
-    block_intertrials = common_rng.integers(intertrial_range[0], intertrial_range[1], size=size)
-    unique_rng = np.random.default_rng(participant_id)
-    unique_rng.shuffle(block_intertrials)
-    return block_intertrials
+    return equal_length_permutation(participant_id, intertrial_range, size, seed)
 
 
-def generate_intertrials(participant_id, intertrial_range, size):
-    """Generates the intertrial times for a participant
+def generate_intertrials(participant_id, intertrial_range, size, seed=COMMON_SEED):
+    """Generates the intertrial times for a participant, a participant specific permutation
+    of the same times as the block intertrials, or a fixed time if the range has a single value
 
     Args:
         participant_id (int): Integer to be used as a seed
-        intertrial_range (tuple): Tuple with the minimum and maximum intertrial time
+        intertrial_range (int or tuple): Fixed intertrial, or the minimum and maximum intertrial time
         size(int): Number of intertrials to generate
+        seed (int, optional): Seed of the set shared by all participants. Defaults to COMMON_SEED.
 
     Returns:
         list(int): List with the intertrial times as milliseconds
     """
-    rng = np.random.default_rng(participant_id)
-
-    if isinstance(intertrial_range, int):
-        return [intertrial_range] * size
-    if len(intertrial_range) == 1:
-        return  [intertrial_range[0]] * size
-    if len(intertrial_range) == 2:
-        return rng.choices(range(intertrial_range[0], intertrial_range[1]), k=size)
-    raise ValueError('Intertrial range should have 1 or 2 values')
-
+    return [int(intertrial) for intertrial in equal_length_permutation(participant_id, intertrial_range, size, seed)]
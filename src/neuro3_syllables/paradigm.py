@@ -0,0 +1,25 @@
+from src.core.engine import Paradigm, block_pauses_on_block_change
+import src.neuro3_syllables.experiment as experiment
+from src.neuro3_syllables.trigger_codes import TRIGGER_CODES
+
+
+def intertrial_policy(config, n_trials, n_blocks):
+    """Block intertrials and intertrials are participant specific permutations of the same
+    times, so all sessions are equally long. There is one block intertrial per pause, the first
+    block has none. The intertrials are fixed if the range has a single value"""
+    block_intertrials = experiment.generate_block_intertrials(config.participant_id, config.block_intertrial,
+                                                              n_blocks - 1)
+    intertrials = experiment.generate_intertrials(config.participant_id, config.intertrial_range, n_trials,
+                                                  seed=config.random_seed)
+    return block_intertrials, intertrials
+
+
+def describe_trial(iTrial, trial_info):
+    return f'Trial {iTrial}: Type: {trial_info["trial_type"]}, --- stimulus: {trial_info["stimulus_type"]}, --- trigger: {trial_info["trigger"]} '
+
+
+PARADIGM = Paradigm(name='neuro3_syllables',
+                    block_pauses=block_pauses_on_block_change,
+                    intertrial_policy=intertrial_policy,
+                    describe_trial=describe_trial,
+                    trigger_codes=TRIGGER_CODES)
@@ -2,14 +2,18 @@ import pandas as pd
 import numpy as np
 from enum import Enum
 import os
-from collections import defaultdict
 import random
+from src.core.deviant_pool import DeviantOrderPool
+from src.neuro3_syllables.trigger_codes import TRIGGER_CODES
 
 N_STANDARD_TRIALS_START = 5
 N_DEVIANT_TRIALS = 5
 N_STANDARD_TRIALS = 15
 
-POOL = defaultdict(list)
+# fixed number of standards between deviant - 2, 3, 4 and 5, shuffled randomly
+PAUSES = [2, 3, 4, 5]
+# used orders of the pauses for every trial type
+POOL = DeviantOrderPool(PAUSES)
 
 class TrialType(Enum):
     native_aa= "native_a-a"
@@ -25,26 +29,29 @@ class StimulusType(Enum):
 
 def create_experiment_trials(participant_seed=1111):
     """Creates a set of 5 sets 
+    The trials are collected in lists and the dataframe is created once at the end.
     """
     # TODO this should be a parameter in the set function and not a global thing
     np.random.seed(participant_seed)
-    df_trials = pd.DataFrame(columns = ["trial", "set_number", "block_number",
-                                        "trial_type", "stimulus_type"])
-    iTrial = 1
+    block_numbers, trial_types, stimulus_types, set_numbers, index = [], [], [], [], []
     for i in range(1, 6):
         cannot_start_with = None if i == 1 else set_trial_types[-1]
         set_block_numbers, set_trial_types, set_stimulus_types = create_set_trials(i, participant_seed, cannot_start_with=cannot_start_with)
-        set_triggers = [int(10*(list(TrialType).index(trial_type) + 1) + list(StimulusType).index(stim_type)) for trial_type, stim_type in zip(set_trial_types, set_stimulus_types)]
-        df_set = pd.DataFrame({'trial': range(iTrial, iTrial + len(set_trial_types)),
-                               'set_number': i,
-                               'block_number': set_block_numbers,
-                               'trial_type': set_trial_types,
-                               'stimulus_type': set_stimulus_types,
-                               'trigger': set_triggers})
-        df_set["stimulus"] = df_set.apply(lambda x: generate_stimulus_filename(x["trial_type"], x["stimulus_type"]), axis=1)
-        df_trials = pd.concat([df_trials, df_set], axis=0)
-        df_trials["trigger"] = df_trials["trigger"].astype(int)
-        iTrial += len(set_trial_types)
+        block_numbers.extend(set_block_numbers)
+        trial_types.extend(set_trial_types)
+        stimulus_types.extend(set_stimulus_types)
+        set_numbers.extend([i] * len(set_trial_types))
+        # every set is indexed from 0
+        index.extend(range(len(set_trial_types)))
+    triggers = [TRIGGER_CODES.code(trial_type.value, stim_type.value) for trial_type, stim_type in zip(trial_types, stimulus_types)]
+    stimuli = [generate_stimulus_filename(trial_type, stim_type) for trial_type, stim_type in zip(trial_types, stimulus_types)]
+    df_trials = pd.DataFrame({'trial': range(1, len(trial_types) + 1),
+                              'set_number': set_numbers,
+                              'block_number': block_numbers,
+                              'trial_type': trial_types,
+                              'stimulus_type': stimulus_types,
+                              'trigger': triggers,
+                              'stimulus': stimuli}, index=index)
     return df_trials
 
 
@@ -86,8 +93,6 @@ def create_block_trials(trial_type, seed, block=1):
     trial_types = [trial_type] * 25
     stimuli_second_phase = [StimulusType.standard] * (N_DEVIANT_TRIALS + N_STANDARD_TRIALS)
     stimuli_second_phase = insert_deviants(stimuli_second_phase, trial_type,seed)
-    if stimuli_second_phase is None:
-        raise Exception('Could not distribute deviants')
     stimulus_types = [StimulusType.standard] * N_STANDARD_TRIALS_START
     stimulus_types.extend(stimuli_second_phase)
     return trial_types, stimulus_types
@@ -100,16 +105,9 @@ def insert_deviants(trial_sequence, trial_type, seed):
     Args:
         trial_sequence (list of StimulusType): A list of stimulus types
     """
-    # fixed number of standards between deviant - 2, 3, 4 and 5, shuffled randomly
-    pauses = [2, 3, 4, 5]
     rand = random.Random(seed)
-    for i in range(100):
-        pauses = rand.sample(pauses, len(pauses))
-        # Check the POOL to see if we used this order for this block type before and keep suffling if we did (we do not want the same participant to hear the identical sequence)
-        if str(pauses) not in POOL[trial_type]:
-            break
-    if i == 100:
-        return None
+    # Take an order which was not used for this block type before (we do not want the same participant to hear the identical sequence)
+    pauses = POOL.draw(trial_type, rand)
 
     index = 0
     trial_sequence[index] = StimulusType.deviant
@@ -118,7 +116,6 @@ def insert_deviants(trial_sequence, trial_type, seed):
         trial_sequence[index] = StimulusType.deviant
     # penultimate stimulus must always be deviant
     assert index == 18
-    POOL[trial_type].append(str(pauses))
 
     
     return trial_sequence
@@ -160,5 +157,4 @@ def generate_settings_filename(participant_id):
 
 def restart():
     # restart the pool with used deviant orders 
-    global POOL
-    POOL = defaultdict(list)
\ No newline at end of file
+    POOL.clear()
\ No newline at end of file
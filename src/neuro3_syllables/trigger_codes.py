@@ -0,0 +1,11 @@
+"""Trigger codes of the neuro3 syllables: tens are the trial type, ones 0 for the standard and 1 for the deviant"""
+from src.core.trigger_codes import TriggerCode, TriggerCodeMap
+
+# trial type of the settings generator and its condition in the analysis
+TRIAL_TYPES = [('native_a-a', 'native_aa'), ('non-native_i-y', 'nonnative_iy'), ('native_i-e', 'native_ie')]
+STIMULUS_TYPES = [('standard', 'S'), ('deviant', 'D')]
+
+TRIGGER_CODES = TriggerCodeMap('neuro3_syllables', version=1, codes=[
+    TriggerCode(10 * (i + 1) + j, (trial_type, stimulus_type), condition, f'{condition}({suffix})', deviant=j == 1)
+    for i, (trial_type, condition) in enumerate(TRIAL_TYPES)
+    for j, (stimulus_type, suffix) in enumerate(STIMULUS_TYPES)])
@@ -0,0 +1,27 @@
+import random
+from src.core.engine import Paradigm, block_pauses_on_setblock_change
+from src.core.clock import experiment_clock
+from src.standard_nonstandard.trigger_codes import TRIGGER_CODES
+
+
+def intertrial_policy(config, n_trials, n_blocks):
+    """All participants have the same block intertrials and intertrials, drawn from the seed"""
+    rng = random.Random(config.random_seed)
+    block_intertrials = rng.choices(range(config.block_intertrial[0], config.block_intertrial[1]), k=n_blocks)
+    # Randomizes intertrial times or keeps it at a fixed value if the length is one
+    if len(config.intertrial_range) == 1:
+        intertrials = [config.intertrial_range[0]] * n_trials
+    if len(config.intertrial_range) == 2:
+        intertrials = rng.choices(range(config.intertrial_range[0], config.intertrial_range[1]), k=n_trials)
+    return block_intertrials, intertrials
+
+
+def describe_trial(iTrial, trial_info):
+    return f'{experiment_clock.now()}: Trial {iTrial}. {trial_info["block_type"]}. {trial_info["condition"]}. Stimulus {trial_info["stimulus"]}. Trigger: {trial_info["trigger"]}'
+
+
+PARADIGM = Paradigm(name='standard_nonstandard',
+                    block_pauses=block_pauses_on_setblock_change,
+                    intertrial_policy=intertrial_policy,
+                    describe_trial=describe_trial,
+                    trigger_codes=TRIGGER_CODES)
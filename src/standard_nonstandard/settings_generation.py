@@ -1,9 +1,11 @@
 from enum import Enum
+import os
 from collections import deque
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 import random
+from src.standard_nonstandard.trigger_codes import TRIGGER_CODES
 
 @dataclass
 class Parameters:
@@ -91,7 +93,8 @@ def select_stimuli(conditions, stimuli_standard, stimuli_nonstandard):
     return selected
 
 def create_experiment_trials(settings_number):
-    """Generate dataframe with all trial settings
+    """Generate dataframe with all trial settings. The trials are collected in lists
+    and the dataframe is created once at the end.
 
     Args:
         settings_number (_type_): _description_
@@ -99,34 +102,31 @@ def create_experiment_trials(settings_number):
     Returns:
         _type_: _description_
     """
-    df_trials = pd.DataFrame(columns=["trial", "condition", "block_number",
-                                      "block_type", "set_number", "stimulus_number",
-                                      "stimulus"])
-    trial = 1
     shift_number = settings_number - 1
-    
-
     stimuli_standard, stimuli_nonstandard = draw_stimuli(settings_number)
 
-
+    conditions, block_numbers, block_types, set_numbers, stimulus_numbers, triggers = [], [], [], [], [], []
     for set_number in range(1, Parameters.n_repetitions + 1):
-        conditions, block_types, block_numbers = create_set_trials(shift_number)
-        triggers = [int(10 * block_number + (n % 4 + 1)) for n, block_number in enumerate(block_numbers)]
-        df_set = pd.DataFrame({'trial': range(trial, trial + len(conditions)),
+        set_conditions, set_block_types, set_block_numbers = create_set_trials(shift_number)
+        conditions.extend(set_conditions)
+        block_numbers.extend(set_block_numbers)
+        block_types.extend(set_block_types)
+        set_numbers.extend([set_number] * len(set_conditions))
+        stimulus_numbers.extend(select_stimuli(set_conditions, stimuli_standard, stimuli_nonstandard))
+        triggers.extend([TRIGGER_CODES.code(block_number, n % 4 + 1) for n, block_number in enumerate(set_block_numbers)])
+    assert len(stimuli_standard) == 0
+    assert len(stimuli_nonstandard) == 0
+
+    # stimulus is a f'{condition}_{stimulus_number}.wav' for each row
+    stimuli = [generate_stimulus_filename(condition, stimulus_number) for condition, stimulus_number in zip(conditions, stimulus_numbers)]
+    df_trials = pd.DataFrame({'trial': range(1, len(conditions) + 1),
                               'condition': conditions,
                               'block_number': block_numbers,
                               'block_type': block_types,
-                              'set_number': set_number,
-                              'stimulus_number': select_stimuli(conditions, stimuli_standard, stimuli_nonstandard), 
+                              'set_number': set_numbers,
+                              'stimulus_number': stimulus_numbers,
+                              'stimulus': stimuli,
                               'trigger': triggers})
-        # stimulus is a f'{condition}_{stimulus_number}.wav' for each row
-        df_set["stimulus"] = df_set.apply(lambda x: generate_stimulus_filename(x["condition"], x["stimulus_number"]), axis=1)
-        df_trials = pd.concat([df_trials, df_set], axis=0)
-        df_trials["trigger"] = df_trials["trigger"].astype(int)
-        trial += len(conditions)
-    assert len(stimuli_standard) == 0
-    assert len(stimuli_nonstandard) == 0
-
     df_trials = df_trials.set_index("trial", drop=False)
     # Not generating intertrials at this point 
     # df_trials["inter_trial"] = np.array([round(x) for x in (np.random.random(df_trials.shape[0]) * 200) + 900])
@@ -162,3 +162,11 @@ def generate_stimulus_filename(condition, stimulus_number):
     """
     return f"{stimulus_number:02}_{condition.value}_4.wav"
 
+
+def settings_folder():
+    return os.path.join(os.getcwd(), 'settings', 'standard_nonstandard')
+
+
+def generate_settings_filename(participant_id):
+    stimuli_filename = os.path.join(settings_folder(), f'settings{participant_id}.csv')
+    return stimuli_filename
@@ -0,0 +1,18 @@
+"""Trigger codes of the standard/nonstandard paradigm: tens are the block, ones the position of the stimulus in it
+
+Blocks 1 and 3 are homogenous with the standard (Czech) and the nonstandard (Ostrava) stimuli,
+blocks 2 and 4 alternate starting with the standard and the nonstandard stimulus. The conditions
+are the stimulus (S or D) in a homogenous block of the same (SiS, DiD) or in a mixed block (SiM, DiM).
+"""
+from src.core.trigger_codes import TriggerCode, TriggerCodeMap
+
+# condition of the stimulus at every position of the blocks
+BLOCK_CONDITIONS = {1: ['SiS', 'SiS', 'SiS', 'SiS'],
+                    2: ['SiM', 'DiM', 'SiM', 'DiM'],
+                    3: ['DiD', 'DiD', 'DiD', 'DiD'],
+                    4: ['DiM', 'SiM', 'DiM', 'SiM']}
+
+TRIGGER_CODES = TriggerCodeMap('standard_nonstandard', version=1, codes=[
+    TriggerCode(10 * block_number + position, (block_number, position), condition, condition)
+    for block_number, conditions in BLOCK_CONDITIONS.items()
+    for position, condition in enumerate(conditions, start=1)])
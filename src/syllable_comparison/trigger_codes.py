@@ -0,0 +1,12 @@
+"""Trigger codes of the syllable comparison: tens are the trial type, ones 0 for the standard and 1 for the deviant"""
+from src.core.trigger_codes import TriggerCode, TriggerCodeMap
+
+# trial type of the settings generator and its condition in the analysis
+TRIAL_TYPES = [('language_spectral', 'SSpec'), ('language_duration', 'SDur'),
+               ('nonlanguage_spectral', 'NSSpec'), ('nonlanguage_duration', 'NSDur')]
+STIMULUS_TYPES = [('standard', 'S'), ('deviant', 'D')]
+
+TRIGGER_CODES = TriggerCodeMap('syllable_comparison', version=1, codes=[
+    TriggerCode(10 * (i + 1) + j, (trial_type, stimulus_type), condition, f'{condition}({suffix})', deviant=j == 1)
+    for i, (trial_type, condition) in enumerate(TRIAL_TYPES)
+    for j, (stimulus_type, suffix) in enumerate(STIMULUS_TYPES)])
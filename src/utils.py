@@ -1,6 +1,4 @@
 import pygame
-import tkinter as tk
-from tkinter import simpledialog
 
 def initScreen(screenSize, screenColor):
     # input variables:
@@ -14,7 +12,7 @@ def initScreen(screenSize, screenColor):
 
 
 def getScreenSize():
-    sid = ''
-    ROOT = tk.Tk()
-    ROOT.withdraw()
-    return (ROOT.winfo_screenwidth(),ROOT.winfo_screenheight())
\ No newline at end of file
+    # size of the desktop, read before any window is opened
+    pygame.display.init()
+    info = pygame.display.Info()
+    return (info.current_w, info.current_h)
@@ -0,0 +1,133 @@
+"""Measures the delay from Sound.play() to the output of the sound for a range of mixer buffer sizes.
+
+By default a click shorter than any buffer is played and its channel is polled until it is free
+again. SDL_mixer frees the channel when the click was mixed into the buffer of the device, so this is
+the time the sound waited for the mixer. The output then follows within one buffer period, which is
+added in output_estimate_ms. This works with any audio driver, also with SDL_AUDIODRIVER=dummy, which
+consumes the buffers at the real rate.
+
+With --loopback the output is recorded by the sounddevice package (connect the output of the sound
+card to its input) and the delay is measured until the click is recorded, so it includes the
+device. The recording time of a sample is estimated from the time of the input callback.
+
+python -m testing_scripts.benchmark_audio_latency [--buffers 128 256 512 1024 2048] [--repetitions 50] [--loopback]
+
+A buffer is stable if the delays spread over at most 1.5 buffer periods. The report is written to
+logs/audio_latency/<timestamp>.csv
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+
+import numpy as np
+import pygame
+
+from src.core.audio import MixerSettings, init_mixer
+
+CLICK_SAMPLES = 32 # shorter than any buffer, so it is mixed in a single callback
+STABLE_SPREAD = 1.5 # maximum spread of the delays in buffer periods
+
+
+def make_click(settings):
+    return pygame.mixer.Sound(buffer=np.full((CLICK_SAMPLES, settings.channels), 16000, dtype=np.int16))
+
+
+def measure_mixed(click, repetitions):
+    delays = []
+    for _ in range(repetitions):
+        # random start within the buffer period
+        time.sleep(0.05 + random.random() * 0.05)
+        started = time.perf_counter()
+        channel = click.play()
+        if channel is None:
+            # no free channel, the repetition is skipped
+            continue
+        while channel.get_busy():
+            pass
+        delays.append(time.perf_counter() - started)
+    return delays
+
+
+def measure_loopback(click, settings, repetitions, threshold=0.1):
+    import sounddevice
+    delays = []
+    for _ in range(repetitions):
+        blocks = []
+        def callback(indata, frames, time_info, status):
+            blocks.append((time.perf_counter(), indata[:, 0].copy()))
+        with sounddevice.InputStream(samplerate=settings.frequency, channels=1, dtype='float32', callback=callback):
+            time.sleep(0.1 + random.random() * 0.05)
+            started = time.perf_counter()
+            click.play()
+            time.sleep(0.3)
+        for recorded, samples in blocks:
+            above = np.flatnonzero(np.abs(samples) > threshold)
+            if above.size > 0:
+                delays.append(recorded - (len(samples) - above[0]) / settings.frequency - started)
+                break
+    return delays
+
+
+def summarize(settings, delays, loopback):
+    delays_ms = sorted(delay * 1000 for delay in delays)
+    percentile = lambda q: delays_ms[min(len(delays_ms) - 1, round(q * (len(delays_ms) - 1)))]
+    return {'buffer': settings.buffer, 'buffer_ms': settings.buffer_latency * 1000, 'n': len(delays_ms),
+            'median_ms': statistics.median(delays_ms), 'p5_ms': percentile(0.05), 'p95_ms': percentile(0.95),
+            'max_ms': delays_ms[-1], 'jitter_ms': percentile(0.95) - percentile(0.05),
+            # the loopback measures the output itself
+            'output_estimate_ms': statistics.median(delays_ms) + (0 if loopback else settings.buffer_latency * 1000),
+            # the delays spread over one buffer period, a larger spread means that the mixer missed a period
+            'stable': delays_ms[-1] - percentile(0.05) <= STABLE_SPREAD * settings.buffer_latency * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the audio latency for mixer buffer sizes')
+    parser.add_argument('--buffers', type=int, nargs='+', default=[128, 256, 512, 1024, 2048])
+    parser.add_argument('--repetitions', type=int, default=50)
+    parser.add_argument('--frequency', type=int, default=MixerSettings.frequency)
+    parser.add_argument('--loopback', action='store_true', help='record the output with sounddevice')
+    args = parser.parse_args()
+
+    results = []
+    for buffer in args.buffers:
+        settings = MixerSettings(frequency=args.frequency, buffer=buffer)
+        init_mixer(settings)
+        click = make_click(settings)
+        if args.loopback:
+            delays = measure_loopback(click, settings, args.repetitions)
+        else:
+            delays = measure_mixed(click, args.repetitions)
+        pygame.mixer.quit()
+        if len(delays) == 0:
+            print(f'buffer {buffer}: the click was not recorded')
+            continue
+        result = summarize(settings, delays, args.loopback)
+        results.append(result)
+        print(', '.join(f'{key}: {value:.2f}' if isinstance(value, float) else f'{key}: {value}' for key, value in result.items()))
+
+    if not results:
+        print('No buffer was measured, no report is written')
+        return
+    stable = [result['buffer'] for result in results if result['stable']]
+    if stable:
+        print(f'Smallest stable buffer: {min(stable)}')
+    else:
+        print('No buffer was stable')
+
+    folder = os.path.join(os.getcwd(), 'logs', 'audio_latency')
+    os.makedirs(folder, exist_ok=True)
+    filename = os.path.join(folder, f'{datetime.now().strftime("%Y%m%d-%H%M%S")}.csv')
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]) + ['mode'], lineterminator='\n')
+        writer.writeheader()
+        for result in results:
+            writer.writerow(dict(result, mode='loopback' if args.loopback else 'mixed'))
+    print(f'Report written to {filename}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Compares the time the trial loop spends sending a cPOD trigger, without the hardware.
+
+The legacy way computes the lines from the binary string and sleeps for the pulse duration
+in the calling thread, the CPODTriggerDevice only puts the trigger into its queue.
+"""
+import time
+from src.core.triggers import CPODTriggerDevice, FakeXIDDevice, summarize_latencies
+
+N_TRIGGERS = 200
+DURATION = 0.01 # seconds
+USB_LATENCY = 0.001 # seconds
+
+
+def legacy_send_trigger_cpod(device, value, duration):
+    # copy of the original sendTriggerCPOD, duration in milliseconds
+    bitList = list(str(bin(value)))
+    activeLines = []
+    bitCounter = 0
+    for ii in range(len(bitList)-1,1,-1):
+        bitCounter += 1
+        if bitList[ii] == '1':
+            activeLines.append(bitCounter)
+    device.activate_line(lines = activeLines)
+    time.sleep(duration/1000)
+    device.clear_all_lines()
+
+
+def measure(send):
+    blocked = []
+    for i in range(N_TRIGGERS):
+        started = time.perf_counter_ns()
+        send(i % 256)
+        blocked.append(time.perf_counter_ns() - started)
+        # leave time for the pulse so that the triggers do not queue up
+        time.sleep(2 * DURATION)
+    return summarize_latencies(blocked)
+
+
+legacy = measure(lambda code: legacy_send_trigger_cpod(FakeXIDDevice(USB_LATENCY), code, DURATION * 1000))
+print(f'Legacy sendTriggerCPOD blocks the caller: {legacy}')
+
+for pulse_duration in [None, DURATION]:
+    with CPODTriggerDevice(FakeXIDDevice(USB_LATENCY), pulse_duration=pulse_duration) as device:
+        fired = measure(lambda code: device.fire(code, DURATION))
+        device.wait()
+        print(f'CPODTriggerDevice (pulse_duration={pulse_duration}) blocks the caller: {fired}')
+        print(f'    device report: {device.report()}')
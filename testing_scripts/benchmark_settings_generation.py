@@ -0,0 +1,67 @@
+"""Times the generation of the settings of all participants and checks the result against
+the committed settings.
+
+Run with python -m testing_scripts.benchmark_settings_generation. The script only calls
+create_experiment_trials, so it can be run on an older checkout for comparison. The committed
+settings are read from the settings stores, or from the CSV of every participant on checkouts
+from before the stores.
+"""
+import io
+import os
+import time
+
+import src.neuro3_syllables.settings_generation as neuro3_syllables
+import src.standard_nonstandard.settings_generation as standard_nonstandard
+import src.syllable_comparison.settings_generation as syllable_comparison
+
+N_PARTICIPANTS = 399
+
+
+def syllable_settings(module):
+    def generate(participant_id):
+        # the generation scripts restart the pool for every participant
+        module.restart()
+        buffer = io.StringIO()
+        module.create_experiment_trials(participant_id).to_csv(buffer)
+        return buffer.getvalue()
+    return generate
+
+
+def standard_nonstandard_settings(participant_id):
+    return standard_nonstandard.create_experiment_trials(participant_id).to_csv()
+
+
+def committed_settings(name):
+    """Function returning the committed settings of a participant as CSV text"""
+    try:
+        from src.core.settings_store import SettingsStore
+    except ImportError:
+        SettingsStore = None
+    store_filename = os.path.join('settings', f'{name}.store')
+    if SettingsStore is not None and os.path.exists(store_filename):
+        return SettingsStore(store_filename).to_csv_text
+    def read_csv(participant_id):
+        with open(os.path.join('settings', name, f'settings{participant_id}.csv'), newline='') as f:
+            return f.read()
+    return read_csv
+
+
+def measure(name, generate):
+    committed = committed_settings(name)
+    durations = []
+    mismatches = 0
+    for participant_id in range(1, N_PARTICIPANTS + 1):
+        started = time.perf_counter()
+        csv = generate(participant_id)
+        durations.append(time.perf_counter() - started)
+        if committed(participant_id) != csv:
+            mismatches += 1
+    print(f'{name}: {sum(durations):.2f} s for {N_PARTICIPANTS} participants, '
+          f'{1000*sum(durations)/N_PARTICIPANTS:.1f} ms per participant, '
+          f'{mismatches} differ from the committed settings')
+
+
+if __name__ == '__main__':
+    measure('neuro3_syllables', syllable_settings(neuro3_syllables))
+    measure('syllable_comparison', syllable_settings(syllable_comparison))
+    measure('standard_nonstandard', standard_nonstandard_settings)
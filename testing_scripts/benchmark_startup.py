@@ -0,0 +1,89 @@
+"""Measures the time from launching the runner process until the first trial can start.
+
+Every run starts a new python process, which imports the engine and the paradigm like the
+runner scripts and goes through ExperimentSession.prepare without the hardware (the scheduler
+then adds a fixed 0.1 s lead before the first onset). The processes use the dummy SDL drivers.
+
+python -m testing_scripts.benchmark_startup [paradigm] [--synthetic-sounds] [--premix-blocks]
+
+--synthetic-sounds replaces the stimuli by silent sounds, for checkouts without the WAV files.
+--premix-blocks prepares the session with the premixed blocks.
+
+The stages are the methods called by ExperimentSession.prepare, in the order it calls them,
+followed by prepare as a whole.
+"""
+import ast
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+N_RUNS = 5
+
+
+def prepare_stages(session_class):
+    """Methods called by session_class.prepare, e.g. load_settings"""
+    stages = []
+    for node in ast.walk(ast.parse(inspect.getsource(session_class.prepare).strip())):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == 'self'):
+            stages.append(node.func.attr)
+    return stages
+
+
+def child(paradigm_name, synthetic_sounds, premix_blocks):
+    marks = {}
+    import importlib
+    from src.core.engine import ExperimentSession, SessionConfig
+    paradigm = importlib.import_module(f'src.{paradigm_name}.paradigm').PARADIGM
+    marks['imports'] = time.time()
+    stimulus_loader = None
+    if synthetic_sounds:
+        import numpy as np
+        import pygame
+        stimulus_loader = lambda path: pygame.mixer.Sound(buffer=np.zeros((22050, 2), dtype=np.int16).tobytes())
+    config = SessionConfig(participant_id=1, movie_required=False, eeg_trigger=False, fnirs_trigger=False,
+                           premix_blocks=premix_blocks)
+    session = ExperimentSession(paradigm, config, stimulus_loader=stimulus_loader)
+    # every stage is marked when it returns, the stages prepare skips are not marked
+    for stage in prepare_stages(ExperimentSession):
+        method = getattr(session, stage)
+        def timed(*args, method=method, stage=stage, **kwargs):
+            result = method(*args, **kwargs)
+            marks[stage] = time.time()
+            return result
+        setattr(session, stage, timed)
+    session.prepare()
+    marks['prepare'] = time.time()
+    modules = {name: name in sys.modules for name in ['pandas', 'tkinter', 'serial', 'pyxid2', 'pylink']}
+    print('STARTUP ' + json.dumps({'marks': marks, 'modules': modules}))
+
+
+def launch(paradigm_name, synthetic_sounds, premix_blocks):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    args = [sys.executable, '-m', 'testing_scripts.benchmark_startup', paradigm_name, '--child']
+    if synthetic_sounds:
+        args.append('--synthetic-sounds')
+    if premix_blocks:
+        args.append('--premix-blocks')
+    launched = time.time()
+    output = subprocess.run(args, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.split('STARTUP ', 1)[1])
+    return {stage: mark - launched for stage, mark in result['marks'].items()}, result['modules']
+
+
+if __name__ == '__main__':
+    paradigm_name = next((arg for arg in sys.argv[1:] if not arg.startswith('--')), 'neuro3_syllables')
+    synthetic_sounds = '--synthetic-sounds' in sys.argv
+    premix_blocks = '--premix-blocks' in sys.argv
+    if '--child' in sys.argv:
+        child(paradigm_name, synthetic_sounds, premix_blocks)
+        sys.exit()
+    runs = [launch(paradigm_name, synthetic_sounds, premix_blocks) for _ in range(N_RUNS)]
+    print(f'{paradigm_name}: seconds since the process launch, median of {N_RUNS} runs')
+    for stage in runs[0][0]:
+        print(f'    {stage:16} {statistics.median(marks[stage] for marks, _ in runs):.3f}')
+    print(f'    imported modules: {runs[-1][1]}')
@@ -0,0 +1,87 @@
+"""Measures the bookkeeping the trial loop does per trial, without playing anything.
+
+The legacy loop indexed the pandas table (df_stimuli['set_number'][iTrial],
+df_stimuli['block_number'][iTrial], df_stimuli.iloc[iTrial]) and converted the trigger in every
+trial. The TrialTable loop built the row and looked the sound up in the stimulus cache. The
+TrialRecord loop only reads attributes of the records built before the session.
+
+python -m testing_scripts.benchmark_trial_bookkeeping [paradigm]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from src.core.settings_batch import store_filename
+from src.core.settings_store import SettingsStore, TrialTable
+from src.core.stimulus_cache import StimulusCache
+from src.core.trial_records import build_trial_records
+
+N_REPEATS = 20
+
+
+def legacy_loop(df_stimuli, cache, sound_paths, intertrials):
+    for iTrial in range(len(df_stimuli)):
+        set_number = df_stimuli['set_number'][iTrial]
+        block_number = df_stimuli['block_number'][iTrial]
+        trial_info = df_stimuli.iloc[iTrial]
+        sound = cache.get(sound_paths[iTrial])
+        trigger = int(trial_info['trigger'])
+        intertrial = intertrials[iTrial]
+
+
+def table_loop(trials, cache, sound_paths, intertrials):
+    for iTrial in range(len(trials)):
+        trial_info = trials.row(iTrial)
+        sound = cache.get(sound_paths[iTrial])
+        trigger = int(trial_info['trigger'])
+        intertrial = intertrials[iTrial]
+
+
+def records_loop(records):
+    for record in records:
+        sound = record.sound
+        trigger = record.trigger
+        intertrial = record.intertrial
+        block_pause = record.block_pause
+
+
+def measure(name, loop, n_trials):
+    started = time.perf_counter()
+    for _ in range(N_REPEATS):
+        loop()
+    per_trial_us = (time.perf_counter() - started) / N_REPEATS / n_trials * 1e6
+    tracemalloc.start()
+    loop()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the objects of a trial are freed before the next one, so the peak is what one trial allocates
+    print(f'{name:<12} {per_trial_us:8.2f} us per trial, {peak:6d} bytes allocated at most')
+
+
+def main(paradigm):
+    text = SettingsStore(store_filename(paradigm)).to_csv_text(1)
+    trials = TrialTable.from_csv_text(text)
+    # the legacy runners indexed the table from 0
+    df_stimuli = trials.to_dataframe()
+    n_trials = len(trials)
+    pygame.mixer.init()
+    silent = pygame.mixer.Sound(buffer=np.zeros((441, 2), dtype=np.int16))
+    sound_paths = [os.path.join('stimuli', paradigm, stimulus) for stimulus in trials['stimulus']]
+    cache = StimulusCache(loader=lambda path: silent).preload(sound_paths)
+    intertrials = [600] * n_trials
+    records = build_trial_records(trials, sound_paths, [0.1] * n_trials, intertrials, [0] * n_trials, cache)
+    print(f'{paradigm}: {n_trials} trials')
+    measure('pandas', lambda: legacy_loop(df_stimuli, cache, sound_paths, intertrials), n_trials)
+    measure('TrialTable', lambda: table_loop(trials, cache, sound_paths, intertrials), n_trials)
+    measure('TrialRecord', lambda: records_loop(records), n_trials)
+    pygame.mixer.quit()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else 'neuro3_syllables')
@@ -0,0 +1,49 @@
+"""Measures the trigger write latency and the pulse width on the virtual trigger box (Linux and macOS).
+
+The legacy sendTrigger opens the port for every trigger and reads the echo in a thread, the
+SerialTriggerDevice keeps the port open and writes from its worker thread. The latency is the
+time between the call and the arrival of the code in the box. The received codes are exported
+to logs/trigger_box.
+"""
+import os
+import time
+from datetime import datetime
+
+import serial
+
+from src.connections import sendTrigger
+from src.core.trigger_box import VirtualTriggerBox
+from src.core.triggers import SerialTriggerDevice, summarize_latencies
+
+N_TRIGGERS = 100
+DURATION = 0.01 # seconds
+OUTPUT_FOLDER = os.path.join('logs', 'trigger_box')
+
+
+def measure(box, send):
+    called = []
+    for i in range(N_TRIGGERS):
+        called.append(time.perf_counter_ns())
+        send(i % 255 + 1)
+        box.wait_for(2 * (i + 1))
+        time.sleep(2 * DURATION)
+    pulses = box.pulses()
+    latencies = [onset - call for call, (_, onset, _) in zip(called, pulses)]
+    width_errors = [abs(width - DURATION * 1e9) for _, _, width in pulses if width is not None]
+    expected = [i % 255 + 1 for i in range(N_TRIGGERS)]
+    return {'codes_correct': [code for code, _, _ in pulses] == expected,
+            'write_latency': summarize_latencies(latencies),
+            'pulse_width_error': summarize_latencies(width_errors)}
+
+
+os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+
+with VirtualTriggerBox() as box:
+    print(f'Legacy sendTrigger: {measure(box, lambda code: sendTrigger(code, box.port_name, DURATION))}')
+    box.export(os.path.join(OUTPUT_FOLDER, f'{timestamp}_sendTrigger.csv'))
+
+with VirtualTriggerBox() as box:
+    with SerialTriggerDevice(box.port_name, port_factory=serial.Serial) as device:
+        print(f'SerialTriggerDevice: {measure(box, lambda code: device.fire(code, DURATION))}')
+    box.export(os.path.join(OUTPUT_FOLDER, f'{timestamp}_SerialTriggerDevice.csv'))
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.analysis.annotations import (after_standard_mask, count_labels, description_codes, pair_stimtrak,
+                                      select_annotations, select_events)
+
+
+def synthetic_stream(rng, n_trials=300):
+    """Computer triggers with stimtrak pulses, some of them missing or too late, and a pause every 50 trials"""
+    onsets, descriptions = [], []
+    time = 1.0
+    for iTrial in range(n_trials):
+        time += 20 if iTrial % 50 == 0 else rng.uniform(0.8, 1.0)
+        code = 10 * rng.integers(1, 5) + (rng.random() < 0.2)
+        onsets.append(time)
+        descriptions.append(f'Stimulus/S {code}')
+        lag = rng.choice([0.004, 0.6, None], p=[0.9, 0.05, 0.05])
+        if lag is not None:
+            onsets.append(time + lag)
+            descriptions.append('Push/P  1')
+    return np.array(onsets), np.array(descriptions)
+
+
+def notebook_pairing(onsets, descriptions):
+    # loop of the ERP notebook keeping the stimtrak pulses right after a computer trigger
+    selected = []
+    last_desc, last_onset = '', 0
+    for onset, desc in zip(onsets, descriptions):
+        if 'Push/P' in desc and 'Stimulus/S' in last_desc and onset - last_onset <= 0.5:
+            selected.append((onset, last_desc))
+        last_desc, last_onset = desc, onset
+    return selected
+
+
+def notebook_filter(selected):
+    # loop of the ERP notebook dropping the stimuli after a deviant or a pause
+    kept = [selected[0]]
+    last_deviant, last_onset = True, 0
+    for onset, desc in selected[1:]:
+        deviant = desc[-1] != '0'
+        if not last_deviant and onset - last_onset < 10:
+            kept.append((onset, desc))
+        last_deviant, last_onset = deviant, onset
+    return kept
+
+
+def test_pair_stimtrak():
+    onsets = np.array([1.0, 1.004, 2.0, 3.0, 3.7, 4.0, 4.01, 4.02])
+    descriptions = ['Stimulus/S 10', 'Push/P  1', 'Stimulus/S 11', 'Stimulus/S 20', 'Push/P  1',
+                    'Stimulus/S 10', 'Push/P  1', 'Push/P  1']
+    triggers, pulses = pair_stimtrak(onsets, descriptions)
+    assert triggers.tolist() == [0, 2, 3, 5]
+    assert pulses.tolist() == [1, -1, -1, 6]
+
+
+def test_after_standard_mask():
+    onsets = np.array([0, 1, 2, 3, 20, 21])
+    deviants = np.array([False, True, False, False, False, False])
+    assert after_standard_mask(onsets, deviants).tolist() == [False, True, False, True, False, True]
+
+
+def test_count_labels():
+    counts = count_labels(description_codes(['Stimulus/S 10', 'Stimulus/S 11', 'Stimulus/S 40', 'Stimulus/S 99']))
+    assert counts == {'SSpec(S)': 1, 'SSpec(D)': 1, 'SDur(S)': 0, 'SDur(D)': 0,
+                      'NSSpec(S)': 0, 'NSSpec(D)': 0, 'NSDur(S)': 1, 'NSDur(D)': 0}
+
+
+def test_select_events_matches_notebook():
+    onsets, descriptions = synthetic_stream(np.random.default_rng(3))
+    durations = np.where(np.char.startswith(descriptions, 'Push'), 0.002, 0.001)
+    selected_onsets, selected_durations, selected_descriptions, counts = select_events(onsets, durations, descriptions)
+    paired = notebook_pairing(onsets, descriptions)
+    assert counts['n_paired'] == len(paired)
+    # the notebook always kept the first stimulus and dropped the second one
+    expected = notebook_filter(paired)[1:]
+    selected = list(zip(selected_onsets, selected_descriptions))
+    assert [event for event in selected if event[0] > paired[1][0]] == expected
+    assert np.all(selected_durations == 0.002)
+
+
+def test_select_annotations():
+    mne = pytest.importorskip('mne')
+    onsets, descriptions = synthetic_stream(np.random.default_rng(4), n_trials=60)
+    annotations = mne.Annotations(onset=onsets, duration=np.zeros(len(onsets)), description=descriptions)
+    selected, counts = select_annotations(annotations)
+    assert isinstance(selected, mne.Annotations)
+    assert len(selected) == counts['n_selected']
+    assert all(description.startswith('Stimulus/S') for description in selected.description)
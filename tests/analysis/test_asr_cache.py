@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.analysis import asr_cache
+
+WINDOW = 5
+
+
+class FakeRaw:
+    def __init__(self, data, sfreq=100):
+        self._data = data
+        self.info = {'sfreq': sfreq}
+        self.ch_names = [f'EEG{i}' for i in range(data.shape[0])]
+
+    @property
+    def n_times(self):
+        return self._data.shape[1]
+
+    def get_data(self, start=0, stop=None):
+        return self._data[:, start:stop].copy()
+
+
+class FakeASR:
+    """Moving sum over the last WINDOW samples, scaled by the mean of the data it was fitted on"""
+    n_fitted = 0
+
+    def __init__(self, sfreq, cutoff):
+        self.cutoff = cutoff
+
+    def fit(self, raw):
+        FakeASR.n_fitted += 1
+        self.scale = raw.get_data().mean()
+
+    def transform_array(self, data):
+        padded = np.concatenate([np.zeros((data.shape[0], WINDOW - 1)), data], axis=1)
+        cumsum = np.cumsum(padded, axis=1)
+        summed = cumsum[:, WINDOW - 1:] - np.concatenate([np.zeros((data.shape[0], 1)), cumsum[:, :-WINDOW]], axis=1)
+        return summed * self.scale
+
+
+@pytest.fixture
+def fake_transform(monkeypatch):
+    monkeypatch.setattr(asr_cache, '_transform_array', lambda asr, data, info: asr.transform_array(data))
+
+
+def make_raw(seed=0):
+    return FakeRaw(np.random.default_rng(seed).normal(1, 1, (3, 1050)))
+
+
+def test_fit_asr_reuses_cached_fit(tmp_path):
+    FakeASR.n_fitted = 0
+    asr, cached = asr_cache.fit_asr(make_raw(), 15, tmp_path, asr_factory=FakeASR)
+    assert not cached
+    again, cached = asr_cache.fit_asr(make_raw(), 15, tmp_path, asr_factory=FakeASR)
+    assert cached
+    assert again.scale == asr.scale
+    assert FakeASR.n_fitted == 1
+    # other cutoff or changed data fit again
+    assert not asr_cache.fit_asr(make_raw(), 20, tmp_path, asr_factory=FakeASR)[1]
+    assert not asr_cache.fit_asr(make_raw(seed=1), 15, tmp_path, asr_factory=FakeASR)[1]
+    assert FakeASR.n_fitted == 3
+    assert not asr_cache.fit_asr(make_raw(), 15, None, asr_factory=FakeASR)[1]
+    assert len(list(tmp_path.glob('asr_*.pkl'))) == 3
+
+
+def test_transform_chunked_equals_full(fake_transform):
+    raw = make_raw()
+    asr, _ = asr_cache.fit_asr(raw, 15, asr_factory=FakeASR)
+    expected = asr.transform_array(raw.get_data())
+    # chunks of 1 s with 0.1 s overlap, longer than the window of the fake ASR
+    asr_cache.transform_chunked(asr, raw, chunk_duration=1, overlap=0.1)
+    assert np.allclose(raw._data, expected)
+
+
+def test_transform_chunked_memmap(fake_transform, tmp_path):
+    data = np.lib.format.open_memmap(tmp_path / 'data.npy', mode='w+', dtype=np.float64, shape=(3, 1050))
+    data[:] = make_raw()._data
+    raw = FakeRaw(data)
+    asr, _ = asr_cache.fit_asr(raw, 15, asr_factory=FakeASR)
+    expected = asr.transform_array(make_raw()._data)
+    asr_cache.transform_chunked(asr, raw, chunk_duration=2, overlap=0.05)
+    data.flush()
+    assert isinstance(raw._data, np.memmap)
+    assert np.allclose(np.load(tmp_path / 'data.npy'), expected)
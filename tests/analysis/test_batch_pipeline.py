@@ -0,0 +1,111 @@
+import json
+import os
+
+from src.analysis.batch_pipeline import (CACHED, COMPUTED, PipelineConfig, Stage, erp_stages, process_session,
+                                         recording_files, run_batch, run_stages)
+
+RUNS = []
+
+
+def read_source(filename, params):
+    if filename.endswith('.vhdr'):
+        filename = recording_files(filename)[1]
+    with open(filename) as f:
+        return [float(value) * params['scale'] for value in f.read().split()]
+
+
+def add(values, params):
+    return [value + params['offset'] for value in values]
+
+
+def total(values, params):
+    return [sum(values)]
+
+
+def save(values, filename):
+    with open(filename, 'w') as f:
+        json.dump(values, f)
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def counting(function):
+    def run(values, params):
+        RUNS.append(function.__name__)
+        return function(values, params)
+    return run
+
+
+def make_stages(scale=1, offset=0, wrap=lambda function: function):
+    return [Stage('read', {'scale': scale}, wrap(read_source), save, load, '.json'),
+            Stage('add', {'offset': offset}, wrap(add), save, load, '.json'),
+            Stage('total', {}, wrap(total), save, load, '.json')]
+
+
+def make_session(folder, values):
+    os.makedirs(folder / 'eeg')
+    (folder / 'eeg' / f'{folder.name}.vhdr').write_text(f'DataFile={folder.name}.eeg\nMarkerFile={folder.name}.vmrk\n')
+    (folder / 'eeg' / f'{folder.name}.eeg').write_text(' '.join(str(value) for value in values))
+    (folder / 'eeg' / f'{folder.name}.vmrk').write_text('')
+    return folder / 'eeg' / f'{folder.name}.eeg'
+
+
+def test_run_stages_recomputes_only_changed_stages(tmp_path):
+    source = tmp_path / 'data.txt'
+    source.write_text('1 2 3')
+    RUNS.clear()
+    output, status = run_stages(make_stages(wrap=counting), str(source), 'key', tmp_path / 'cache')
+    assert output == [6]
+    assert status == {'read': COMPUTED, 'add': COMPUTED, 'total': COMPUTED}
+    output, status = run_stages(make_stages(wrap=counting), str(source), 'key', tmp_path / 'cache')
+    assert output == [6]
+    assert status == {'total': CACHED}
+    # a changed parameter reruns its stage and the following ones
+    output, status = run_stages(make_stages(wrap=counting, offset=1), str(source), 'key', tmp_path / 'cache')
+    assert output == [9]
+    assert status == {'read': CACHED, 'add': COMPUTED, 'total': COMPUTED}
+    # a changed source reruns everything
+    output, status = run_stages(make_stages(wrap=counting, offset=1), str(source), 'other key', tmp_path / 'cache')
+    assert status == {'read': COMPUTED, 'add': COMPUTED, 'total': COMPUTED}
+    assert RUNS == ['read_source', 'add', 'total', 'add', 'total', 'read_source', 'add', 'total']
+    assert not [name for name in os.listdir(tmp_path / 'cache') if '.tmp' in name]
+
+
+def test_process_session_keys_on_recording(tmp_path):
+    data = make_session(tmp_path / '001_test', [1, 2])
+    assert [os.path.basename(name) for name in recording_files(str(tmp_path / '001_test' / 'eeg' / '001_test.vhdr'))] \
+        == ['001_test.vhdr', '001_test.eeg', '001_test.vmrk']
+    result = process_session(str(tmp_path / '001_test'), None, make_stages())
+    assert result['stages']['read'] == COMPUTED
+    assert load(result['evokeds']) == [3]
+    assert process_session(str(tmp_path / '001_test'), None, make_stages())['stages'] == {'total': CACHED}
+    data.write_text('1 2 4')
+    result = process_session(str(tmp_path / '001_test'), None, make_stages())
+    assert result['stages']['read'] == COMPUTED
+    assert load(result['evokeds']) == [7]
+
+
+def test_run_batch_in_processes(tmp_path):
+    folders = []
+    for i in range(3):
+        make_session(tmp_path / f'00{i}_test', [i, 10])
+        folders.append(str(tmp_path / f'00{i}_test'))
+    folders.append(str(tmp_path / 'missing'))
+    results = run_batch(folders, workers=2, stages=make_stages(scale=2))
+    assert [load(result['evokeds']) for result in results[:3]] == [[20], [22], [24]]
+    assert 'error' in results[3]
+    assert [result['session'] for result in results] == folders
+
+
+def test_erp_stages_follow_config():
+    stages = erp_stages(PipelineConfig(asr_cutoff=20))
+    assert [stage.name for stage in stages] == ['filtered', 'asr', 'epochs', 'evokeds']
+    assert stages[1].params == {'cutoff': 20, 'chunk_duration': 60}
+    assert stages[2].params['paradigm'] == 'syllable_comparison'
+    assert stages[3].params['labels'][:2] == ['SSpec(S)', 'SSpec(D)']
+    # a new version of the trigger codes recomputes the epochs
+    assert erp_stages(PipelineConfig(paradigm='standard_nonstandard'))[2].params['trigger_codes'] \
+        != stages[2].params['trigger_codes']
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from src.analysis.onset_verification import (EventStream, match_following, match_nearest, parse_code,
+                                             read_event_list, read_timing_log, read_vmrk, verify_onsets)
+
+N_TRIALS = 50
+
+
+def make_session(rng, offset=12.5, drift=20e-6, audio_lag=0.004):
+    """Timing log of a session and the triggers and stimtrak pulses the EEG would record"""
+    sound_started = np.cumsum(rng.uniform(0.8, 1.0, N_TRIALS))
+    sent = sound_started + rng.uniform(0.0001, 0.0003, N_TRIALS)
+    recorded = sent * (1 + drift) + offset + rng.normal(0, 0.0002, N_TRIALS)
+    log = {'sound_started': sound_started, 'trigger_started': sent, 'trigger_com_started': sent}
+    return log, recorded, recorded + audio_lag
+
+
+def make_events(triggers, codes, stimtrak=()):
+    onsets = list(triggers) + list(stimtrak)
+    types = ['Stimulus'] * len(triggers) + ['Push'] * len(stimtrak)
+    descriptions = [f'S{code:>3}' for code in codes] + ['P  1'] * len(stimtrak)
+    return EventStream.from_lists(onsets, types, descriptions)
+
+
+def test_parse_code():
+    assert parse_code('S 10') == 10
+    assert parse_code('S  1') == 1
+    assert parse_code('') == -1
+
+
+def test_match_nearest_and_following():
+    targets = np.array([1.0, 2.0, 3.0])
+    assert match_nearest([0.9, 2.2, 5.0], targets, 0.3).tolist() == [0, 1, -1]
+    # the pulse at 2.0 follows the time 1.8, the time 1.0 has none before 1.8
+    assert match_following(np.array([1.0, 1.8, 2.95]), targets[1:], 0.5).tolist() == [-1, 0, 1]
+
+
+def test_verify_onsets_aligns_clocks():
+    rng = np.random.default_rng(1)
+    log, triggers, stimtrak = make_session(rng)
+    codes = rng.integers(10, 50, N_TRIALS)
+    report = verify_onsets(log, make_events(triggers, codes, stimtrak), expected_codes=codes)
+    summary = report.summary()
+    assert summary['n_missing'] == summary['n_late'] == summary['n_wrong_code'] == 0
+    assert report.offset == pytest.approx(12.5, abs=0.001)
+    assert summary['clock_drift_ppm'] == pytest.approx(20, abs=20)
+    assert abs(summary['residual']['median_ms']) < 0.5
+    assert summary['audio_lag']['median_ms'] == pytest.approx(4)
+    assert np.allclose(report.trigger_onsets, triggers)
+
+
+def test_verify_onsets_without_stimtrak():
+    rng = np.random.default_rng(3)
+    log, triggers, _ = make_session(rng)
+    codes = rng.integers(10, 50, N_TRIALS)
+    report = verify_onsets(log, make_events(triggers, codes), expected_codes=codes)
+    assert np.isnan(report.audio_lags).all()
+    assert report.summary()['audio_lag'] == {'n': 0}
+    assert report.summary()['n_missing'] == 0
+
+
+def test_verify_onsets_of_aborted_session():
+    rng = np.random.default_rng(4)
+    log, triggers, stimtrak = make_session(rng)
+    codes = rng.integers(10, 50, N_TRIALS)
+    # the session stopped after 30 trials, the settings still have all of them
+    aborted = {name: values[:30] for name, values in log.items()}
+    codes[40] = 99
+    report = verify_onsets(aborted, make_events(triggers[:30], codes[:30], stimtrak[:30]), expected_codes=codes)
+    assert len(report.codes) == 30
+    assert report.summary()['n_wrong_code'] == 0
+
+
+def test_verify_onsets_flags_missing_late_and_wrong_triggers():
+    rng = np.random.default_rng(2)
+    log, triggers, stimtrak = make_session(rng)
+    codes = rng.integers(10, 50, N_TRIALS)
+    recorded_codes = codes.copy()
+    recorded_codes[7] = 99
+    triggers[20] += 0.03
+    keep = np.ones(N_TRIALS, dtype=bool)
+    keep[[0, 1, 33]] = False
+    # a trigger from before the session and a stimtrak pulse missing
+    events = make_events(np.append(triggers[keep], 5.0), np.append(recorded_codes[keep], 10),
+                         np.delete(stimtrak, 40))
+    report = verify_onsets(log, events, expected_codes=codes)
+    assert np.flatnonzero(report.missing).tolist() == [0, 1, 33]
+    assert np.flatnonzero(report.late).tolist() == [20]
+    assert np.flatnonzero(report.wrong_code).tolist() == [7]
+    assert report.n_unmatched == 1
+    # the pulse of the late trigger came before it
+    assert np.isnan(report.audio_lags[[0, 1, 20, 33, 40]]).all()
+    assert report.summary()['audio_lag']['n'] == N_TRIALS - 5
+
+
+def test_readers(tmp_path):
+    (tmp_path / 'session.vhdr').write_text('[Common Infos]\nSamplingInterval=2000\n')
+    (tmp_path / 'session.vmrk').write_text(
+        'Brain Vision Data Exchange Marker File, Version 1.0\n\n[Marker Infos]\n'
+        '; Each entry: Mk<Marker number>=<Type>,<Description>,<Position in data points>,...\n'
+        'Mk1=New Segment,,1,1,0,20241022101010000000\n'
+        'Mk2=Stimulus,S 10,501,1,0\n'
+        'Mk3=Push,P  1,503,1,0\n')
+    events = read_vmrk(str(tmp_path / 'session.vmrk'))
+    assert events.types.tolist() == ['New Segment', 'Stimulus', 'Push']
+    assert events.onsets.tolist() == [0, 1.0, 1.004]
+    assert events.codes.tolist() == [-1, 10, 1]
+
+    (tmp_path / 'events.csv').write_text('onset,description\n1.5,Stimulus/S 11\n1.0,Push/P  1\n')
+    events = read_event_list(tmp_path / 'events.csv')
+    assert events.types.tolist() == ['Push', 'Stimulus']
+    assert events.codes.tolist() == [1, 11]
+
+    (tmp_path / 'timings.csv').write_text('sound_started,trigger_started,trigger_com_started\n1.0,1.1,\n')
+    log = read_timing_log(tmp_path / 'timings.csv')
+    assert log['sound_started'].tolist() == [1.0]
+    assert np.isnan(log['trigger_com_started'][0])
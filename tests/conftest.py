@@ -0,0 +1,69 @@
+import importlib
+import os
+
+import numpy as np
+import pytest
+
+from src.core.engine import ExperimentSession, SessionConfig
+from src.core.settings_batch import generator_fingerprint, store_filename
+from src.core.settings_store import SettingsStore, build_store
+from src.core.triggers import CPODTriggerDevice, FakeSerialPort, FakeXIDDevice, SerialTriggerDevice
+
+STIMULUS_SAMPLES = 441 # 10 ms at 44.1 kHz
+
+
+class HeadlessSession(ExperimentSession):
+    """Session with fake trigger devices"""
+    def connect_devices(self):
+        self.serial_port = None
+        def open_port(port, baudrate):
+            self.serial_port = FakeSerialPort(port, baudrate)
+            return self.serial_port
+        self.xid_device = FakeXIDDevice()
+        self.trigger_device = SerialTriggerDevice('COM_FAKE', port_factory=open_port)
+        self.cpod_device = CPODTriggerDevice(self.xid_device, pulse_duration=self.config.trigger_duration)
+        self.fake_devices = [self.trigger_device, self.cpod_device]
+
+
+def silent_sound(path):
+    import pygame
+    return pygame.mixer.Sound(buffer=np.zeros((STIMULUS_SAMPLES, 2), dtype=np.int16))
+
+
+@pytest.fixture
+def headless_session(tmp_path, monkeypatch):
+    """Runs sessions of participant 1 in tmp_path with the dummy SDL drivers, silent stimuli,
+    short pauses and fake trigger devices
+
+    Returns:
+        function: run(paradigm_name, n_trials=None, **config) prepares and runs the session and
+            returns it. n_trials keeps only the first trials of the settings, config overrides
+            the SessionConfig.
+    """
+    import pygame
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    monkeypatch.setenv('SDL_AUDIODRIVER', 'dummy')
+
+    def run(paradigm_name, n_trials=None, **config):
+        # the session reads the settings from and writes the logs to the working directory
+        lines = SettingsStore(store_filename(paradigm_name)).to_csv_text(1).splitlines()
+        if n_trials is not None:
+            lines = lines[:n_trials + 1]
+        os.makedirs(tmp_path / 'settings', exist_ok=True)
+        build_store(tmp_path / 'settings' / f'{paradigm_name}.store', {1: '\n'.join(lines) + '\n'},
+                    metadata={'generator_fingerprint': generator_fingerprint(paradigm_name)})
+        monkeypatch.chdir(tmp_path)
+        paradigm = importlib.import_module(f'src.{paradigm_name}.paradigm').PARADIGM
+        config = SessionConfig(**{'participant_id': 1, 'movie_required': False, 'block_intertrial': (50, 60),
+                                  'intertrial_range': [20, 30], 'trigger_duration': 0.005, **config})
+        session = HeadlessSession(paradigm, config, stimulus_loader=silent_sound)
+        try:
+            session.prepare()
+            session.run()
+        finally:
+            session.close_devices()
+            pygame.display.quit()
+            pygame.mixer.quit()
+        session.logs_folder = tmp_path / 'logs' / paradigm_name
+        return session
+    return run
@@ -0,0 +1,23 @@
+import os
+
+import pygame
+import pytest
+
+from src.core.audio import MixerSettings, init_mixer
+
+
+def test_mixer_settings():
+    settings = MixerSettings(frequency=48000, buffer=480)
+    assert settings.format == (48000, -16, 2)
+    assert settings.buffer_latency == pytest.approx(0.01)
+
+
+def test_init_mixer():
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.mixer.quit()
+    try:
+        assert init_mixer(MixerSettings(frequency=22050, channels=1, buffer=256)) == (22050, -16, 1)
+    finally:
+        pygame.mixer.quit()
+        # restore the defaults for the other tests
+        MixerSettings().pre_init()
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.core import block_mixer
+
+
+def test_split_blocks():
+    assert block_mixer.split_blocks([0, 0, 0, 100, 0, 200]) == [[0, 1, 2], [3, 4], [5]]
+
+
+def test_block_offsets():
+    onsets, n_samples = block_mixer.block_offsets([100, 50, 10], [10, 20, 1], 1000)
+    assert onsets == [0, 110, 180]
+    assert n_samples == 191
+
+
+def test_mix_block_places_and_clips():
+    a = np.full((3, 2), 30000, dtype=np.int16)
+    b = np.full((2, 2), 10000, dtype=np.int16)
+    out = block_mixer.mix_block([a, b], [0, 2], 6)
+    assert out.dtype == np.int16
+    assert out[:, 0].tolist() == [30000, 30000, 32767, 10000, 0, 0]
+
+
+@pytest.fixture
+def mixer():
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    yield pygame
+    pygame.mixer.quit()
+
+
+def test_premix_blocks(mixer):
+    frequency = mixer.mixer.get_init()[0]
+    short = mixer.mixer.Sound(buffer=np.ones((441, 2), dtype=np.int16).tobytes())
+    long = mixer.mixer.Sound(buffer=np.full((882, 2), 2, dtype=np.int16).tobytes())
+    sounds = [short, long, short, long]
+    blocks = block_mixer.premix_blocks(sounds, [10, 20, 10, 10], [0, 0, 500, 0])
+    assert [block.trials for block in blocks] == [[0, 1], [2, 3]]
+    first = blocks[0]
+    assert first.onset_samples == [0, 441 + round(10 * frequency / 1000)]
+    assert first.n_samples == first.onset_samples[1] + 882 + round(20 * frequency / 1000)
+    assert first.buffer[first.onset_samples[1], 0] == 2
+    assert first.buffer[first.onset_samples[1] - 1, 0] == 0
+    assert first.make_sound().get_length() == pytest.approx(first.duration)
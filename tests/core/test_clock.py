@@ -0,0 +1,24 @@
+import json
+import time
+from datetime import timedelta
+from src.core.clock import ExperimentClock
+
+
+def test_clock_is_monotonic_and_starts_at_zero():
+    clock = ExperimentClock()
+    times = [clock.now() for _ in range(1000)]
+    assert times[0] >= 0
+    assert all(later >= earlier for earlier, later in zip(times, times[1:]))
+    time.sleep(0.01)
+    assert clock.elapsed_ms(times[-1]) >= 10
+
+
+def test_wall_anchor(tmp_path):
+    clock = ExperimentClock()
+    assert clock.to_wall_time(1.5) == clock.wall_anchor + timedelta(seconds=1.5)
+    filename = tmp_path / 'clock.json'
+    clock.save_anchor(filename)
+    with open(filename) as f:
+        anchor = json.load(f)
+    assert anchor['wall_clock_anchor'] == clock.wall_anchor.isoformat()
+    assert anchor['perf_counter_ns_epoch'] == clock.epoch_ns
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from src.core.deviant_pool import DeviantOrderPool, DeviantPoolExhausted
+
+
+def test_draws_every_order_once_per_cycle():
+    pool = DeviantOrderPool([2, 3, 4, 5])
+    rand = random.Random(1)
+    orders = [tuple(pool.draw('a', rand)) for _ in range(24)]
+    assert len(set(orders)) == 24
+    assert pool.n_used('a') == 24
+    assert pool.n_used('b') == 0
+    # the next draw starts a new cycle
+    pool.draw('a', rand)
+    assert pool.cycles['a'] == 1
+    assert pool.n_used('a') == 1
+
+
+def test_exhaustion_without_cycle():
+    pool = DeviantOrderPool([1, 2], cycle=False)
+    rand = random.Random(1)
+    assert sorted([pool.draw('a', rand), pool.draw('a', rand)]) == [[1, 2], [2, 1]]
+    with pytest.raises(DeviantPoolExhausted):
+        pool.draw('a', rand)
+
+
+def test_same_orders_as_string_pool():
+    # the original check of the used orders as a list of strings
+    def legacy_draw(used, rand):
+        pauses = [2, 3, 4, 5]
+        for i in range(100):
+            pauses = rand.sample(pauses, len(pauses))
+            if str(pauses) not in used:
+                break
+        used.append(str(pauses))
+        return pauses
+
+    pool = DeviantOrderPool([2, 3, 4, 5])
+    used = []
+    for seed in range(10):
+        assert pool.draw('a', random.Random(seed)) == legacy_draw(used, random.Random(seed))
+
+
+def test_clear():
+    pool = DeviantOrderPool([2, 3, 4, 5])
+    order = pool.draw('a', random.Random(1))
+    assert pool.is_used('a', order)
+    pool.clear()
+    assert not pool.is_used('a', order)
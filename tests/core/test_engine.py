@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.core import engine
+
+N_TRIALS = 30
+
+
+def test_block_pauses_on_block_change():
+    df_stimuli = pd.DataFrame({'set_number': [1, 1, 1, 1, 2, 2],
+                               'block_number': [1, 1, 2, 3, 1, 2]})
+    # one block intertrial per pause, the first block has none
+    block_intertrials = [100, 200, 300, 400]
+    assert engine.block_pauses_on_block_change(df_stimuli, block_intertrials) == [0, 0, 100, 200, 300, 400]
+
+
+def test_block_pauses_on_setblock_change():
+    df_stimuli = pd.DataFrame({'set_number': [1, 1, 1, 2, 2],
+                               'block_number': [1, 2, 2, 1, 2]})
+    assert engine.block_pauses_on_setblock_change(df_stimuli, [100, 200, 300]) == [0, 100, 0, 0, 200]
+
+
+def read_csv(filename):
+    with open(filename, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize('premix_blocks', [False, True])
+def test_headless_session(premix_blocks, headless_session):
+    # the first block and the start of the second one of participant 1
+    session = headless_session('neuro3_syllables', n_trials=N_TRIALS, trigger_duration=0.002,
+                               premix_blocks=premix_blocks)
+    assert session.trigger_device is None and session.cpod_device is None
+    assert session.serial_port.closed
+
+    prefix = str(next(session.logs_folder.glob('*_timings.csv')))[:-len('_timings.csv')]
+    rows = read_csv(f'{prefix}_timings.csv')
+    assert len(rows) == N_TRIALS
+    assert all(row['sound_started'] != '' for row in rows)
+    triggers = [int(trigger) for trigger in session.trials['trigger']]
+    assert [value for _, value in session.serial_port.written if value != 0] == triggers
+    assert [row['trigger'] for row in read_csv(f'{prefix}_settings.csv')] == [str(trigger) for trigger in triggers]
+
+    schedule = read_csv(f'{prefix}_schedule.csv')
+    assert len(schedule) == N_TRIALS
+    # one pause at the start of the second block
+    assert [iTrial for iTrial, row in enumerate(schedule) if float(row['block_pause']) > 0] == [25]
+    assert float(schedule[-1]['end']) == pytest.approx(session.schedule.duration)
+    with open(f'{prefix}_trigger_codes.json') as f:
+        assert json.load(f)['paradigm'] == 'neuro3_syllables'
+    assert os.path.exists(f'{prefix}_clock.json')
@@ -0,0 +1,69 @@
+import csv
+import dataclasses
+import importlib
+
+import pytest
+
+from src.core.clock import ExperimentClock
+from src.core.engine import SessionConfig, count_blocks
+from src.core.schedule import SessionSchedule
+from src.core.scheduler import TrialScheduler
+from src.core.settings_batch import store_filename
+from src.core.settings_store import SettingsStore, TrialTable
+
+
+def test_schedule_rows_and_duration():
+    schedule = SessionSchedule.build([0.5, 0.5, 0.25], [500, 600, 700], [0, 15000, 0], participant_id=3, seed=111)
+    assert schedule.onsets == (0, 16, 17.1)
+    assert schedule[1].onset == 16
+    assert schedule[1].block_pause == 15000
+    assert schedule.duration == 18.05
+    summary = schedule.summary()
+    assert summary['n_pauses'] == 1
+    assert summary['duration'] == pytest.approx(summary['stimuli'] + summary['intertrials'] + summary['pauses'])
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        schedule.onsets = ()
+
+
+def test_schedule_checks_lengths():
+    with pytest.raises(ValueError):
+        SessionSchedule.build([0.5, 0.5], [500], [0, 0])
+
+
+def test_schedule_to_csv(tmp_path):
+    schedule = SessionSchedule.build([0.5, 0.25], [500, 600], [1000, 0])
+    filename = tmp_path / 'schedule.csv'
+    schedule.to_csv(filename)
+    with open(filename) as f:
+        rows = list(csv.DictReader(f))
+    assert [float(row['onset']) for row in rows] == [1.0, 2.0]
+    assert float(rows[-1]['end']) == pytest.approx(schedule.duration)
+
+
+def test_scheduler_follows_the_schedule():
+    schedule = SessionSchedule.build([0.5, 0.5, 0.25], [500, 600, 700], [0, 15000, 0])
+    scheduler = TrialScheduler.from_schedule(ExperimentClock(), schedule)
+    scheduler.start_time = 10
+    assert scheduler.schedule is schedule
+    assert scheduler.planned_onset(2) == 27.1
+    assert scheduler.duration == schedule.duration
+    assert scheduler.planned_end(2) == pytest.approx(10 + schedule.duration)
+
+
+@pytest.mark.parametrize('paradigm', ['neuro3_syllables', 'syllable_comparison'])
+def test_equal_length_across_participants(paradigm):
+    PARADIGM = importlib.import_module(f'src.{paradigm}.paradigm').PARADIGM
+    store = SettingsStore(store_filename(paradigm))
+    durations = []
+    for participant_id in [1, 2, 3]:
+        trials = TrialTable.from_csv_text(store.to_csv_text(participant_id))
+        config = SessionConfig(participant_id)
+        block_intertrials, intertrials = PARADIGM.intertrial_policy(config, len(trials), count_blocks(trials))
+        block_pauses = PARADIGM.block_pauses(trials, block_intertrials)
+        assert sum(pause > 0 for pause in block_pauses) == len(block_intertrials)
+        schedule = SessionSchedule.build([0.3] * len(trials), intertrials, block_pauses,
+                                         participant_id=participant_id, seed=config.random_seed)
+        again = PARADIGM.intertrial_policy(config, len(trials), count_blocks(trials))
+        assert list(again[0]) == list(block_intertrials) and list(again[1]) == list(intertrials)
+        durations.append(schedule.duration)
+    assert len(set(durations)) == 1
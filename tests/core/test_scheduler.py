@@ -0,0 +1,29 @@
+import time
+from src.core.clock import ExperimentClock
+from src.core.scheduler import TrialScheduler
+
+
+def test_planned_onsets():
+    scheduler = TrialScheduler(ExperimentClock(), [0.5, 0.5, 0.25], [500, 600, 700], [0, 15000, 0])
+    scheduler.start_time = 10
+    assert scheduler.planned_onset(0) == 10
+    assert scheduler.planned_end(0) == 11
+    assert scheduler.planned_onset(1) == 26
+    assert scheduler.planned_onset(2) == 27.1
+    assert scheduler.duration == 18.05
+
+
+def test_delays_do_not_accumulate():
+    clock = ExperimentClock()
+    n_trials = 20
+    scheduler = TrialScheduler(clock, [0.005] * n_trials, [5] * n_trials, [0] * n_trials, spin_margin=0.002)
+    scheduler.start(lead=0.01)
+    onsets = []
+    for iTrial in range(n_trials):
+        onsets.append(scheduler.wait_for_onset(iTrial))
+        # overhead of the trial which would otherwise add up
+        time.sleep(0.002)
+        scheduler.wait_for_end(iTrial)
+    errors = [onset - scheduler.planned_onset(i) for i, onset in enumerate(onsets)]
+    assert all(error >= 0 for error in errors)
+    assert errors[-1] < 0.005
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from src.core import settings_batch
+from src.core.settings_store import SettingsStore
+
+
+def read_all(folder):
+    out = {}
+    for filename in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, filename)) as f:
+            out[filename] = f.read()
+    return out
+
+
+def test_split_participants():
+    chunks = settings_batch.split_participants(list(range(1, 11)), 3)
+    assert chunks == [[1, 2, 3, 4], [5, 6, 7], [8, 9, 10]]
+    assert settings_batch.split_participants([1, 2], 8) == [[1], [2]]
+
+
+@pytest.mark.parametrize('paradigm', list(settings_batch.GENERATORS))
+def test_parallel_equals_sequential(paradigm, tmp_path):
+    participants = range(1, 7)
+    settings_batch.generate_settings(paradigm, participants, folder=tmp_path / 'sequential', workers=1)
+    settings_batch.generate_settings(paradigm, participants, folder=tmp_path / 'parallel', workers=3)
+    sequential = read_all(tmp_path / 'sequential')
+    assert len(sequential) == 6
+    assert sequential == read_all(tmp_path / 'parallel')
+    # same as the committed settings
+    store = SettingsStore(settings_batch.store_filename(paradigm))
+    for participant_id in participants:
+        assert sequential[f'settings{participant_id}.csv'] == store.to_csv_text(participant_id)
+
+
+def test_generate_store(tmp_path):
+    n = settings_batch.generate_store('standard_nonstandard', range(1, 5), filename=tmp_path / 'settings.store', workers=2)
+    assert n == 4
+    store = SettingsStore(tmp_path / 'settings.store')
+    committed = SettingsStore(settings_batch.store_filename('standard_nonstandard'))
+    assert sorted(store.participants) == [1, 2, 3, 4]
+    assert store.to_csv_text(3) == committed.to_csv_text(3)
+
+
+def test_unknown_paradigm():
+    with pytest.raises(ValueError):
+        settings_batch.get_generator('oddball')
+
+
+def test_fingerprint_follows_imports(monkeypatch):
+    fingerprint = settings_batch.generator_fingerprint('neuro3_syllables')
+    module_source = settings_batch._module_source
+    # imported through src.neuro3_syllables.trigger_codes, not by the generator itself
+    monkeypatch.setattr(settings_batch, '_module_source',
+                        lambda name: module_source(name) + ('\n# changed' if name == 'src.core.trigger_codes' else ''))
+    assert settings_batch.generator_fingerprint('neuro3_syllables') != fingerprint
@@ -0,0 +1,47 @@
+import os
+import shutil
+
+from src.core.settings_batch import generate_store
+from src.core.settings_resolver import SettingsResolver
+from src.core.settings_store import SettingsStore, build_store
+
+
+def test_generates_and_caches(tmp_path):
+    resolver = SettingsResolver('standard_nonstandard', settings_folder=tmp_path)
+    first = resolver.resolve(3)
+    assert first.source == resolver.cache_filename(3)
+    assert os.path.exists(first.source)
+    second = SettingsResolver('standard_nonstandard', settings_folder=tmp_path).resolve(3)
+    assert second.source == first.source
+    assert second.csv_text == first.csv_text
+    committed = SettingsStore('settings/standard_nonstandard.store')
+    assert first.csv_text == committed.to_csv_text(3)
+    assert len(first.load()) == 64
+
+
+def test_uses_matching_store(tmp_path):
+    generate_store('standard_nonstandard', [1, 2], filename=tmp_path / 'standard_nonstandard.store')
+    resolver = SettingsResolver('standard_nonstandard', settings_folder=tmp_path)
+    settings = resolver.resolve(2)
+    assert settings.store is not None
+    assert settings.load().shape == (64, 9)
+    # participants missing in the store are generated
+    assert resolver.resolve(5).store is None
+    assert os.path.exists(resolver.cache_filename(5))
+
+
+def test_stale_store_is_not_used(tmp_path):
+    shutil.copy('settings/standard_nonstandard.store', tmp_path / 'standard_nonstandard.store')
+    store = SettingsStore(tmp_path / 'standard_nonstandard.store')
+    tables = {1: store.to_csv_text(1).replace('37_st_4.wav', 'changed.wav')}
+    build_store(tmp_path / 'standard_nonstandard.store', tables, metadata={'generator_fingerprint': 'old'})
+    settings = SettingsResolver('standard_nonstandard', settings_folder=tmp_path).resolve(1)
+    assert settings.store is None
+    assert 'changed.wav' not in settings.csv_text
+
+
+def test_key_depends_on_participant():
+    resolver = SettingsResolver('neuro3_syllables')
+    assert resolver.key(1) != resolver.key(2)
+    assert resolver.key(1) == SettingsResolver('neuro3_syllables').key(1)
+    assert resolver.key(1) != SettingsResolver('syllable_comparison').key(1)
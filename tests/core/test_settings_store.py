@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from src.core import settings_store
+from src.core.settings_store import SettingsStore
+from src.standard_nonstandard import settings_generation as standard_nonstandard
+from src.syllable_comparison import settings_generation as syllable_comparison
+
+
+def syllable_tables(participant_ids):
+    tables = {}
+    for participant_id in participant_ids:
+        syllable_comparison.restart()
+        tables[participant_id] = syllable_comparison.create_experiment_trials(participant_id).to_csv()
+    return tables
+
+
+def test_roundtrip(tmp_path):
+    tables = syllable_tables([3, 1, 2])
+    settings_store.build_store(tmp_path / 'test.store', tables)
+    store = SettingsStore(tmp_path / 'test.store')
+    assert len(store) == 3
+    assert 2 in store and 4 not in store
+    for participant_id, text in tables.items():
+        assert store.to_csv_text(participant_id) == text
+    types = {column['name']: column for column in store.columns}
+    assert types['trial_type']['kind'] == 'category'
+    assert types['trial']['dtype'] == 'u2'
+    assert types['trigger']['dtype'] == 'u1'
+
+
+def test_load_same_as_read_csv(tmp_path):
+    tables = {5: standard_nonstandard.create_experiment_trials(5).to_csv()}
+    settings_store.build_store(tmp_path / 'test.store', tables)
+    store = SettingsStore(tmp_path / 'test.store')
+    (tmp_path / 'settings5.csv').write_text(tables[5])
+    pd.testing.assert_frame_equal(store.load(5), pd.read_csv(tmp_path / 'settings5.csv'))
+    store.export_csv(5, tmp_path / 'exported.csv')
+    assert (tmp_path / 'exported.csv').read_text() == tables[5]
+
+
+def test_missing_participant(tmp_path):
+    settings_store.build_store(tmp_path / 'test.store', syllable_tables([1]))
+    with pytest.raises(KeyError):
+        SettingsStore(tmp_path / 'test.store').read_columns(2)
+
+
+def test_committed_stores():
+    store = SettingsStore('settings/syllable_comparison.store')
+    assert len(store) == 399
+    assert store.to_csv_text(42) == syllable_tables([42])[42]
+
+
+def test_trial_table_same_as_dataframe(tmp_path):
+    tables = syllable_tables([4])
+    settings_store.build_store(tmp_path / 'test.store', tables)
+    from_store = SettingsStore(tmp_path / 'test.store').load_table(4)
+    from_csv = settings_store.TrialTable.from_csv_text(tables[4])
+    (tmp_path / 'settings4.csv').write_text(tables[4])
+    df = pd.read_csv(tmp_path / 'settings4.csv')
+    for table in [from_store, from_csv]:
+        assert len(table) == len(df)
+        assert list(table.columns) == list(df.columns)
+        assert table.row(7) == df.iloc[7].to_dict()
+        pd.testing.assert_frame_equal(table.to_dataframe(), df)
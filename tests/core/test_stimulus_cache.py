@@ -0,0 +1,50 @@
+from src.core.stimulus_cache import StimulusCache
+
+
+class FakeSound:
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def get_raw(self):
+        return bytes(self.size)
+
+
+def fake_loader(loaded, size=100):
+    def loader(path):
+        loaded.append(path)
+        return FakeSound(path, size)
+    return loader
+
+
+def test_preload_loads_each_path_once():
+    loaded = []
+    cache = StimulusCache(loader=fake_loader(loaded))
+    cache.preload(['a.wav', 'b.wav', 'a.wav', 'c.wav', 'b.wav'])
+    assert loaded == ['a.wav', 'b.wav', 'c.wav']
+    assert cache.get('a.wav').path == 'a.wav'
+    assert loaded == ['a.wav', 'b.wav', 'c.wav']
+    report = cache.report()
+    assert report['n_sounds'] == 3
+    assert report['memory_bytes'] == 300
+    assert report['hits'] == 1
+
+
+def test_lru_eviction():
+    loaded = []
+    cache = StimulusCache(loader=fake_loader(loaded), max_bytes=250)
+    cache.preload(['a.wav', 'b.wav'])
+    cache.get('a.wav')
+    cache.get('c.wav')
+    # b was the least recently used
+    assert 'b.wav' not in cache
+    assert 'a.wav' in cache and 'c.wav' in cache
+    assert cache.memory_usage == 200
+    assert cache.evictions == 1
+
+
+def test_limit_smaller_than_a_single_sound():
+    cache = StimulusCache(loader=fake_loader([], size=500), max_bytes=100)
+    sound = cache.get('a.wav')
+    assert sound.path == 'a.wav'
+    assert len(cache) == 1
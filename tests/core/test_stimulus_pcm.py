@@ -0,0 +1,81 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from src.core import stimulus_pcm
+from src.core.stimulus_pcm import PcmStimuli
+
+
+def write_wav(path, n_frames, frequency=22050, amplitude=10000):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(frequency)
+        f.writeframes((np.sin(np.arange(n_frames) / 5) * amplitude).astype('<i2').tobytes())
+
+
+@pytest.fixture
+def mixer():
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    yield pygame
+    pygame.mixer.quit()
+
+
+def test_format_key():
+    assert stimulus_pcm.format_key((44100, -16, 2)) == '44100Hz_s16_2ch'
+
+
+def test_convert_and_load(mixer, tmp_path):
+    write_wav(tmp_path / 'a.wav', 2205)
+    write_wav(tmp_path / 'b.wav', 4410)
+    manifest = stimulus_pcm.convert_stimuli(tmp_path)
+    assert sorted(manifest['stimuli']) == ['a.wav', 'b.wav']
+    assert manifest['stimuli']['a.wav']['samples'] == 4410
+    assert manifest['stimuli']['b.wav']['duration'] == pytest.approx(0.2)
+
+    pcm = PcmStimuli.open(tmp_path, mixer.mixer.get_init())
+    path = str(tmp_path / 'a.wav')
+    sound = pcm.load_sound(path)
+    decoded = mixer.sndarray.array(mixer.mixer.Sound(path))
+    assert np.array_equal(mixer.sndarray.array(sound), decoded)
+    assert pcm.duration(path) == pytest.approx(sound.get_length())
+    assert pcm.fallbacks == []
+    assert PcmStimuli.open(tmp_path, (48000, -16, 2)) is None
+
+
+def test_changed_wav_is_decoded(mixer, tmp_path):
+    write_wav(tmp_path / 'a.wav', 2205)
+    stimulus_pcm.convert_stimuli(tmp_path)
+    write_wav(tmp_path / 'a.wav', 2205, amplitude=5000)
+    pcm = PcmStimuli.open(tmp_path, mixer.mixer.get_init())
+    pcm.load_sound(str(tmp_path / 'a.wav'))
+    assert pcm.fallbacks == [str(tmp_path / 'a.wav')]
+    # converting again updates the changed stimulus
+    stimulus_pcm.convert_stimuli(tmp_path)
+    pcm = PcmStimuli.open(tmp_path, mixer.mixer.get_init())
+    pcm.load_sound(str(tmp_path / 'a.wav'))
+    assert pcm.fallbacks == []
+
+
+def test_unchanged_wavs_are_not_read(mixer, tmp_path, monkeypatch):
+    write_wav(tmp_path / 'a.wav', 2205)
+    write_wav(tmp_path / 'b.wav', 2205)
+    stimulus_pcm.convert_stimuli(tmp_path)
+    os.utime(tmp_path / 'b.wav', ns=(0, 0))
+    hashed = []
+    file_sha256 = stimulus_pcm.file_sha256
+    monkeypatch.setattr(stimulus_pcm, 'file_sha256', lambda path: hashed.append(path) or file_sha256(path))
+    pcm = PcmStimuli.open(tmp_path, mixer.mixer.get_init())
+    for name in ['a.wav', 'b.wav']:
+        pcm.load_sound(str(tmp_path / name))
+    # only the WAV with another modification time is hashed, its content is the same
+    assert hashed == [str(tmp_path / 'b.wav')]
+    assert pcm.fallbacks == []
+    # the full check hashes all of them
+    pcm = PcmStimuli.open(tmp_path, mixer.mixer.get_init(), verify_hashes=True)
+    pcm.duration(str(tmp_path / 'a.wav'))
+    assert hashed[-1] == str(tmp_path / 'a.wav')
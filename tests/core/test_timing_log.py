@@ -0,0 +1,44 @@
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+import src.core.experimental_flow as flow
+from src.core.timing_log import TimingLogWriter
+
+
+def test_rows_reach_the_file_before_closing(tmp_path):
+    columns = flow.log_columns(add_fNIRS=True)
+    filename = tmp_path / 'timings.csv'
+    sidecar = tmp_path / 'timings.bin'
+    writer = TimingLogWriter(filename, columns, sidecar_filename=sidecar)
+    writer.write({'trial_start': 0.5, 'sound_started': 0.625, 'sound_duration': 0.25})
+    writer.write({'trial_start': 1.5, 'trigger_cpod_started': 1.75})
+    writer.flush()
+    df_timings = pd.read_csv(filename)
+    assert list(df_timings.columns) == list(flow.prepare_log_table(add_fNIRS=True).columns)
+    assert df_timings['trial_start'].tolist() == [0.5, 1.5]
+    assert df_timings['sound_started'].isna().tolist() == [False, True]
+    writer.close()
+
+    records = np.fromfile(sidecar, dtype='<f8').reshape(-1, len(columns))
+    assert records.shape == (2, len(columns))
+    assert records[1, columns.index('trigger_cpod_started')] == 1.75
+    assert np.isnan(records[1, columns.index('sound_started')])
+
+
+def test_failed_row_is_raised_and_does_not_block(tmp_path):
+    columns = flow.log_columns()
+    writer = TimingLogWriter(tmp_path / 'timings.csv', columns, sidecar_filename=tmp_path / 'timings.bin')
+    writer.write({'trial_start': 0.5})
+    # not a float, the sidecar cannot pack it
+    writer.write({'trial_start': 'late'})
+    writer.write({'trial_start': 1.5})
+    with pytest.raises(struct.error):
+        writer.flush()
+    # the rows after the error are still written
+    writer.write({'trial_start': 2.5})
+    writer.close()
+    assert writer.n_rows == 3
+    records = np.fromfile(tmp_path / 'timings.bin', dtype='<f8').reshape(-1, len(columns))
+    assert records[:, columns.index('trial_start')].tolist() == [0.5, 1.5, 2.5]
@@ -0,0 +1,44 @@
+import pytest
+
+from src.core.settings_store import TrialTable
+from src.core.stimulus_cache import StimulusCache
+from src.core.trial_records import TrialRecord, build_trial_records
+
+
+class FakeSound:
+    def __init__(self, path):
+        self.path = path
+
+    def get_raw(self):
+        return bytes(100)
+
+
+def make_trials():
+    return TrialTable({'trial': [1, 2, 3], 'trigger': ['10', '11', '10'], 'stimulus': ['a.wav', 'b.wav', 'a.wav']})
+
+
+def test_build_trial_records():
+    cache = StimulusCache(loader=FakeSound).preload(['a.wav', 'b.wav'])
+    records = build_trial_records(make_trials(), ['a.wav', 'b.wav', 'a.wav'], [0.1, 0.2, 0.1], [500, 600, 700],
+                                  [0, 0, 15000], cache)
+    assert [record.index for record in records] == [0, 1, 2]
+    assert [record.trigger for record in records] == [10, 11, 10]
+    assert records[1].sound.path == 'b.wav'
+    assert records[0].sound is records[2].sound
+    assert records[2].intertrial == 700 and records[2].block_pause == 15000
+    assert records[1].info == {'trial': 2, 'trigger': '11', 'stimulus': 'b.wav'}
+    # no cache lookups are left for the trials
+    assert cache.report()['misses'] == 2
+
+
+def test_sounds_stay_in_limited_cache():
+    cache = StimulusCache(loader=FakeSound, max_bytes=100)
+    records = build_trial_records(make_trials(), ['a.wav', 'b.wav', 'a.wav'], [0.1] * 3, [500] * 3, [0] * 3, cache)
+    assert all(record.sound is None for record in records)
+    assert len(cache) == 0
+
+
+def test_records_have_no_dict():
+    record = TrialRecord(0, {}, 10, 'a.wav', None, 0.1, 500, 0)
+    with pytest.raises(AttributeError):
+        record.other = 1
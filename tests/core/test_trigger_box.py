@@ -0,0 +1,73 @@
+import csv
+import os
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='the virtual trigger box needs a pseudo-terminal')
+serial = pytest.importorskip('serial')
+
+from src.connections import sendTrigger
+from src.core.trigger_box import VirtualTriggerBox
+from src.core.triggers import SerialTriggerDevice
+
+
+def test_box_timestamps_and_echoes_bytes():
+    with VirtualTriggerBox() as box:
+        port = serial.Serial(box.port_name, baudrate=2000000, timeout=1)
+        sent = time.perf_counter_ns()
+        port.write([7])
+        port.write([0])
+        assert port.read(2) == bytes([7, 0])
+        port.close()
+        assert box.codes() == [7, 0]
+        assert box.received[0][0] >= sent
+        assert box.received[1][0] >= box.received[0][0]
+
+
+def test_legacy_send_trigger_reaches_box(capsys):
+    with VirtualTriggerBox() as box:
+        sendTrigger(5, box.port_name, 0.01)
+        assert box.wait_for(2)
+        code, _, width = box.pulses()[0]
+    assert code == 5
+    assert width >= 0.01 * 1e9
+    # the read thread printed the echo
+    assert '0x5' in capsys.readouterr().out
+
+
+def test_serial_trigger_device_pulses(tmp_path):
+    with VirtualTriggerBox(echo=False) as box:
+        with SerialTriggerDevice(box.port_name, port_factory=serial.Serial) as device:
+            for code in [1, 20, 255]:
+                device.fire(code, 0.002)
+            device.wait()
+        assert box.wait_for(6)
+        pulses = box.pulses()
+        box.export(tmp_path / 'codes.csv')
+    assert [code for code, _, _ in pulses] == [1, 20, 255]
+    assert all(width >= 0.002 * 1e9 for _, _, width in pulses)
+    with open(tmp_path / 'codes.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row['code']) for row in rows] == [1, 0, 20, 0, 255, 0]
+
+
+def test_serial_trigger_device_discards_echoes():
+    with VirtualTriggerBox() as box:
+        with SerialTriggerDevice(box.port_name, port_factory=serial.Serial) as device:
+            for code in range(1, 21):
+                device.fire(code, 0.002)
+            device.wait()
+            assert box.wait_for(40)
+            # without discarding, the echoes of all 40 bytes would be waiting
+            assert device.port.in_waiting <= 1
+
+
+def test_pulse_without_reset():
+    with VirtualTriggerBox() as box:
+        port = serial.Serial(box.port_name)
+        port.write([3])
+        assert box.wait_for(1)
+        port.close()
+        assert box.pulses()[0][2] is None
+        assert not box.wait_for(2, timeout=0.01)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from src.core.settings_batch import GENERATORS, store_filename
+from src.core.settings_store import SettingsStore, TrialTable
+from src.core.trigger_codes import TriggerCode, TriggerCodeMap, load_trigger_codes
+
+
+def notebook_update_trigger(trigger):
+    # update_trigger of the TFA notebook, 1 SiS, 2 SiM, 3 DiD, 4 DiM
+    if trigger[0] == "1":
+        return "1"
+    if trigger[0] == "3":
+        return "3"
+    if trigger in ["21", "23", "42", "44"]:
+        return "2"
+    if trigger in ["41", "43", "22", "24"]:
+        return "4"
+
+
+def test_standard_nonstandard_codes_match_notebook():
+    trigger_codes = load_trigger_codes('standard_nonstandard')
+    names = {'1': 'SiS', '2': 'SiM', '3': 'DiD', '4': 'DiM'}
+    for code in trigger_codes.codes:
+        assert code.label == names[notebook_update_trigger(str(code.code))]
+    assert trigger_codes.code(2, 3) == 23
+
+
+def test_syllable_codes():
+    trigger_codes = load_trigger_codes('syllable_comparison')
+    assert trigger_codes.code('nonlanguage_duration', 'deviant') == 41
+    assert trigger_codes[41].label == 'NSDur(D)'
+    assert trigger_codes.event_id()['Stimulus/S 10'] == 10
+    assert trigger_codes.epochs_event_id()['SSpec(D)/11'] == 11
+    codes = np.array([10, 11, 41, 99, 300, -1])
+    assert trigger_codes.deviants(codes).tolist() == [False, True, True, False, False, False]
+    assert trigger_codes.condition_indices(codes).tolist() == [0, 0, 3, -1, -1, -1]
+    assert [trigger_codes.labels[i] for i in trigger_codes.label_indices(codes[:3])] == ['SSpec(S)', 'SSpec(D)', 'NSDur(D)']
+    with pytest.raises(KeyError):
+        trigger_codes[99]
+
+
+@pytest.mark.parametrize('paradigm', list(GENERATORS))
+def test_settings_use_trigger_codes(paradigm):
+    trigger_codes = load_trigger_codes(paradigm)
+    store = SettingsStore(store_filename(paradigm))
+    trials = TrialTable.from_csv_text(store.to_csv_text(1))
+    assert trigger_codes.known(trials['trigger']).all()
+    assert set(trials['trigger']) == {code.code for code in trigger_codes.codes}
+
+
+def test_invalid_maps():
+    with pytest.raises(ValueError):
+        TriggerCodeMap('test', 1, [TriggerCode(1, ('a',), 'A', 'A'), TriggerCode(1, ('b',), 'B', 'B')])
+    with pytest.raises(ValueError):
+        TriggerCodeMap('test', 1, [TriggerCode(256, ('a',), 'A', 'A')])
+
+
+def test_fingerprint_changes_with_version(tmp_path):
+    codes = [TriggerCode(1, ('a',), 'A', 'A')]
+    first = TriggerCodeMap('test', 1, codes)
+    assert first.fingerprint == TriggerCodeMap('test', 1, codes).fingerprint
+    assert first.fingerprint != TriggerCodeMap('test', 2, codes).fingerprint
+    first.write_json(tmp_path / 'codes.json')
+    assert '"version": 1' in (tmp_path / 'codes.json').read_text()
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from src.core.triggers import SerialTriggerDevice, CPODTriggerDevice, FakeXIDDevice, TriggerWorker, cpod_line_table
+
+
+class FakeSerial:
+    def __init__(self, port, baudrate):
+        self.port = port
+        self.baudrate = baudrate
+        self.written = []
+        self.resets = 0
+        self.closed = False
+
+    def write(self, data):
+        self.written.extend(data)
+
+    def reset_input_buffer(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_serial_trigger_device_opens_port_once():
+    opened = []
+    def factory(port, baudrate):
+        opened.append(FakeSerial(port, baudrate))
+        return opened[-1]
+
+    with SerialTriggerDevice('COM3', port_factory=factory) as device:
+        for code in [10, 11, 20]:
+            device.fire(code, 0.001)
+        device.wait()
+        report = device.report()
+    assert len(opened) == 1
+    assert opened[0].baudrate == 2000000
+    assert opened[0].written == [10, 0, 11, 0, 20, 0]
+    # the echo of every pulse is discarded
+    assert opened[0].resets == 3
+    assert opened[0].closed
+    assert report['queue_latency']['n'] == 3
+    assert report['write_latency']['n'] == 3
+
+
+def test_failed_trigger_is_raised_and_does_not_block():
+    class FailingSerial(FakeSerial):
+        def write(self, data):
+            if data == bytes([11]):
+                raise OSError('port disconnected')
+            super().write(data)
+
+    port = FailingSerial('COM3', 2000000)
+    device = SerialTriggerDevice('COM3', port_factory=lambda name, baudrate: port)
+    for code in [10, 11, 20]:
+        device.fire(code, 0.001)
+    with pytest.raises(OSError):
+        device.wait()
+    # the worker keeps sending after the error
+    assert port.written == [10, 0, 20, 0]
+    device.wait()
+    device.close()
+    assert port.closed
+
+
+def test_error_is_raised_by_close():
+    class FailingDevice(TriggerWorker):
+        def _send(self, code, duration):
+            raise OSError('port disconnected')
+
+    device = FailingDevice()
+    device.fire(10, 0.001)
+    with pytest.raises(OSError):
+        device.close()
+
+
+def test_wait_timeout():
+    release = threading.Event()
+
+    class BlockedDevice(TriggerWorker):
+        def _send(self, code, duration):
+            release.wait()
+            return 0
+
+    device = BlockedDevice()
+    device.fire(10, 0.001)
+    with pytest.raises(TimeoutError):
+        device.wait(timeout=0.05)
+    release.set()
+    device.wait()
+    device.close()
+
+
+def test_cpod_line_table():
+    lines = cpod_line_table()
+    assert len(lines) == 256
+    assert lines[0] == []
+    assert lines[5] == [1, 3]
+    assert lines[10] == [2, 4]
+    assert lines[255] == [1, 2, 3, 4, 5, 6, 7, 8]
+
+
+def test_cpod_device_hardware_pulse():
+    xid = FakeXIDDevice()
+    with CPODTriggerDevice(xid, pulse_duration=0.1) as device:
+        device.fire(21, 0.1)
+        device.wait()
+    assert [call[1:] for call in xid.calls] == [('set_pulse_duration', 100), ('activate_line', [1, 3, 5])]
+
+
+def test_cpod_device_scheduled_clear():
+    xid = FakeXIDDevice()
+    with CPODTriggerDevice(xid) as device:
+        device.fire(3, 0.01)
+        device.wait()
+    assert [call[1:] for call in xid.calls] == [('activate_line', [1, 2]), ('clear_all_lines', None)]
+    assert xid.calls[1][0] - xid.calls[0][0] >= 10_000_000
@@ -13,4 +13,12 @@ def test_block_intertrial_generation():
 
 def test_intertrial_generation():
     participant_id, duration_range, size = 1, 100, 100
-    assert True
\ No newline at end of file
+    assert experiment.generate_intertrials(participant_id, duration_range, size) == [100] * size
+    assert experiment.generate_intertrials(participant_id, [100], size) == [100] * size
+
+    intertrials = experiment.generate_intertrials(participant_id, (500, 800), size, seed=111)
+    assert all(500 <= intertrial < 800 for intertrial in intertrials)
+    assert intertrials == experiment.generate_intertrials(participant_id, (500, 800), size, seed=111)
+    for i in range(2, 10):
+        other = experiment.generate_intertrials(i, (500, 800), size, seed=111)
+        assert sorted(other) == sorted(intertrials)
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Timing benchmarks of the trial loop.
+
+Every paradigm runs the whole session of participant 1 through ExperimentSession with the dummy
+SDL drivers, short silent stimuli, short pauses and fake serial and XID trigger devices, see
+the headless_session fixture in tests/conftest.py. The
+report contains the percentiles of the onset error, the drift of the onsets over the session, the
+trigger dispatch latency and the memory allocated per trial. The tests fail when the timing gets
+worse than THRESHOLDS. They take about a minute, so they only run with
+
+TIMING_BENCHMARK=1 python -m pytest -s tests/timing
+
+The reports are printed and written as JSON to the folder in TIMING_REPORT_DIR, by default to
+the temporary folder of the test.
+"""
+import csv
+import json
+import os
+import statistics
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import src.core.experimental_flow as flow
+from src.core.clock import experiment_clock
+
+pytestmark = pytest.mark.skipif(not os.environ.get('TIMING_BENCHMARK'),
+                                reason='set TIMING_BENCHMARK=1 to run the timing benchmarks')
+
+# in milliseconds
+THRESHOLDS = {'onset_error_median_ms': 1, 'onset_error_p95_ms': 5, 'drift_ms': 2,
+              'dispatch_latency_median_ms': 1, 'trigger_lag_median_ms': 2}
+PARADIGMS = [('neuro3_syllables', False), ('neuro3_syllables', True),
+             ('syllable_comparison', False), ('standard_nonstandard', False)]
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) > 0 else None
+
+
+def run_session(headless_session, paradigm_name, premix_blocks):
+    session = headless_session(paradigm_name, premix_blocks=premix_blocks)
+    with open(next(session.logs_folder.glob('*_timings.csv'))) as f:
+        rows = list(csv.DictReader(f))
+    return session, rows
+
+
+def timing_report(session, rows):
+    onset_errors = np.array([float(row['onset_difference']) * 1000 for row in rows])
+    tenth = max(1, len(onset_errors) // 10)
+    # trigger bytes and the times they were written, in seconds of the session
+    sent = [(ns - experiment_clock.epoch_ns) / 1e9 for ns, value in session.serial_port.written if value != 0]
+    trigger_lags = [(written - float(row['sound_started'])) * 1000 for written, row in zip(sent, rows)]
+    dispatch = [latency / 1e6 for device in session.fake_devices for latency in device.queue_latencies]
+    return {'n_trials': len(rows),
+            'onset_error_median_ms': percentile(np.abs(onset_errors), 50),
+            'onset_error_p95_ms': percentile(np.abs(onset_errors), 95),
+            'onset_error_p99_ms': percentile(np.abs(onset_errors), 99),
+            'onset_error_max_ms': float(np.abs(onset_errors).max()),
+            # difference of the onset errors at the end and at the start of the session
+            'drift_ms': float(np.median(onset_errors[-tenth:]) - np.median(onset_errors[:tenth])),
+            'dispatch_latency_median_ms': percentile(dispatch, 50),
+            'dispatch_latency_p95_ms': percentile(dispatch, 95),
+            'trigger_lag_median_ms': percentile(trigger_lags, 50),
+            'trigger_lag_p95_ms': percentile(trigger_lags, 95),
+            'n_triggers': len(sent)}
+
+
+def write_report(name, report, tmp_path):
+    folder = os.environ.get('TIMING_REPORT_DIR') or str(tmp_path / 'timing_benchmark')
+    os.makedirs(folder, exist_ok=True)
+    filename = os.path.join(folder, f'{datetime.now().strftime("%Y%m%d-%H%M%S")}_{name}.json')
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\n{name}: {json.dumps(report, indent=2)}')
+
+
+@pytest.mark.parametrize('paradigm_name, premix_blocks', PARADIGMS)
+def test_trial_loop_timing(paradigm_name, premix_blocks, headless_session, tmp_path):
+    session, rows = run_session(headless_session, paradigm_name, premix_blocks)
+    report = timing_report(session, rows)
+    write_report(f'{paradigm_name}{"_premix" if premix_blocks else ""}', report, tmp_path)
+    assert report['n_trials'] == len(session.trials)
+    assert report['n_triggers'] == len(session.trials)
+    for key, threshold in THRESHOLDS.items():
+        assert abs(report[key]) <= threshold, f'{key} is {report[key]:.3f} ms, more than {threshold} ms'
+
+
+def test_allocations_per_trial(headless_session, tmp_path, monkeypatch):
+    allocations = []
+    play_trial = flow.play_trial
+    def traced_play_trial(*args, **kwargs):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        timings = play_trial(*args, **kwargs)
+        allocations.append(tracemalloc.get_traced_memory()[1] - before)
+        return timings
+    monkeypatch.setattr(flow, 'play_trial', traced_play_trial)
+    tracemalloc.start()
+    try:
+        run_session(headless_session, 'standard_nonstandard', False)
+    finally:
+        tracemalloc.stop()
+    report = {'n_trials': len(allocations),
+              'allocated_median_bytes': statistics.median(allocations),
+              'allocated_max_bytes': max(allocations)}
+    write_report('allocations', report, tmp_path)
+    # a trial only creates its timings
+    assert report['allocated_median_bytes'] < 16 * 1024